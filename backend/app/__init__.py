@@ -1,7 +1,7 @@
 from flask import Flask
 from flask import redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
+from flask_login import LoginManager, login_required
 from flask_caching import Cache
 from dotenv import load_dotenv
 import os
@@ -23,8 +23,15 @@ def create_app(config_name='development'):
     app.config.from_object(config[config_name])
     
     # Initialize extensions
+    from backend.app.utils.db_engine import engine_options, install_pragmas
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
     db.init_app(app)
+    with app.app_context():
+        install_pragmas(db.engine, app.config)
     login_manager.init_app(app)
+    from backend.app.utils.view_cache import check_backend
+    check_backend(app.config)
     cache.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
@@ -38,9 +45,26 @@ def create_app(config_name='development'):
     app.register_blueprint(goals_bp)
     app.register_blueprint(gamification_bp)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create database tables (and any columns/indexes added since they were created).
+    # Production skips this and relies on `flask init-db` at deploy time.
+    if app.config.get('SCHEMA_SYNC_ON_STARTUP', True):
+        with app.app_context():
+            from backend.app.utils.schema import sync_schema
+            sync_schema()
+    
+    from backend.app.cli import register_commands
+    register_commands(app)
+    
+    # Metrics first: after_request hooks run in reverse, so its timer also covers inline jobs
+    from backend.app.utils import metrics
+    metrics.init_app(app)
+    
+    from backend.app.utils import jobs
+    jobs.init_app(app)
+    
+    # Registered last so compression runs first, inside the metrics timer
+    from backend.app.utils import assets
+    assets.init_app(app)
     
     # Root route: redirect to dashboard if logged in, otherwise show landing page
     @app.route('/')
@@ -55,6 +79,13 @@ def create_app(config_name='development'):
     @app.route('/favicon.ico')
     def favicon():
         return redirect(url_for('static', filename='favicon.svg'))
+    # Per-worker cache counters, for checking hit rates under load
+    @app.route('/health/cache')
+    @login_required
+    def cache_health():
+        from backend.app.utils import user_cache
+        return {'user_cache': user_cache.stats()}
+    
     @app.shell_context_processor
     def make_shell_context():
         return {'db': db}
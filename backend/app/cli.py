@@ -0,0 +1,213 @@
+import os
+import signal
+import click
+
+def _worker_process(config_name, batch_size, burst):
+    """Entry point of one `flask run-worker` process (needs its own app and engine)."""
+    from backend.app import create_app
+    from backend.app.utils.jobs import work
+    
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    app = create_app(config_name)
+    with app.app_context():
+        return work(batch_size=batch_size, burst=burst, should_stop=lambda: bool(stopping))
+
+def register_commands(app):
+    """Attach maintenance commands to ``flask``."""
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """Create or upgrade the schema and add the reference foods and badges (run once per deploy)."""
+        from backend.app.utils.schema import upgrade_schema
+        from backend.app.utils.reference_data import seed
+        result = upgrade_schema()
+        for column in result['columns']:
+            click.echo(f'+ column {column}')
+        for index in result['indexes']:
+            click.echo(f'+ index {index}')
+        for table, count in result['backfilled'].items():
+            if count:
+                click.echo(f'✓ Backfilled local_day on {count} {table} rows')
+        added = seed()
+        click.echo(f"✓ Added {added['foods']} foods and {added['badges']} badges")
+        click.echo('✅ Database ready!')
+    
+    @app.cli.command('upgrade-db')
+    def upgrade_db():
+        """Add missing columns/indexes and backfill derived columns."""
+        from backend.app.utils.schema import upgrade_schema
+        result = upgrade_schema()
+        for column in result['columns']:
+            click.echo(f'+ column {column}')
+        for index in result['indexes']:
+            click.echo(f'+ index {index}')
+        for table, count in result['backfilled'].items():
+            click.echo(f'✓ Backfilled local_day on {count} {table} rows')
+        click.echo('✅ Database upgrade complete!')
+    
+    @app.cli.command('rebuild-stats')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+    def rebuild_stats(user_id):
+        """Recompute the daily rollup table from raw workouts and food entries."""
+        from backend.app.utils.rollups import rebuild_daily_stats
+        count = rebuild_daily_stats(user_id=user_id)
+        click.echo(f'✓ Rebuilt {count} daily stats rows')
+    
+    @app.cli.command('rebuild-records')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+    def rebuild_records(user_id):
+        """Recompute personal records from each user's workout history."""
+        from backend.app import db
+        from backend.app.models.user import User
+        from backend.app.utils.records import rebuild
+        user_ids = [user_id] if user_id else db.session.scalars(db.select(User.id)).all()
+        for uid in user_ids:
+            rebuild(uid)
+            db.session.commit()
+        click.echo(f'✓ Rebuilt personal records for {len(user_ids)} users')
+    
+    @app.cli.command('import-workouts')
+    @click.argument('username')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+                  help='Defaults to the file extension.')
+    @click.option('--batch-size', type=int, default=1000, show_default=True)
+    def import_workouts_command(username, path, fmt, batch_size):
+        """Bulk import workouts for USERNAME from a CSV or NDJSON file."""
+        from backend.app.models.user import User
+        from backend.app.utils.workout_import import detect_format, import_workouts
+        
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User '{username}' not found.")
+        
+        def progress(totals):
+            click.echo(f"  read {totals['read']}, imported {totals['imported']}, "
+                       f"duplicates {totals['duplicates']}, invalid {totals['invalid']}")
+        
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = import_workouts(user, stream, fmt=fmt or detect_format(path),
+                                     batch_size=batch_size, progress=progress)
+        click.echo(f"✓ Imported {result['imported']} workouts for {username} (+{result['xp_awarded']} XP)")
+    
+    @app.cli.command('prune-heart-rate')
+    def prune_heart_rate():
+        """Delete heart-rate chunks past their tier's retention period."""
+        from backend.app.utils.heart_rate import prune
+        for tier, count in prune().items():
+            click.echo(f'✓ Removed {count} {tier} chunks')
+    
+    @app.cli.command('run-worker')
+    @click.option('--processes', type=int, default=1, show_default=True, help='Worker processes to start.')
+    @click.option('--batch-size', type=int, default=10, show_default=True, help='Jobs claimed per poll.')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    def run_worker(processes, batch_size, burst):
+        """Process background jobs (XP, streaks, badges) from the jobs table."""
+        import multiprocessing
+        config_name = os.environ.get('FLASK_ENV', 'development')
+        if processes <= 1:
+            count = _worker_process(config_name, batch_size, burst)
+            click.echo(f'✓ Processed {count} jobs')
+            return
+        
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=_worker_process, args=(config_name, batch_size, burst))
+                   for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        click.echo(f'✓ Started {processes} worker processes')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+    
+    @app.cli.command('job-status')
+    @click.option('--prune-days', type=int, default=None, help='Also delete jobs finished this many days ago.')
+    def job_status(prune_days):
+        """Show job counts per status."""
+        from backend.app.utils import jobs
+        if prune_days is not None:
+            click.echo(f'✓ Pruned {jobs.prune(prune_days)} finished jobs')
+        requeued = jobs.requeue_stale()
+        if requeued:
+            click.echo(f'✓ Requeued {requeued} stale jobs')
+        for status, count in sorted(jobs.counts().items()):
+            click.echo(f'  {status}: {count}')
+    
+    @app.cli.command('recompute')
+    @click.option('--username', default=None, help='Re-cost this user\'s workouts at their current weight.')
+    @click.option('--food-id', type=int, default=None, help='Re-copy this food\'s nutrients into its entries.')
+    @click.option('--since', type=click.DateTime(['%Y-%m-%d']), default=None, help='First local day to rewrite.')
+    @click.option('--until', type=click.DateTime(['%Y-%m-%d']), default=None, help='Last local day to rewrite.')
+    @click.option('--batch-size', type=int, default=None, help='Rows rewritten per transaction.')
+    @click.option('--enqueue', is_flag=True, help='Hand the work to the job queue instead of running it here.')
+    def recompute(username, food_id, since, until, batch_size, enqueue):
+        """Rewrite workout calories or food-entry macros after a weight or food correction."""
+        from backend.app import db
+        from backend.app.models.user import User
+        from backend.app.utils import jobs, recompute
+        if (username is None) == (food_id is None):
+            raise click.UsageError('Pass exactly one of --username or --food-id.')
+        start = since.date() if since else None
+        end = until.date() if until else None
+        
+        if username is not None:
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                raise click.ClickException(f'No user named {username}')
+            kind, payload = 'recompute_workout_calories', {'user_id': user.id}
+        else:
+            kind, payload = 'recompute_food_entries', {'food_id': food_id}
+        if enqueue:
+            payload.update(start=start.isoformat() if start else None, end=end.isoformat() if end else None)
+            jobs.enqueue(kind, payload)
+            db.session.commit()
+            click.echo('✓ Queued recompute job')
+            return
+        
+        def progress(rows):
+            click.echo(f'  {rows} rows rewritten')
+        
+        if username is not None:
+            rows, _ = recompute.workout_calories(user.id, start, end, batch_size=batch_size, progress=progress)
+        else:
+            rows, _ = recompute.food_entry_macros(food_id, start, end, batch_size=batch_size, progress=progress)
+        click.echo(f'✅ Recomputed {rows} rows')
+    
+    @app.cli.command('archive-old-data')
+    @click.option('--days', type=int, default=None, help='Archive rows older than this (default ARCHIVE_AFTER_DAYS).')
+    @click.option('--batch-size', type=int, default=None, help='Rows moved per transaction.')
+    @click.option('--max-batches', type=int, default=None, help='Stop after this many batches; re-run to resume.')
+    @click.option('--enqueue', is_flag=True, help='Hand the work to the job queue instead of running it here.')
+    def archive_old_data(days, batch_size, max_batches, enqueue):
+        """Move old workouts and food entries into the archive tables."""
+        from datetime import datetime, timedelta
+        from backend.app import db
+        from backend.app.utils import archive, jobs
+        if enqueue:
+            jobs.enqueue('archive_old_data', {'days': days, 'batch_size': batch_size})
+            db.session.commit()
+            click.echo('✓ Queued archive job')
+            return
+        before = datetime.utcnow() - timedelta(days=days) if days is not None else None
+        
+        def progress(table, moved):
+            click.echo(f'  {table}: {moved} archived')
+        
+        counts, done = archive.archive_old_rows(before, batch_size, max_batches, progress=progress)
+        for table, moved in counts.items():
+            click.echo(f'✓ {table}: {moved} rows archived')
+        click.echo('✅ Archive up to date' if done else 'Stopped early; run again to continue')
+    
+    @app.cli.command('build-assets')
+    def build_assets():
+        """Write content-hashed, precompressed copies of the static files (run at build time)."""
+        from backend.app.utils import assets
+        manifest = assets.build(app.static_folder)
+        for name, hashed in sorted(manifest['assets'].items()):
+            encodings = ', '.join(manifest['encodings'].get(hashed, [])) or 'uncompressed'
+            click.echo(f'✓ {name} -> {hashed} ({encodings})')
+        click.echo(f"✅ Built {len(manifest['assets'])} assets; restart the app to serve them")
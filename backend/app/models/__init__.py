@@ -3,5 +3,10 @@ from .workout import Workout
 from .food import Food, FoodEntry
 from .goal import Goal
 from .gamification import Badge, UserBadge, GamificationState
+from .stats import DailyUserStats, ActivityMonth
+from .heart_rate import HeartRateChunk
+from .records import PersonalRecord
+from .job import Job
+from .archive import ArchivedWorkout, ArchivedFoodEntry
 
-__all__ = ['User', 'Workout', 'Food', 'FoodEntry', 'Goal', 'Badge', 'UserBadge', 'GamificationState']
+__all__ = ['User', 'Workout', 'Food', 'FoodEntry', 'Goal', 'Badge', 'UserBadge', 'GamificationState', 'DailyUserStats', 'ActivityMonth', 'HeartRateChunk', 'PersonalRecord', 'Job', 'ArchivedWorkout', 'ArchivedFoodEntry']
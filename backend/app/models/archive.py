@@ -0,0 +1,95 @@
+from backend.app import db
+from datetime import datetime
+
+class ArchivedWorkout(db.Model):
+    """A workout moved out of the hot table once older than the archive horizon (see utils/archive.py)."""
+    __tablename__ = 'workouts_archive'
+    
+    is_archived = True  # Read-only history: no edit/delete, no heart-rate data
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id it had in workouts
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    exercise_type = db.Column(db.String(50), nullable=False)
+    activity_name = db.Column(db.String(100), nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    intensity = db.Column(db.String(20), nullable=True)
+    distance_km = db.Column(db.Float, nullable=True)
+    calories_burned = db.Column(db.Float, nullable=True)
+    heart_rate_avg = db.Column(db.Integer, nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    
+    logged_at = db.Column(db.DateTime, nullable=False)
+    local_day = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_workouts_archive_user_logged_at', 'user_id', 'logged_at'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'id': self.id,
+            'exercise_type': self.exercise_type,
+            'activity_name': self.activity_name,
+            'duration_minutes': self.duration_minutes,
+            'intensity': self.intensity,
+            'distance_km': self.distance_km,
+            'calories_burned': self.calories_burned,
+            'heart_rate_avg': self.heart_rate_avg,
+            'notes': self.notes,
+            'logged_at': self.logged_at.isoformat(),
+            'archived': True,
+        }
+    
+    def __repr__(self):
+        return f'<ArchivedWorkout {self.activity_name} - {self.duration_minutes}min>'
+
+class ArchivedFoodEntry(db.Model):
+    """A food entry moved out of the hot table once older than the archive horizon."""
+    __tablename__ = 'food_entries_archive'
+    
+    is_archived = True
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id it had in food_entries
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    food_id = db.Column(db.Integer, db.ForeignKey('foods.id'), nullable=False)
+    
+    quantity_grams = db.Column(db.Float, nullable=False)
+    meal_type = db.Column(db.String(20), nullable=True)
+    calories = db.Column(db.Float, nullable=False)
+    protein_g = db.Column(db.Float, nullable=True)
+    fat_g = db.Column(db.Float, nullable=True)
+    carbs_g = db.Column(db.Float, nullable=True)
+    
+    logged_at = db.Column(db.DateTime, nullable=False)
+    local_day = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    food = db.relationship('Food')
+    
+    __table_args__ = (
+        db.Index('ix_food_entries_archive_user_logged_at', 'user_id', 'logged_at'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'id': self.id,
+            'food_name': self.food.name,
+            'quantity_grams': self.quantity_grams,
+            'meal_type': self.meal_type,
+            'calories': self.calories,
+            'protein_g': self.protein_g,
+            'fat_g': self.fat_g,
+            'carbs_g': self.carbs_g,
+            'logged_at': self.logged_at.isoformat(),
+            'archived': True,
+        }
+    
+    def __repr__(self):
+        return f'<ArchivedFoodEntry {self.food_id} - {self.quantity_grams}g>'
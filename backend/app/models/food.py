@@ -1,4 +1,5 @@
 from backend.app import db
+from backend.app.utils.dates import to_local_day, stamp_local_day
 from datetime import datetime
 
 class Food(db.Model):
@@ -11,10 +12,23 @@ class Food(db.Model):
     protein_g = db.Column(db.Float, nullable=True)
     fat_g = db.Column(db.Float, nullable=True)
     carbs_g = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Lets each worker's search index notice edits
     
     # Relationships
     food_entries = db.relationship('FoodEntry', backref='food', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def json_columns(cls):
+        """The columns behind to_dict(), by key, for utils/serializers.py."""
+        return {
+            'id': cls.id,
+            'name': cls.name,
+            'calories_per_100g': cls.calories_per_100g,
+            'protein_g': cls.protein_g,
+            'fat_g': cls.fat_g,
+            'carbs_g': cls.carbs_g,
+        }
+    
     def to_dict(self):
         """Convert to dictionary for JSON responses."""
         return {
@@ -49,8 +63,23 @@ class FoodEntry(db.Model):
     
     # Metadata
     logged_at = db.Column(db.DateTime, default=datetime.utcnow)
+    local_day = db.Column(db.Date, nullable=True)  # logged_at as a calendar day in the user's timezone
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_food_entries_user_logged_at', 'user_id', 'logged_at'),
+        db.Index('ix_food_entries_user_local_day', 'user_id', 'local_day'),
+        db.Index('ix_food_entries_food_id', 'food_id'),  # Recomputing a food's entries (utils/recompute.py)
+        {'sqlite_autoincrement': True},  # Ids are kept in food_entries_archive; see Workout
+    )
+    
+    def assign_local_day(self, tz_name=None):
+        """Stamp logged_at (if unset) and bucket it into the user's local day."""
+        if self.logged_at is None:
+            self.logged_at = datetime.utcnow()
+        self.local_day = to_local_day(self.logged_at, tz_name)
+        return self.local_day
+    
     def calculate_macros(self):
         """Calculate nutritional values based on serving size."""
         if not self.food:
@@ -68,6 +97,21 @@ class FoodEntry(db.Model):
         
         return True
     
+    @classmethod
+    def json_columns(cls):
+        """The columns behind to_dict(), by key, for utils/serializers.py (joins Food)."""
+        return {
+            'id': cls.id,
+            'food_name': Food.name,
+            'quantity_grams': cls.quantity_grams,
+            'meal_type': cls.meal_type,
+            'calories': cls.calories,
+            'protein_g': cls.protein_g,
+            'fat_g': cls.fat_g,
+            'carbs_g': cls.carbs_g,
+            'logged_at': cls.logged_at,
+        }
+    
     def to_dict(self):
         """Convert to dictionary for JSON responses."""
         return {
@@ -84,3 +128,8 @@ class FoodEntry(db.Model):
     
     def __repr__(self):
         return f'<FoodEntry {self.food.name} - {self.quantity_grams}g>'
+
+@db.event.listens_for(FoodEntry, 'before_insert')
+@db.event.listens_for(FoodEntry, 'before_update')
+def _stamp_food_entry_local_day(mapper, connection, target):
+    stamp_local_day(connection, target)
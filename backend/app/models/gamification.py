@@ -1,5 +1,7 @@
 from backend.app import db
-from datetime import datetime, timedelta
+from datetime import datetime
+
+XP_PER_ACTIVITY_MINUTE = 5
 
 class GamificationState(db.Model):
     """User's gamification progress (XP, Levels, Streaks)."""
@@ -40,27 +42,17 @@ class GamificationState(db.Model):
             self.xp_in_current_level -= xp_required
             xp_required = self.get_xp_for_next_level()
         
+        from backend.app.utils import leaderboard
+        leaderboard.score_changed('xp', self.user_id, self.total_xp)
         return self.current_level
     
-    def update_streak(self):
-        """Update streak based on last activity."""
-        today = datetime.utcnow().date()
-        
-        if self.last_activity_date is None:
-            self.current_streak = 1
-        elif self.last_activity_date == today:
-            # Already active today
-            pass
-        elif self.last_activity_date == today - timedelta(days=1):
-            # Consecutive day
-            self.current_streak += 1
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
-        else:
-            # Streak broken
-            self.current_streak = 1
+    def update_streak(self, days=()):
+        """Re-derive streaks from the activity calendar; ``days`` are the local days whose workouts changed."""
+        from backend.app.utils import streaks
+        streaks.refresh(self, days)
         
-        self.last_activity_date = today
+        from backend.app.utils import leaderboard
+        leaderboard.score_changed('streak', self.user_id, self.current_streak)
     
     def to_dict(self):
         """Convert to dictionary for JSON responses."""
@@ -118,6 +110,16 @@ class UserBadge(db.Model):
     
     __table_args__ = (db.UniqueConstraint('user_id', 'badge_id', name='unique_user_badge'),)
     
+    @classmethod
+    def json_columns(cls):
+        """The columns behind to_dict(), by key, for utils/serializers.py (joins Badge)."""
+        return {
+            'badge_id': cls.badge_id,
+            'badge_name': Badge.name,
+            'badge_icon': Badge.icon_path,
+            'earned_at': cls.earned_at,
+        }
+    
     def to_dict(self):
         """Convert to dictionary for JSON responses."""
         return {
@@ -18,12 +18,18 @@ class Goal(db.Model):
     goal_period = db.Column(db.String(20), nullable=False)  # 'daily', 'weekly', 'monthly', 'overall'
     start_date = db.Column(db.DateTime, default=datetime.utcnow)
     target_date = db.Column(db.DateTime, nullable=True)
+    period_start = db.Column(db.Date, nullable=True)  # First local day of the window current_value covers (tracked goals)
     
     # Metadata
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    def is_tracked(self):
+        """Whether current_value is kept up to date from workouts and meals (see utils/goal_progress.py)."""
+        from backend.app.utils.goal_progress import is_tracked
+        return is_tracked(self)
+    
     def progress_percentage(self):
         """Calculate progress as percentage of target."""
         if not self.target_value or self.target_value == 0:
@@ -62,6 +68,8 @@ class Goal(db.Model):
             'progress_percentage': self.progress_percentage(),
             'is_completed': self.is_completed(),
             'is_active': self.is_active,
+            'is_tracked': self.is_tracked(),
+            'period_start': self.period_start.isoformat() if self.period_start else None,
             'target_date': self.target_date.isoformat() if self.target_date else None,
         }
     
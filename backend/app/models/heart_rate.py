@@ -0,0 +1,38 @@
+from backend.app import db
+from datetime import datetime
+
+class HeartRateChunk(db.Model):
+    """A packed run of heart-rate samples recorded during a workout.
+
+    Samples are never stored one row each: a chunk holds a delta-encoded
+    payload (see utils/heart_rate.py) plus summary columns so averages and
+    ranges can be computed without unpacking anything.
+    """
+    __tablename__ = 'heart_rate_chunks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # 'raw' (as received), '1s' (per-second means) or '1m' (per-minute means)
+    tier = db.Column(db.String(8), nullable=False, default='raw')
+    started_at = db.Column(db.DateTime, nullable=False)  # Timestamp of the first sample (UTC)
+    ended_at = db.Column(db.DateTime, nullable=False)
+
+    # Summary of the samples in the payload
+    sample_count = db.Column(db.Integer, nullable=False)
+    bpm_sum = db.Column(db.Integer, nullable=False)
+    bpm_min = db.Column(db.Integer, nullable=False)
+    bpm_max = db.Column(db.Integer, nullable=False)
+
+    payload = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_heart_rate_chunks_workout_tier_start', 'workout_id', 'tier', 'started_at'),
+    )
+
+    workout = db.relationship('Workout', backref=db.backref('heart_rate_chunks', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<HeartRateChunk {self.workout_id} {self.tier} x{self.sample_count}>'
@@ -0,0 +1,43 @@
+from backend.app import db
+from datetime import datetime
+
+class Job(db.Model):
+    """A unit of deferred work, run by `flask run-worker` (see utils/jobs.py)."""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # Handler name, e.g. 'workout_logged'
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON arguments for the handler
+    dedupe_key = db.Column(db.String(100), nullable=True, unique=True)  # At most one job per key
+    
+    # 'queued' -> 'running' -> 'done', or back to 'queued' for a retry, or 'failed'
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not picked up before this
+    
+    # Claim bookkeeping; a 'running' job whose lock is too old is requeued
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'run_at': self.run_at.isoformat(),
+            'last_error': self.last_error,
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
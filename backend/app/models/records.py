@@ -0,0 +1,32 @@
+from backend.app import db
+from datetime import datetime
+
+class PersonalRecord(db.Model):
+    """A user's best workout for one record type (see utils/records.py)."""
+    __tablename__ = 'personal_records'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    record_type = db.Column(db.String(30), nullable=False)  # 'fastest_5k', 'longest_run', 'longest_ride', 'max_calories'
+    
+    # The workout holding the record and the value it set
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False)
+    value = db.Column(db.Float, nullable=False)  # Minutes for fastest_5k, km for distances, kcal for calories
+    achieved_at = db.Column(db.DateTime, nullable=False)  # logged_at of the workout
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Also serves as the user_id index for the dashboard panel
+    __table_args__ = (db.UniqueConstraint('user_id', 'record_type', name='unique_user_record'),)
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'record_type': self.record_type,
+            'workout_id': self.workout_id,
+            'value': self.value,
+            'achieved_at': self.achieved_at.isoformat(),
+        }
+    
+    def __repr__(self):
+        return f'<PersonalRecord {self.record_type} {self.value}>'
@@ -0,0 +1,74 @@
+from backend.app import db
+from datetime import datetime
+
+class DailyUserStats(db.Model):
+    """Per-user daily totals, kept in step with workout and food-entry writes."""
+    __tablename__ = 'daily_user_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # Local day of the user (see Workout.local_day)
+    
+    # Activity
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    workout_minutes = db.Column(db.Integer, nullable=False, default=0)
+    calories_burned = db.Column(db.Float, nullable=False, default=0)
+    
+    # Nutrition
+    calories_eaten = db.Column(db.Float, nullable=False, default=0)
+    protein_g = db.Column(db.Float, nullable=False, default=0)
+    fat_g = db.Column(db.Float, nullable=False, default=0)
+    carbs_g = db.Column(db.Float, nullable=False, default=0)
+    
+    # Calories eaten per meal_type
+    breakfast_calories = db.Column(db.Float, nullable=False, default=0)
+    lunch_calories = db.Column(db.Float, nullable=False, default=0)
+    dinner_calories = db.Column(db.Float, nullable=False, default=0)
+    snack_calories = db.Column(db.Float, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Also serves as the (user_id, day) index for range reads
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', name='unique_user_day'),)
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'day': self.day.isoformat(),
+            'workout_count': self.workout_count,
+            'workout_minutes': self.workout_minutes,
+            'calories_burned': self.calories_burned,
+            'calories_eaten': self.calories_eaten,
+            'protein_g': self.protein_g,
+            'fat_g': self.fat_g,
+            'carbs_g': self.carbs_g,
+            'breakfast_calories': self.breakfast_calories,
+            'lunch_calories': self.lunch_calories,
+            'dinner_calories': self.dinner_calories,
+            'snack_calories': self.snack_calories,
+        }
+    
+    def __repr__(self):
+        return f'<DailyUserStats {self.user_id} {self.day}>'
+
+class ActivityMonth(db.Model):
+    """One month of a user's active days as a bitmask (see utils/streaks.py)."""
+    __tablename__ = 'activity_months'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    days = db.Column(db.Integer, nullable=False, default=0)  # Bit n set = local day n + 1 had a workout
+    
+    # Also serves as the (user_id, month) index for range reads
+    __table_args__ = (db.UniqueConstraint('user_id', 'month', name='unique_user_month'),)
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON responses."""
+        return {
+            'month': self.month.isoformat(),
+            'days': self.days,
+        }
+    
+    def __repr__(self):
+        return f'<ActivityMonth {self.user_id} {self.month}>'
@@ -1,6 +1,7 @@
 from backend.app import db, login_manager
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from backend.app.utils.dates import DEFAULT_TIMEZONE, local_today
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -17,6 +18,7 @@ class User(UserMixin, db.Model):
     weight_kg = db.Column(db.Float, nullable=True)  # Current weight in kg
     age = db.Column(db.Integer, nullable=True)
     gender = db.Column(db.String(10), nullable=True)  # 'M', 'F', or 'Other'
+    timezone = db.Column(db.String(64), nullable=False, default=DEFAULT_TIMEZONE)  # IANA name, used for day bucketing
     
     # Account timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -51,10 +53,16 @@ class User(UserMixin, db.Model):
         
         return bmr
     
+    def local_today(self):
+        """Today's date in the user's timezone."""
+        return local_today(self.timezone)
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
 @login_manager.user_loader
 def load_user(user_id):
     """Load user by ID for Flask-Login."""
-    return User.query.get(int(user_id))
+    # Served from a short-lived per-worker cache on reads (see utils/user_cache.py)
+    from backend.app.utils import user_cache
+    return user_cache.load_user(int(user_id))
@@ -1,4 +1,5 @@
 from backend.app import db
+from backend.app.utils.dates import to_local_day, stamp_local_day
 from datetime import datetime
 
 # MET (Metabolic Equivalent of Task) values for various exercises
@@ -17,10 +18,29 @@ MET_VALUES = {
     'stair_climbing': 9.0,
 }
 
+def estimate_calories(activity_name, intensity, duration_minutes, weight_kg):
+    """Calories burned using the MET formula, or None without a body weight."""
+    if not weight_kg:
+        return None
+    
+    # Get MET value for activity
+    met = MET_VALUES.get(activity_name.lower(), 5.0)
+    
+    # Adjust for intensity if provided
+    if intensity == 'light':
+        met *= 0.8
+    elif intensity == 'vigorous':
+        met *= 1.2
+    
+    # Formula: Calories = MET * Weight (kg) * Duration (hours)
+    return round(met * weight_kg * (duration_minutes / 60), 2)
+
 class Workout(db.Model):
     """Workout model for activity tracking."""
     __tablename__ = 'workouts'
     
+    is_archived = False  # See ArchivedWorkout
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
@@ -34,30 +54,40 @@ class Workout(db.Model):
     # Calculated fields
     calories_burned = db.Column(db.Float, nullable=True)
     heart_rate_avg = db.Column(db.Integer, nullable=True)  # Average BPM during workout
+    xp_pending = db.Column(db.Boolean, nullable=False, default=False)  # XP/streak not yet applied by the job queue
     
     # Notes and metadata
     notes = db.Column(db.Text, nullable=True)
     logged_at = db.Column(db.DateTime, default=datetime.utcnow)
+    local_day = db.Column(db.Date, nullable=True)  # logged_at as a calendar day in the user's timezone
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_workouts_user_logged_at', 'user_id', 'logged_at'),
+        db.Index('ix_workouts_user_local_day', 'user_id', 'local_day'),
+        # Filtered listings (see utils/workout_listing.py)
+        db.Index('ix_workouts_user_type_logged_at', 'user_id', 'exercise_type', 'logged_at'),
+        db.Index('ix_workouts_user_intensity_logged_at', 'user_id', 'intensity', 'logged_at'),
+        # Never reuse the id of a deleted (or archived) row: it could collide in workouts_archive
+        {'sqlite_autoincrement': True},
+    )
+    
+    def assign_local_day(self, tz_name=None):
+        """Stamp logged_at (if unset) and bucket it into the user's local day."""
+        if self.logged_at is None:
+            self.logged_at = datetime.utcnow()
+        self.local_day = to_local_day(self.logged_at, tz_name)
+        return self.local_day
+    
     def calculate_calories_burned(self):
         """Calculate calories burned using MET formula."""
         if not self.user.weight_kg:
             return None
         
-        # Get MET value for activity
-        met = MET_VALUES.get(self.activity_name.lower(), 5.0)
-        
-        # Adjust for intensity if provided
-        if self.intensity == 'light':
-            met *= 0.8
-        elif self.intensity == 'vigorous':
-            met *= 1.2
-        
-        # Formula: Calories = MET * Weight (kg) * Duration (hours)
-        calories = met * self.user.weight_kg * (self.duration_minutes / 60)
-        self.calories_burned = round(calories, 2)
+        self.calories_burned = estimate_calories(
+            self.activity_name, self.intensity, self.duration_minutes, self.user.weight_kg
+        )
         return self.calories_burned
     
     def to_dict(self):
@@ -77,3 +107,8 @@ class Workout(db.Model):
     
     def __repr__(self):
         return f'<Workout {self.activity_name} - {self.duration_minutes}min>'
+
+@db.event.listens_for(Workout, 'before_insert')
+@db.event.listens_for(Workout, 'before_update')
+def _stamp_workout_local_day(mapper, connection, target):
+    stamp_local_day(connection, target)
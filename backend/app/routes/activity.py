@@ -1,22 +1,68 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from backend.app import db
 from backend.app.models.workout import Workout, MET_VALUES
-from backend.app.models.gamification import GamificationState
-from datetime import datetime
+from backend.app.models.gamification import XP_PER_ACTIVITY_MINUTE
+from backend.app.utils import hooks
+from backend.app.utils import workout_import, heart_rate, workout_listing
+from backend.app.utils.query_budget import query_budget
+import io
 
 activity_bp = Blueprint('activity', __name__, url_prefix='/activity')
 
 @activity_bp.route('/')
 @login_required
+@query_budget(4)  # hot page, newest archived, archive page, total (cold cache)
 def index():
     """View all workouts."""
-    page = request.args.get('page', 1, type=int)
-    workouts = Workout.query.filter_by(user_id=current_user.id).order_by(
-        Workout.logged_at.desc()
-    ).paginate(page=page, per_page=10)
+    try:
+        filters = workout_listing.parse_filters(request.args)
+        workouts, next_cursor, prev_cursor = workout_listing.list_workouts(
+            current_user.id, filters,
+            after=request.args.get('after'), before=request.args.get('before'),
+        )
+    except ValueError as exc:
+        flash(str(exc), 'danger')
+        return redirect(url_for('activity.index'))
+    
+    # Filter values to carry over into the pagination links
+    filter_args = {name: value.isoformat() if hasattr(value, 'isoformat') else value
+                   for name, value in filters.items()}
     
-    return render_template('activity/index.html', workouts=workouts)
+    return render_template('activity/index.html',
+                         workouts=workouts,
+                         total=workout_listing.count_workouts(current_user.id, filters),
+                         filters=filter_args,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor,
+                         exercise_types=workout_listing.EXERCISE_TYPES,
+                         intensities=workout_listing.INTENSITIES)
+
+@activity_bp.route('/api/workouts')
+@login_required
+@query_budget(4)  # hot page, newest archived, archive page, total (cold cache)
+def list_workouts():
+    """Keyset-paginated workout listing (API endpoint).
+    
+    Query args: exercise_type, intensity, start/end (YYYY-MM-DD local days),
+    limit, and either after=<next_cursor> or before=<prev_cursor>.
+    """
+    try:
+        filters = workout_listing.parse_filters(request.args)
+        workouts, next_cursor, prev_cursor = workout_listing.list_workouts(
+            current_user.id, filters,
+            after=request.args.get('after'), before=request.args.get('before'),
+            limit=request.args.get('limit', workout_listing.DEFAULT_LIMIT, type=int),
+        )
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    
+    return jsonify({
+        'workouts': [workout.to_dict() for workout in workouts],
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'total': workout_listing.count_workouts(current_user.id, filters),
+    })
 
 @activity_bp.route('/log', methods=['GET', 'POST'])
 @login_required
@@ -52,19 +98,17 @@ def log_activity():
         workout.calculate_calories_burned()
         
         db.session.add(workout)
+        hooks.workout_logged(workout)
         db.session.commit()
         
-        # Award XP and update streak
-        gamification = current_user.gamification_state
-        if gamification:
-            xp_awarded = duration * 5  # 5 XP per minute of activity
-            gamification.add_xp(xp_awarded)
-            gamification.update_streak()
-            db.session.commit()
-            
-            flash(f'Workout logged! You earned {xp_awarded} XP.', 'success')
-        else:
+        # XP, streak and badges are applied by the background job queued above; only
+        # inline jobs (run as this request finishes) have certainly been applied by the next page
+        if not current_user.gamification_state:
             flash('Workout logged successfully.', 'success')
+        elif current_app.config.get('JOBS_RUN_INLINE'):
+            flash(f'Workout logged! You earned {duration * XP_PER_ACTIVITY_MINUTE} XP.', 'success')
+        else:
+            flash(f'Workout logged! {duration * XP_PER_ACTIVITY_MINUTE} XP will be added to your total shortly.', 'success')
         
         return redirect(url_for('activity.index'))
     
@@ -83,6 +127,7 @@ def edit_activity(workout_id):
         return redirect(url_for('activity.index'))
     
     if request.method == 'POST':
+        before = hooks.snapshot_workout(workout)
         workout.exercise_type = request.form.get('exercise_type', '').strip()
         workout.activity_name = request.form.get('activity_name', '').strip()
         workout.duration_minutes = request.form.get('duration_minutes', type=int)
@@ -94,6 +139,7 @@ def edit_activity(workout_id):
         # Recalculate calories
         workout.calculate_calories_burned()
         
+        hooks.workout_edited(workout, before)
         db.session.commit()
         flash('Workout updated successfully.', 'success')
         return redirect(url_for('activity.index'))
@@ -111,11 +157,78 @@ def delete_activity(workout_id):
         flash('You do not have permission to delete this workout.', 'danger')
         return redirect(url_for('activity.index'))
     
+    hooks.workout_deleted(workout)
     db.session.delete(workout)
     db.session.commit()
     flash('Workout deleted successfully.', 'success')
     return redirect(url_for('activity.index'))
 
+@activity_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_activities():
+    """Bulk import workouts from a CSV or NDJSON export."""
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a file to import.', 'danger')
+            return redirect(url_for('activity.import_activities'))
+        
+        fmt = request.form.get('format') or workout_import.detect_format(upload.filename)
+        if fmt not in workout_import.FORMATS:
+            flash('Unsupported file format.', 'danger')
+            return redirect(url_for('activity.import_activities'))
+        
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        result = workout_import.import_workouts(current_user, stream, fmt=fmt)
+        
+        flash(f"Imported {result['imported']} workouts ({result['duplicates']} duplicates, "
+              f"{result['invalid']} invalid rows skipped). You earned {result['xp_awarded']} XP.", 'success')
+        for name in result['badges']:
+            flash(f'New badge unlocked: {name}!', 'success')
+        return redirect(url_for('activity.index'))
+    
+    return render_template('activity/import.html')
+
+@activity_bp.route('/<int:workout_id>/heart-rate', methods=['POST'])
+@login_required
+def upload_heart_rate(workout_id):
+    """Store a batch of heart-rate samples: {"samples": [[epoch_ms, bpm], ...]}."""
+    workout = Workout.query.get_or_404(workout_id)
+    
+    if workout.user_id != current_user.id:
+        return {'error': 'Unauthorized'}, 403
+    
+    payload = request.get_json(silent=True) or {}
+    raw_samples = payload.get('samples') or []
+    if not isinstance(raw_samples, list) or len(raw_samples) > heart_rate.MAX_BATCH:
+        return {'error': f'Send between 1 and {heart_rate.MAX_BATCH} samples per batch'}, 400
+    
+    samples = heart_rate.clean_samples(raw_samples)
+    if not samples:
+        return {'error': 'No valid samples'}, 400
+    if samples[-1][0] - samples[0][0] > heart_rate.MAX_SPAN_MS:
+        return {'error': 'A batch may span at most 24 hours'}, 400
+    
+    average = heart_rate.ingest(workout, samples)
+    db.session.commit()
+    
+    return {'stored': len(samples), 'heart_rate_avg': average}, 201
+
+@activity_bp.route('/<int:workout_id>/heart-rate')
+@login_required
+def get_heart_rate(workout_id):
+    """Heart-rate series for charting (API endpoint); ?tier=raw|1s|1m."""
+    workout = Workout.query.get_or_404(workout_id)
+    
+    if workout.user_id != current_user.id:
+        return {'error': 'Unauthorized'}, 403
+    
+    tier = request.args.get('tier', '1m')
+    if tier not in heart_rate.TIERS:
+        return {'error': 'Unknown tier'}, 400
+    
+    return jsonify({'tier': tier, 'samples': heart_rate.read_series(workout.id, tier)})
+
 @activity_bp.route('/api/mets')
 @login_required
 def get_mets():
@@ -1,8 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from datetime import date
+from flask import Blueprint, render_template, redirect, url_for, flash, request, Response, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from backend.app import db
 from backend.app.models.user import User
 from backend.app.models.gamification import GamificationState
+from backend.app.utils.dates import is_valid_timezone
+from backend.app.utils import export, jobs, view_cache
 from werkzeug.urls import url_parse
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -104,6 +107,19 @@ def profile():
         weight = request.form.get('weight_kg')
         age = request.form.get('age')
         gender = request.form.get('gender')
+        timezone = request.form.get('timezone', '').strip()
+        recalculate_since = request.form.get('recalculate_since', '').strip()
+        
+        if timezone and not is_valid_timezone(timezone):
+            flash('Unknown timezone.', 'danger')
+            return redirect(url_for('auth.profile'))
+        
+        if recalculate_since:
+            try:
+                recalculate_since = date.fromisoformat(recalculate_since)
+            except ValueError:
+                flash('Invalid date format.', 'danger')
+                return redirect(url_for('auth.profile'))
         
         if height:
             current_user.height_cm = float(height)
@@ -114,9 +130,50 @@ def profile():
         if gender:
             current_user.gender = gender
         
+        timezone_changed = timezone and timezone != current_user.timezone
+        if timezone_changed:
+            current_user.timezone = timezone
+            view_cache.invalidate_user(db.session, current_user.id)
+            # Past entries are bucketed by local day, so move them to the new timezone
+            jobs.enqueue('restamp_local_days', {'user_id': current_user.id})
+        
+        # Past workouts keep the calories of the weight they were logged at unless asked
+        if recalculate_since and current_user.weight_kg:
+            jobs.enqueue('recompute_workout_calories', {'user_id': current_user.id, 'start': recalculate_since.isoformat()})
+        
         db.session.commit()
+        
         flash('Profile updated successfully.', 'success')
         return redirect(url_for('auth.profile'))
     
     bmr = current_user.calculate_bmr()
     return render_template('auth/profile.html', bmr=bmr)
+
+@auth_bp.route('/export')
+@login_required
+def export_data():
+    """Download the user's full history.
+    
+    Query args: format=ndjson|csv, dataset (one of export.DATASETS; NDJSON
+    defaults to all of them, CSV to workouts) and gzip=1.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    dataset = request.args.get('dataset') or None
+    if fmt not in export.FORMATS or (dataset and dataset not in export.DATASETS):
+        flash('Unknown export format or dataset.', 'danger')
+        return redirect(url_for('auth.profile'))
+    
+    if dataset:
+        datasets = [dataset]
+    else:
+        datasets = ['workouts'] if fmt == 'csv' else list(export.DATASETS)
+    compress = request.args.get('gzip') == '1'
+    
+    filename = f"{current_user.username}-{dataset or ('workouts' if fmt == 'csv' else 'history')}-{date.today()}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if compress:
+        filename, mimetype = f'{filename}.gz', 'application/gzip'
+    
+    # The generator runs after the view returns; stream_with_context keeps the request (and session) alive for it
+    body = stream_with_context(export.stream(current_user.id, fmt, datasets, compress))
+    return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename="{filename}"'})
@@ -1,82 +1,78 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template
 from flask_login import login_required, current_user
-from backend.app import db
 from backend.app.models.workout import Workout
-from backend.app.models.food import FoodEntry, Food
 from backend.app.models.goal import Goal
 from backend.app.models.gamification import GamificationState
-from datetime import datetime, timedelta
+from backend.app.utils import goal_progress, records, rollups, view_cache
+from backend.app.utils.query_budget import query_budget
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
+def _workout_summary(workout):
+    """Plain-data copy of a workout for cached dashboard views."""
+    return {
+        'id': workout.id,
+        'activity_name': workout.activity_name,
+        'duration_minutes': workout.duration_minutes,
+        'calories_burned': workout.calories_burned or 0,
+        'logged_at': workout.logged_at,
+    }
+
+def _build_dashboard(user, today):
+    """Assemble the cacheable part of the dashboard for a user."""
+    # Get today's totals from the daily rollup row
+    day_stats = rollups.get_day(user.id, today)
+    
+    # Get active goals, moving tracked ones into a new week/month if one has started
+    active_goals = Goal.query.filter_by(user_id=user.id, is_active=True).all()
+    goal_progress.refresh(active_goals, today)
+    
+    # Get recent activity
+    recent_workouts = Workout.query.filter_by(user_id=user.id).order_by(
+        Workout.logged_at.desc()
+    ).limit(5).all()
+    
+    return {
+        'today_stats': {
+            'workouts': day_stats.workout_count if day_stats else 0,
+            'calories_burned': day_stats.calories_burned if day_stats else 0,
+            'calories_eaten': day_stats.calories_eaten if day_stats else 0,
+        },
+        'active_goals': [goal.to_dict() for goal in active_goals],
+        'recent_workouts': [_workout_summary(w) for w in recent_workouts],
+        'personal_records': records.for_user(user.id),
+    }
+
 @dashboard_bp.route('/')
 @login_required
+@query_budget(5)  # state, day rollup, goals, recent workouts, records (cold cache)
 def index():
     """Main dashboard view."""
     # Get user's gamification state
     gamification = current_user.gamification_state or GamificationState(user_id=current_user.id)
     
-    # Get today's activity
-    today = datetime.utcnow().date()
-    today_workouts = Workout.query.filter(
-        Workout.user_id == current_user.id,
-        db.func.date(Workout.logged_at) == today
-    ).all()
-    
-    today_food = FoodEntry.query.filter(
-        FoodEntry.user_id == current_user.id,
-        db.func.date(FoodEntry.logged_at) == today
-    ).all()
-    
-    # Calculate totals
-    total_calories_burned = sum(w.calories_burned or 0 for w in today_workouts)
-    total_calories_eaten = sum(f.calories for f in today_food)
-    total_workouts = len(today_workouts)
-    
-    # Get active goals
-    active_goals = Goal.query.filter_by(user_id=current_user.id, is_active=True).all()
-    
-    # Get recent activity
-    recent_workouts = Workout.query.filter_by(user_id=current_user.id).order_by(
-        Workout.logged_at.desc()
-    ).limit(5).all()
+    # Everything else is served from the per-user cache until the next write
+    # Keyed by local day too, since "today" and goal windows move without a write
+    today = current_user.local_today()
+    view = view_cache.cached_view(f'dashboard:{today}', current_user.id, lambda: _build_dashboard(current_user, today))
     
     return render_template('dashboard/index.html',
                          gamification=gamification,
-                         today_stats={
-                             'workouts': total_workouts,
-                             'calories_burned': total_calories_burned,
-                             'calories_eaten': total_calories_eaten,
-                         },
-                         active_goals=active_goals,
-                         recent_workouts=recent_workouts)
+                         today_stats=view['today_stats'],
+                         active_goals=view['active_goals'],
+                         recent_workouts=view['recent_workouts'],
+                         personal_records=view['personal_records'])
 
 @dashboard_bp.route('/stats')
 @login_required
+@query_budget(1)
 def stats():
     """Detailed statistics view."""
-    # Get last 30 days of data
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    
-    workouts = Workout.query.filter(
-        Workout.user_id == current_user.id,
-        Workout.logged_at >= thirty_days_ago
-    ).order_by(Workout.logged_at.desc()).all()
-    
-    # Calculate weekly stats
-    weekly_stats = {}
-    for workout in workouts:
-        week_key = workout.logged_at.strftime('%Y-W%W')
-        if week_key not in weekly_stats:
-            weekly_stats[week_key] = {
-                'workouts': 0,
-                'calories': 0,
-                'duration': 0
-            }
-        weekly_stats[week_key]['workouts'] += 1
-        weekly_stats[week_key]['calories'] += workout.calories_burned or 0
-        weekly_stats[week_key]['duration'] += workout.duration_minutes
+    # Weekly stats over the last 30 days, built from at most 31 rollup rows
+    weekly_stats = view_cache.cached_view(
+        'weekly_stats', current_user.id,
+        lambda: rollups.weekly_totals(current_user.id, current_user.local_today(), days=30)
+    )
     
     return render_template('dashboard/stats.html', 
-                         weekly_stats=weekly_stats,
-                         recent_workouts=workouts)
+                         weekly_stats=weekly_stats)
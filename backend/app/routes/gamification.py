@@ -1,23 +1,34 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required, current_user
 from backend.app.models.gamification import GamificationState, Badge, UserBadge
 from backend.app import db
+from backend.app.utils import view_cache, badges, leaderboard, serializers
+from backend.app.utils.query_budget import query_budget
 
 gamification_bp = Blueprint('gamification', __name__, url_prefix='/gamification')
 
 @gamification_bp.route('/dashboard')
 @login_required
+@query_budget(2)
 def dashboard():
     """Gamification dashboard."""
     gamification = current_user.gamification_state or GamificationState(user_id=current_user.id)
     
-    # Get user's badges
-    user_badges = UserBadge.query.filter_by(user_id=current_user.id).all()
+    # Get user's badges (cached until the user's next write)
+    user_badges = view_cache.cached_view('user_badges', current_user.id, lambda: [
+        {
+            'badge_id': ub.badge_id,
+            'name': ub.badge.name,
+            'description': ub.badge.description,
+            'earned_at': ub.earned_at,
+        }
+        for ub in UserBadge.query.options(db.joinedload(UserBadge.badge)).filter_by(user_id=current_user.id).all()
+    ])
     
-    # Get available badges
-    all_badges = Badge.query.all()
+    # Get available badges (the catalog only changes through init_db)
+    all_badges = view_cache.cached_global('badge_catalog', lambda: [b.to_dict() for b in Badge.query.all()])
     
-    earned_badge_ids = {ub.badge_id for ub in user_badges}
+    earned_badge_ids = {ub['badge_id'] for ub in user_badges}
     
     return render_template('gamification/dashboard.html',
                          gamification=gamification,
@@ -31,41 +42,62 @@ def get_status():
     """Get gamification status (API endpoint)."""
     gamification = current_user.gamification_state
     if not gamification:
-        return jsonify({'error': 'Gamification state not found'}), 404
+        return serializers.json_response({'error': 'Gamification state not found'}, 404)
     
-    return jsonify(gamification.to_dict())
+    return serializers.json_response(gamification.to_dict())
 
-def check_and_award_badges(user):
-    """Check badge conditions and award badges to user."""
-    gamification = user.gamification_state
-    
-    if not gamification:
-        return []
+@gamification_bp.route('/api/badges')
+@login_required
+@query_budget(1)
+def list_badges():
+    """Badges the user has earned, oldest first (API endpoint)."""
+    earned = serializers.rows(
+        serializers.select_json(UserBadge)
+        .where(UserBadge.user_id == current_user.id)
+        .order_by(UserBadge.earned_at, UserBadge.id)
+    )
+    return serializers.json_response({'badges': earned})
+
+@gamification_bp.route('/leaderboard')
+@login_required
+@query_budget(2)
+def show_leaderboard():
+    """Leaderboards for XP, streaks and this week's active minutes."""
+    board = request.args.get('board', 'xp')
+    if board not in leaderboard.BOARDS:
+        board = 'xp'
     
-    awarded = []
-    all_badges = Badge.query.all()
+    today = current_user.local_today()
+    return render_template('gamification/leaderboard.html',
+                         boards=leaderboard.BOARDS,
+                         board=board,
+                         entries=leaderboard.top(board, limit=20, day=today),
+                         my_rank=leaderboard.rank(board, current_user.id, day=today))
+
+@gamification_bp.route('/api/leaderboard')
+@login_required
+def get_leaderboard():
+    """Top entries and the current user's rank on a board (API endpoint)."""
+    board = request.args.get('board', 'xp')
+    if board not in leaderboard.BOARDS:
+        return jsonify({'error': 'Unknown board'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
     
-    for badge in all_badges:
-        # Skip if already earned
-        if UserBadge.query.filter_by(user_id=user.id, badge_id=badge.id).first():
-            continue
-        
-        # Check condition
-        if badge.condition_type == 'streak' and gamification.current_streak >= badge.condition_value:
-            user_badge = UserBadge(user_id=user.id, badge_id=badge.id)
-            db.session.add(user_badge)
-            awarded.append(badge)
-        
-        elif badge.condition_type == 'total_xp' and gamification.total_xp >= badge.condition_value:
-            user_badge = UserBadge(user_id=user.id, badge_id=badge.id)
-            db.session.add(user_badge)
-            awarded.append(badge)
-        
-        elif badge.condition_type == 'level' and gamification.current_level >= badge.condition_value:
-            user_badge = UserBadge(user_id=user.id, badge_id=badge.id)
-            db.session.add(user_badge)
-            awarded.append(badge)
+    today = current_user.local_today()
+    return jsonify({
+        'board': board,
+        'entries': leaderboard.top(board, limit=limit, day=today),
+        'me': leaderboard.rank(board, current_user.id, day=today),
+    })
+
+def check_and_award_badges(user):
+    """Award every badge the user qualifies for but hasn't earned yet.
     
+    Logging paths only check the thresholds crossed by their own change (see
+    utils/badges.py); this catches up on anything earned before that.
+    Returns the names of the newly awarded badges.
+    """
+    awarded = badges.award_crossed(user.id, None, badges.snapshot(user.gamification_state))
     if awarded:
         db.session.commit()
     
@@ -2,15 +2,19 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_required, current_user
 from backend.app import db
 from backend.app.models.goal import Goal
-from datetime import datetime, timedelta
+from backend.app.utils import goal_progress, hooks, serializers
+from backend.app.utils.query_budget import query_budget
+from datetime import datetime
 
 goals_bp = Blueprint('goals', __name__, url_prefix='/goals')
 
 @goals_bp.route('/')
 @login_required
+@query_budget(2)
 def index():
     """View all goals."""
     active_goals = Goal.query.filter_by(user_id=current_user.id, is_active=True).all()
+    goal_progress.refresh(active_goals, current_user.local_today())
     completed_goals = Goal.query.filter_by(user_id=current_user.id, is_active=False).all()
     
     return render_template('goals/index.html',
@@ -52,6 +56,7 @@ def create_goal():
         )
         
         db.session.add(goal)
+        hooks.goal_changed(goal)
         db.session.commit()
         
         flash(f'Goal created: {goal_type} - {target_value} {unit}', 'success')
@@ -83,6 +88,7 @@ def edit_goal(goal_id):
                 flash('Invalid date format.', 'danger')
                 return redirect(url_for('goals.edit_goal', goal_id=goal_id))
         
+        hooks.goal_changed(goal)
         db.session.commit()
         flash('Goal updated successfully.', 'success')
         return redirect(url_for('goals.index'))
@@ -99,6 +105,7 @@ def delete_goal(goal_id):
         flash('You do not have permission to delete this goal.', 'danger')
         return redirect(url_for('goals.index'))
     
+    hooks.goal_changed(goal)
     db.session.delete(goal)
     db.session.commit()
     flash('Goal deleted.', 'success')
@@ -111,11 +118,15 @@ def update_progress(goal_id):
     goal = Goal.query.get_or_404(goal_id)
     
     if goal.user_id != current_user.id:
-        return {'error': 'Unauthorized'}, 403
+        return serializers.json_response({'error': 'Unauthorized'}, 403)
+    
+    if goal_progress.is_tracked(goal):
+        return serializers.json_response({'error': 'This goal is tracked automatically from your workouts and meals'}, 400)
     
     current_value = request.form.get('current_value', type=float)
     goal.current_value = current_value
     
+    hooks.goal_changed(goal)
     db.session.commit()
     
-    return {'success': True, 'progress': goal.progress_percentage()}
+    return serializers.json_response({'success': True, 'progress': goal.progress_percentage()})
@@ -2,26 +2,30 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_required, current_user
 from backend.app import db
 from backend.app.models.food import Food, FoodEntry
-from datetime import datetime, timedelta
+from backend.app.utils import hooks, rollups, food_search, serializers, view_cache
+from backend.app.utils.query_budget import query_budget
+from datetime import date, datetime, timedelta
 
 nutrition_bp = Blueprint('nutrition', __name__, url_prefix='/nutrition')
 
 @nutrition_bp.route('/')
 @login_required
+@query_budget(3)
 def index():
     """View nutrition log."""
     # Get today's food entries
-    today = datetime.utcnow().date()
-    today_entries = FoodEntry.query.filter(
+    today = current_user.local_today()
+    today_entries = FoodEntry.query.options(db.joinedload(FoodEntry.food)).filter(
         FoodEntry.user_id == current_user.id,
-        db.func.date(FoodEntry.logged_at) == today
+        FoodEntry.local_day == today
     ).order_by(FoodEntry.logged_at.desc()).all()
     
-    # Calculate daily totals
-    total_calories = sum(e.calories for e in today_entries)
-    total_protein = sum(e.protein_g or 0 for e in today_entries)
-    total_fat = sum(e.fat_g or 0 for e in today_entries)
-    total_carbs = sum(e.carbs_g or 0 for e in today_entries)
+    # Daily totals come from the rollup row rather than re-summing entries
+    day_stats = rollups.get_day(current_user.id, today)
+    total_calories = day_stats.calories_eaten if day_stats else 0
+    total_protein = day_stats.protein_g if day_stats else 0
+    total_fat = day_stats.fat_g if day_stats else 0
+    total_carbs = day_stats.carbs_g if day_stats else 0
     
     # Get BMR for daily calorie recommendation (simplified: 1.5 * BMR)
     bmr = current_user.calculate_bmr()
@@ -66,16 +70,77 @@ def log_food():
         entry.calculate_macros()
         
         db.session.add(entry)
+        hooks.food_entry_logged(entry)
         db.session.commit()
         
         flash(f'Food logged: {food.name} ({quantity}g, {entry.calories} cal)', 'success')
         return redirect(url_for('nutrition.index'))
     
-    # Get available foods (you can add more via admin or API)
-    foods = Food.query.all()
+    # Only ship the user's own foods; the rest of the catalog is searched or
+    # paged through the JSON endpoints below
+    foods = view_cache.cached_view('frequent_foods', current_user.id, lambda: frequent_foods(current_user.id))
     
     return render_template('nutrition/log.html', foods=foods)
 
+def frequent_foods(user_id, limit=20, days=90):
+    """The user's most used foods over the last ``days`` days, most used first."""
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.execute(
+        db.select(FoodEntry.food_id)
+        .where(FoodEntry.user_id == user_id, FoodEntry.logged_at >= since)
+        .group_by(FoodEntry.food_id)
+        .order_by(db.func.count(FoodEntry.id).desc(), db.func.max(FoodEntry.logged_at).desc())
+        .limit(limit)
+    ).scalars().all()
+    catalog = food_search.get_index()
+    return [food for food in (catalog.get(food_id) for food_id in rows) if food]
+
+@nutrition_bp.route('/api/entries')
+@login_required
+@query_budget(1)
+def list_entries():
+    """Food entries for one local day, oldest first (API endpoint).
+    
+    Query args: day=YYYY-MM-DD (defaults to today).
+    """
+    day = request.args.get('day')
+    try:
+        day = date.fromisoformat(day) if day else current_user.local_today()
+    except ValueError:
+        return serializers.json_response({'error': 'day must be YYYY-MM-DD'}, 400)
+    
+    entries = serializers.rows(
+        serializers.select_json(FoodEntry)
+        .where(FoodEntry.user_id == current_user.id, FoodEntry.local_day == day)
+        .order_by(FoodEntry.logged_at, FoodEntry.id)
+    )
+    return serializers.json_response({'day': day.isoformat(), 'entries': entries})
+
+@nutrition_bp.route('/food/catalog')
+@login_required
+def food_catalog():
+    """Page through the food catalog by name (API endpoint)."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+    
+    catalog = food_search.get_index()
+    etag = f'foods-{catalog.revision}-{page}-{per_page}'
+    if request.if_none_match.contains_weak(etag):  # weak once the response was gzipped
+        return '', 304, {'ETag': f'"{etag}"'}
+    
+    foods, total = catalog.page(page, per_page)
+    response = jsonify({
+        'foods': foods,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page * per_page < total,
+    })
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = 300
+    return response
+
 @nutrition_bp.route('/food/search')
 @login_required
 def search_foods():
@@ -83,10 +148,10 @@ def search_foods():
     query = request.args.get('q', '').strip()
     
     if len(query) < 2:
-        return jsonify([])
+        return serializers.json_response([])
     
-    foods = Food.query.filter(Food.name.ilike(f'%{query}%')).limit(10).all()
-    return jsonify([f.to_dict() for f in foods])
+    # Ranked trigram lookup; a leading-wildcard ILIKE would scan the whole catalog
+    return serializers.json_response(food_search.get_index().search(query, limit=10))
 
 @nutrition_bp.route('/food/add', methods=['POST'])
 @login_required
@@ -117,6 +182,7 @@ def add_custom_food():
     
     db.session.add(food)
     db.session.commit()
+    food_search.food_added(food)
     
     flash(f'Food "{name}" added to database.', 'success')
     return redirect(url_for('nutrition.log_food'))
@@ -131,6 +197,7 @@ def delete_entry(entry_id):
         flash('You do not have permission to delete this entry.', 'danger')
         return redirect(url_for('nutrition.index'))
     
+    hooks.food_entry_deleted(entry)
     db.session.delete(entry)
     db.session.commit()
     flash('Food entry deleted.', 'success')
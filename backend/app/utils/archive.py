@@ -0,0 +1,127 @@
+"""Move old workouts and food entries out of the hot tables.
+
+Rows logged more than ``ARCHIVE_AFTER_DAYS`` ago are copied into
+``workouts_archive`` / ``food_entries_archive`` (same ids and columns) and
+deleted from the hot tables. This keeps the hot tables and their
+``user_id`` indexes sized to recent activity. Daily rollups are not
+touched; by the time a row is archived its day was final long ago.
+rebuild_daily_stats() reads both tables.
+
+Each batch is one transaction, so a run can be stopped at any point and
+re-run to carry on where it left off. Workouts stay hot while something
+still points at them: a pending XP job, a personal record or heart-rate
+data. A record moving to an archived workout restores that workout.
+
+Archived rows keep their ids, so the hot tables must never hand an id out
+twice. They are declared AUTOINCREMENT on SQLite, whose plain rowid tables
+would reuse the highest id once it was removed. SQLite tables created
+before that still reuse it, so the row holding a table's highest id is
+never archived.
+
+Everything that shows history (the workout listing, exports) reads the
+hot and archived rows together with history().
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, exists, func, insert, literal, select, union_all
+from backend.app import db
+from backend.app.models.workout import Workout
+from backend.app.models.food import FoodEntry
+from backend.app.models.archive import ArchivedWorkout, ArchivedFoodEntry
+from backend.app.models.records import PersonalRecord
+from backend.app.models.heart_rate import HeartRateChunk
+from backend.app.utils import view_cache
+
+ARCHIVES = {Workout: ArchivedWorkout, FoodEntry: ArchivedFoodEntry}
+
+def cutoff(now=None):
+    """Rows logged before this moment are due for archiving."""
+    days = current_app.config.get('ARCHIVE_AFTER_DAYS', 365)
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+def _shared_columns(model):
+    """Names of the columns the hot and archive tables have in common."""
+    archive_columns = ARCHIVES[model].__table__.columns
+    return [column.name for column in model.__table__.columns if column.name in archive_columns]
+
+def _candidates(model, before):
+    newest = select(func.max(model.id)).scalar_subquery()
+    query = select(model.id).where(model.logged_at < before, model.id < newest)
+    if model is Workout:
+        query = query.where(
+            Workout.xp_pending.is_(False),
+            ~exists().where(PersonalRecord.workout_id == Workout.id),
+            ~exists().where(HeartRateChunk.workout_id == Workout.id),
+        )
+    return query
+
+def archive_batch(model, before, batch_size=1000):
+    """Archive up to ``batch_size`` rows of ``model`` logged before ``before``; returns how many."""
+    ids = db.session.execute(_candidates(model, before).order_by(model.id).limit(batch_size)).scalars().all()
+    if not ids:
+        return 0
+    archive = ARCHIVES[model]
+    names = _shared_columns(model)
+    source = model.__table__.c
+    db.session.execute(insert(archive).from_select(
+        names + ['archived_at'],
+        select(*[source[name] for name in names], literal(datetime.utcnow())).where(source.id.in_(ids)),
+    ))
+    user_ids = db.session.execute(select(model.user_id).where(model.id.in_(ids)).distinct()).scalars().all()
+    db.session.execute(delete(model).where(model.id.in_(ids)))
+    for user_id in user_ids:
+        view_cache.invalidate_user(db.session, user_id)  # listing totals include the archive
+    db.session.commit()
+    return len(ids)
+
+def archive_old_rows(before=None, batch_size=None, max_batches=None, progress=None):
+    """Archive everything due, batch by batch.
+
+    Stops early after ``max_batches`` batches; returns ``(counts, done)``
+    where ``done`` says whether nothing due is left.
+    """
+    before = before or cutoff()
+    batch_size = batch_size or current_app.config.get('ARCHIVE_BATCH_SIZE', 1000)
+    counts = {model.__tablename__: 0 for model in ARCHIVES}
+    batches = 0
+    for model in ARCHIVES:
+        while max_batches is None or batches < max_batches:
+            moved = archive_batch(model, before, batch_size)
+            if not moved:
+                break
+            batches += 1
+            counts[model.__tablename__] += moved
+            if progress:
+                progress(model.__tablename__, counts[model.__tablename__])
+        else:
+            return counts, False
+    return counts, True
+
+def restore_workout(workout_id):
+    """Move an archived workout back into ``workouts`` (in the current transaction)."""
+    names = _shared_columns(Workout)
+    source = ArchivedWorkout.__table__.c
+    db.session.execute(insert(Workout).from_select(
+        names, select(*[source[name] for name in names]).where(source.id == workout_id),
+    ))
+    db.session.execute(delete(ArchivedWorkout).where(ArchivedWorkout.id == workout_id))
+
+def history(model, user_id):
+    """A user's hot and archived rows of ``model`` as one UNION ALL select.
+
+    Rows carry the shared columns plus ``archived``. Order it with
+    ``query.order_by(query.selected_columns.logged_at)``.
+    """
+    archive = ARCHIVES[model]
+    names = _shared_columns(model)
+    hot = select(*[model.__table__.c[name] for name in names], literal(False).label('archived'))
+    cold = select(*[archive.__table__.c[name] for name in names], literal(True).label('archived'))
+    return union_all(hot.where(model.user_id == user_id), cold.where(archive.user_id == user_id))
+
+def counts():
+    """Rows per hot and archive table."""
+    result = {}
+    for model, archive in ARCHIVES.items():
+        result[model.__tablename__] = db.session.scalar(select(func.count(model.id)))
+        result[archive.__tablename__] = db.session.scalar(select(func.count(archive.id)))
+    return result
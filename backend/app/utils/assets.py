@@ -0,0 +1,146 @@
+"""Fingerprinted, precompressed static files and compressed responses.
+
+``flask build-assets`` copies every file under the static folder to
+``dist/`` with a hash of its contents in the name (``css/style.css``
+becomes ``dist/css/style.3f2a9b1c4d5e.css``). It also writes ``.gz``
+copies, plus ``.br`` copies when the optional ``brotli`` package is
+installed, and a ``manifest.json`` that maps each file to its copy.
+
+With a manifest present, ``url_for('static', filename=...)`` points at the
+hashed copy. A changed file gets a new URL, so those copies are served
+with a one-year ``immutable`` Cache-Control and browsers stop revalidating
+them on every page view. The smallest precompressed variant the client
+accepts is sent as is, with no per-request compression. Without a
+manifest, for example in a fresh checkout, static files are served as
+before.
+
+HTML and JSON responses of at least ``COMPRESS_MIN_BYTES`` are gzipped
+on the way out when the client accepts it. Streamed responses, such as the
+data export, and responses that already have a Content-Encoding are left
+alone.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli  # optional; ~15-20% smaller than gzip for CSS/JS
+except ImportError:
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'text/plain', 'text/csv'}
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}  # in order of preference
+
+def _hashed_name(path, data):
+    stem, extension = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def build(static_folder):
+    """Write hashed and precompressed copies of every static file, and the manifest.
+
+    Returns the manifest.
+    """
+    output = os.path.join(static_folder, DIST)
+    shutil.rmtree(output, ignore_errors=True)
+    assets, encodings = {}, {}
+    for directory, subdirectories, files in os.walk(static_folder):
+        subdirectories[:] = [d for d in subdirectories if os.path.join(directory, d) != output]
+        for filename in sorted(files):
+            source = os.path.join(directory, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            hashed = f'{DIST}/{_hashed_name(name, data)}'
+            _write(os.path.join(static_folder, hashed), data)
+            assets[name] = hashed
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+
+            variants = {'gzip': gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+            kept = [encoding for encoding in ENCODING_SUFFIXES
+                    if encoding in variants and len(variants[encoding]) < len(data)]
+            for encoding in kept:
+                _write(os.path.join(static_folder, hashed + ENCODING_SUFFIXES[encoding]), variants[encoding])
+            if kept:
+                encodings[hashed] = kept
+
+    manifest = {'assets': assets, 'encodings': encodings}
+    _write(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def load_manifest(static_folder):
+    """The manifest written by build(), or ``None`` if the assets were never built."""
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _accepts(encoding):
+    return encoding in request.accept_encodings
+
+def _compress(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config.get('COMPRESS_MIN_BYTES', 1024):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not _accepts('gzip'):
+        return response
+    response.set_data(gzip.compress(data, current_app.config.get('COMPRESS_LEVEL', 6)))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)  # the gzipped bytes differ from what the strong tag named
+    return response
+
+def init_app(app):
+    """Point static URLs at the hashed copies and compress large responses."""
+    manifest = load_manifest(app.static_folder)
+    if manifest is not None:
+        assets = manifest['assets']
+        encodings = manifest['encodings']
+
+        @app.url_defaults
+        def _hashed_static_url(endpoint, values):
+            if endpoint == 'static' and values.get('filename') in assets:
+                values['filename'] = assets[values['filename']]
+
+        def static(filename):
+            if not filename.startswith(f'{DIST}/'):
+                return app.send_static_file(filename)
+            encoding = next((e for e in encodings.get(filename, ()) if _accepts(e)), None)
+            if encoding is None:
+                response = app.send_static_file(filename)
+            else:
+                response = send_from_directory(app.static_folder, filename + ENCODING_SUFFIXES[encoding],
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+            if filename in encodings:
+                response.vary.add('Accept-Encoding')
+            response.headers['Cache-Control'] = IMMUTABLE
+            return response
+
+        app.view_functions['static'] = static
+
+    if app.config.get('COMPRESS_ENABLED', True):
+        app.after_request(_compress)
@@ -0,0 +1,115 @@
+"""Threshold-indexed badge awarding.
+
+Every badge unlocks when one gamification metric (streak, total XP or level)
+reaches ``condition_value``. Each worker keeps the thresholds per
+``condition_type`` as a sorted list, so a change from ``old`` to ``new``
+only has to look at the badges between two bisect positions, the ones
+whose threshold was actually crossed. Most XP changes cross nothing and
+cost no queries at all. When something is crossed, the user's earned set
+for those badges is read once and the new awards go in as one INSERT.
+"""
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from sqlalchemy import insert, select
+from backend.app import db
+from backend.app.models.gamification import Badge, UserBadge
+from backend.app.utils import view_cache
+
+# condition_type -> GamificationState attribute it is measured against
+METRICS = {
+    'streak': 'current_streak',
+    'total_xp': 'total_xp',
+    'level': 'current_level',
+}
+CATALOG_TTL = 300  # seconds; badges only change through init_db
+
+class BadgeThresholds:
+    """Badge ids per condition type, ordered by condition_value."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thresholds = {}  # condition_type -> ([values], [badge ids])
+        self._names = {}  # badge id -> name
+        self._loaded_at = None
+
+    def load(self, rows):
+        """Replace the catalog with ``(id, name, condition_type, condition_value)`` rows."""
+        grouped = {}
+        names = {}
+        for badge_id, name, condition_type, value in rows:
+            names[badge_id] = name
+            if condition_type in METRICS:
+                grouped.setdefault(condition_type, []).append((value, badge_id))
+        thresholds = {}
+        for condition_type, pairs in grouped.items():
+            pairs.sort()
+            thresholds[condition_type] = ([v for v, _ in pairs], [b for _, b in pairs])
+        with self._lock:
+            self._thresholds, self._names = thresholds, names
+            self._loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Reload from the badges table when the copy is missing or stale."""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < CATALOG_TTL:
+            return
+        self.load(db.session.execute(
+            select(Badge.id, Badge.name, Badge.condition_type, Badge.condition_value)
+        ).tuples())
+
+    def name(self, badge_id):
+        return self._names.get(badge_id)
+
+    def crossed(self, condition_type, old, new):
+        """Badge ids with ``old < condition_value <= new``."""
+        entry = self._thresholds.get(condition_type)
+        if entry is None or new is None or (old is not None and new <= old):
+            return []
+        values, badge_ids = entry
+        start = 0 if old is None else bisect_right(values, old)
+        return badge_ids[start:bisect_right(values, new)]
+
+_thresholds = BadgeThresholds()
+
+def get_thresholds():
+    """The worker's badge thresholds, reloaded every CATALOG_TTL seconds."""
+    _thresholds.refresh()
+    return _thresholds
+
+def snapshot(gamification):
+    """Metric values to diff against after XP/streak changes; ``None`` if there's no state."""
+    if gamification is None:
+        return None
+    return {condition_type: getattr(gamification, attr) or 0 for condition_type, attr in METRICS.items()}
+
+def award_crossed(user_id, before, after):
+    """Award every badge whose threshold lies between two snapshots.
+
+    ``before=None`` means "from nothing", i.e. every badge the user
+    currently qualifies for. Returns the names of newly awarded badges.
+    Nothing is committed here.
+    """
+    if after is None:
+        return []
+    thresholds = get_thresholds()
+    candidates = []
+    for condition_type, new in after.items():
+        old = before.get(condition_type) if before else None
+        candidates.extend(thresholds.crossed(condition_type, old, new))
+    if not candidates:
+        return []
+
+    earned = set(db.session.execute(
+        select(UserBadge.badge_id).where(UserBadge.user_id == user_id, UserBadge.badge_id.in_(candidates))
+    ).scalars())
+    new_ids = [badge_id for badge_id in dict.fromkeys(candidates) if badge_id not in earned]
+    if not new_ids:
+        return []
+
+    now = datetime.utcnow()
+    db.session.execute(insert(UserBadge), [
+        {'user_id': user_id, 'badge_id': badge_id, 'earned_at': now} for badge_id in new_ids
+    ])
+    view_cache.invalidate_user(db.session, user_id)
+    return [thresholds.name(badge_id) for badge_id in new_ids]
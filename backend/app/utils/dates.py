@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TIMEZONE = 'UTC'
+
+_zones = {}
+
+def get_zone(tz_name):
+    """Resolve an IANA timezone name, falling back to UTC for unknown names."""
+    tz_name = tz_name or DEFAULT_TIMEZONE
+    zone = _zones.get(tz_name)
+    if zone is None:
+        try:
+            zone = ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = timezone.utc
+        _zones[tz_name] = zone
+    return zone
+
+def is_valid_timezone(tz_name):
+    """Check whether a timezone name can be resolved."""
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+def to_local_day(moment, tz_name=None):
+    """Convert a naive UTC datetime into the calendar day seen by the user."""
+    if moment is None:
+        return None
+    zone = get_zone(tz_name)
+    if zone is timezone.utc:
+        return moment.date()
+    return moment.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+def local_today(tz_name=None):
+    """Return today's date in the given timezone."""
+    return to_local_day(datetime.utcnow(), tz_name)
+
+def week_start(day):
+    """Return the Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+def user_timezone(connection, user_id):
+    """Look up a user's timezone on a raw connection (safe inside flush events)."""
+    from sqlalchemy import select
+    from backend.app.models.user import User
+    tz_name = connection.scalar(select(User.timezone).where(User.id == user_id))
+    return tz_name or DEFAULT_TIMEZONE
+
+def stamp_local_day(connection, target):
+    """Fill ``local_day`` on a Workout/FoodEntry about to be flushed.
+
+    Rows that already carry a day (set by the route or a bulk import) are left
+    alone unless ``logged_at`` itself changed.
+    """
+    from sqlalchemy import inspect
+    state = inspect(target)
+    logged_at_changed = state.attrs.logged_at.history.has_changes()
+    if target.local_day is not None and not (state.persistent and logged_at_changed):
+        return
+    if target.logged_at is None:
+        target.logged_at = datetime.utcnow()
+    user = state.dict.get('user')
+    tz_name = user.timezone if user is not None else user_timezone(connection, target.user_id)
+    target.local_day = to_local_day(target.logged_at, tz_name)
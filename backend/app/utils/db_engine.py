@@ -0,0 +1,59 @@
+"""Per-backend engine settings, applied by create_app before the engine exists.
+
+SQLite: WAL journaling lets readers carry on while one writer commits, and
+``busy_timeout`` makes a second writer wait for the lock instead of failing
+at once with "database is locked". With WAL, ``synchronous=NORMAL`` is
+still crash-safe and saves an fsync per commit. The pragmas are per
+connection, so they are set on every new DBAPI connection.
+
+PostgreSQL: every gunicorn worker has its own pool, so the pool is sized
+from ``DB_MAX_CONNECTIONS`` divided by ``WEB_CONCURRENCY`` (the worker
+count gunicorn itself reads). This keeps the total under the server's
+connection limit. ``pool_pre_ping`` and ``pool_recycle`` drop connections
+the server or a proxy closed while they sat idle.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def _is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def _is_memory(uri):
+    return make_url(uri).database in (None, '', ':memory:')
+
+def engine_options(config):
+    """Engine keyword arguments for the configured database."""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if _is_sqlite(uri):
+        return {}  # everything SQLite needs is a pragma, see install_pragmas()
+
+    workers = max(1, config.get('WEB_CONCURRENCY', 1))
+    per_worker = max(1, config.get('DB_MAX_CONNECTIONS', 100) // workers)
+    pool_size = min(config.get('DB_POOL_SIZE') or config.get('GUNICORN_THREADS', 1) + 1, per_worker)
+    return {
+        'pool_size': pool_size,
+        'max_overflow': per_worker - pool_size,
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+def install_pragmas(engine, config):
+    """Set the SQLite pragmas on each new connection of ``engine`` (no-op for other backends)."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = {
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'cache_size': -config.get('SQLITE_CACHE_KB', 20000),  # negative means KiB rather than pages
+        'temp_store': 'MEMORY',
+    }
+    if not _is_memory(str(engine.url)):
+        pragmas['journal_mode'] = config.get('SQLITE_JOURNAL_MODE', 'WAL')
+        pragmas['synchronous'] = config.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,125 @@
+"""Streaming export of a user's full history as CSV or NDJSON.
+
+Rows are read through a server-side cursor (``yield_per``) and written out
+as they arrive, so memory use is the same for one week of data or ten
+years. Workouts and food entries include archived rows (see archive.py).
+Optional gzip compresses the stream chunk by chunk rather than buffering
+the file.
+
+NDJSON exports can hold every dataset in one file; each line carries a
+``type``. CSV holds one dataset per file, since each dataset has its own
+columns.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from sqlalchemy import select
+from backend.app import db
+from backend.app.models.workout import Workout
+from backend.app.models.food import Food, FoodEntry
+from backend.app.models.goal import Goal
+from backend.app.models.gamification import GamificationState, Badge, UserBadge
+from backend.app.utils import archive
+
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024  # Output is flushed (and compressed) in chunks of about this size
+FORMATS = ('csv', 'ndjson')
+
+def _workouts(user_id):
+    history = archive.history(Workout, user_id).subquery()
+    columns = ['id', 'logged_at', 'local_day', 'exercise_type', 'activity_name', 'duration_minutes', 'intensity',
+               'distance_km', 'calories_burned', 'heart_rate_avg', 'notes', 'archived']
+    return select(*[history.c[name] for name in columns]).order_by(history.c.logged_at, history.c.id)
+
+def _food_entries(user_id):
+    history = archive.history(FoodEntry, user_id).subquery()
+    return select(
+        history.c.id, history.c.logged_at, history.c.local_day, history.c.meal_type,
+        Food.name.label('food_name'), history.c.quantity_grams, history.c.calories,
+        history.c.protein_g, history.c.fat_g, history.c.carbs_g, history.c.archived,
+    ).join(Food, Food.id == history.c.food_id).order_by(history.c.logged_at, history.c.id)
+
+def _goals(user_id):
+    return select(
+        Goal.id, Goal.goal_type, Goal.target_value, Goal.current_value, Goal.unit, Goal.goal_period,
+        Goal.start_date, Goal.target_date, Goal.is_active, Goal.created_at,
+    ).where(Goal.user_id == user_id).order_by(Goal.id)
+
+def _badges(user_id):
+    return select(
+        UserBadge.earned_at, Badge.name, Badge.description, Badge.condition_type, Badge.condition_value,
+    ).join(Badge, Badge.id == UserBadge.badge_id).where(UserBadge.user_id == user_id).order_by(UserBadge.earned_at)
+
+def _gamification(user_id):
+    return select(
+        GamificationState.total_xp, GamificationState.current_level, GamificationState.current_streak,
+        GamificationState.longest_streak, GamificationState.last_activity_date,
+    ).where(GamificationState.user_id == user_id)
+
+DATASETS = {
+    'workouts': _workouts,
+    'food_entries': _food_entries,
+    'goals': _goals,
+    'badges': _badges,
+    'gamification': _gamification,
+}
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _rows(dataset, user_id):
+    """Rows of a dataset, fetched ``YIELD_PER`` at a time."""
+    query = DATASETS[dataset](user_id).execution_options(stream_results=True, yield_per=YIELD_PER)
+    yield from db.session.execute(query)
+
+class _Line:
+    """File-like object that hands back what csv.writer writes to it."""
+    def write(self, value):
+        return value
+
+def csv_lines(dataset, user_id):
+    """One dataset as CSV text, a line at a time (header first)."""
+    writer = csv.writer(_Line())
+    yield writer.writerow([column.name for column in DATASETS[dataset](user_id).selected_columns])
+    for row in _rows(dataset, user_id):
+        yield writer.writerow([_value(value) for value in row])
+
+def ndjson_lines(datasets, user_id):
+    """The given datasets as NDJSON, one record per line, tagged with its dataset."""
+    for dataset in datasets:
+        for row in _rows(dataset, user_id):
+            record = {'type': dataset}
+            record.update((name, _value(value)) for name, value in row._mapping.items())
+            yield json.dumps(record) + '\n'
+
+def chunked(lines, compress=False):
+    """Join lines into ~CHUNK_BYTES byte chunks, gzipping them on the fly if asked."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31 = gzip container
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+def stream(user_id, fmt, datasets, compress=False):
+    """Bytes of the export, produced lazily."""
+    if fmt == 'csv':
+        lines = csv_lines(datasets[0], user_id)
+    else:
+        lines = ndjson_lines(datasets, user_id)
+    return chunked(lines, compress)
@@ -0,0 +1,243 @@
+"""In-memory word/trigram index over Food.name for the log-food typeahead.
+
+``Food.name.ilike('%q%')`` can't use the name index and scans the whole
+catalog per keystroke. Instead each worker keeps, built on first use:
+
+* a sorted vocabulary of the words in food names, so every query word is
+  matched as a prefix with a bisect (``"chick"`` -> ``chicken``, ``chickpea``);
+* per word, the foods containing it sorted by rank (shortest name first), so
+  single-word results come from lazily merging those lists and stop after
+  ``limit``; multi-word queries intersect per-word id sets instead;
+* a trigram index over the vocabulary for typo tolerance: a query word with
+  no prefix match is swapped for the closest vocabulary words
+  (``"chiken"`` -> ``chicken``) before the merge.
+
+The same structure doubles as the worker's read-mostly catalog cache: it
+keeps every food as a plain dict plus a name-ordered id list for paging, so
+the log-food page never hydrates the Food table.
+
+Each worker checks the foods table for changes at most every
+``FOOD_INDEX_CHECK_SECONDS``, with one query for the highest id, the latest
+``updated_at`` and the row count. New foods are added to the index
+incrementally. A food that was edited or deleted makes the worker rebuild
+its index from scratch, which is rare enough to be cheap overall.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import func, or_, select
+from backend.app import db
+from backend.app.models.food import Food
+from backend.app.utils.query_budget import unbudgeted
+
+MIN_COVERAGE = 0.5  # share of a misspelt word's trigrams a correction must contain
+MAX_CORRECTIONS = 3  # vocabulary words tried in place of a misspelt query word
+
+_word_re = re.compile(r'[^a-z0-9]+')
+
+def normalize(text):
+    """Lowercase and collapse punctuation so 'Milk (1% fat)' -> 'milk 1 fat'."""
+    return _word_re.sub(' ', text.lower()).strip()
+
+def trigrams(word, pad_end=True):
+    """Front-padded trigrams of a word; skip the end padding for a partial word."""
+    padded = f'  {word} ' if pad_end else f'  {word}'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FoodSearchIndex:
+    """Prefix and typo-tolerant lookups over food names."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self._state = None  # (max id, max updated_at, count) of the foods table when last checked
+        self._checked_at = 0.0
+        self._loaded = False
+
+    def _clear(self):
+        self._foods = {}  # id -> food dict (same shape as Food.to_dict())
+        self._words_of = {}  # id -> distinct words of the name
+        self._vocab = []  # sorted distinct words
+        self._postings = {}  # word -> sorted [(len(name), name, id)]
+        self._word_ids = {}  # word -> set of food ids
+        self._ranks = {}  # id -> (len(name), name, id)
+        self._word_grams = defaultdict(set)  # trigram -> vocabulary words
+        self._by_name = []  # [(name, id)] sorted, for catalog pages
+        self._max_id = 0
+
+    def __len__(self):
+        return len(self._foods)
+
+    def add(self, food):
+        """Index a food dict (or Food instance)."""
+        if isinstance(food, Food):
+            food = food.to_dict()
+        with self._lock:
+            self._add(food, insert=insort)
+            insort(self._by_name, (normalize(food['name']), food['id']))
+
+    def add_many(self, foods):
+        """Index a batch of food dicts, sorting each touched list once at the end."""
+        with self._lock:
+            touched = set()
+            for food in foods:
+                touched.update(self._add(food, insert=list.append))
+                self._by_name.append((normalize(food['name']), food['id']))
+            for word in touched:
+                self._postings[word].sort()
+            self._vocab.sort()
+            self._by_name.sort()
+
+    def _add(self, food, insert):
+        food_id = food['id']
+        name = normalize(food['name'])
+        words = tuple(dict.fromkeys(name.split()))
+        rank = (len(name), name, food_id)
+        self._foods[food_id] = food
+        self._words_of[food_id] = words
+        self._ranks[food_id] = rank
+        for word in words:
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = []
+                self._word_ids[word] = set()
+                insert(self._vocab, word)
+                for gram in trigrams(word):
+                    self._word_grams[gram].add(word)
+            insert(posting, rank)
+            self._word_ids[word].add(food_id)
+        self._max_id = max(self._max_id, food_id)
+        return words
+
+    @property
+    def revision(self):
+        """Token for the catalog state indexed; changes when a food is added, edited or deleted."""
+        max_id, updated_at, count = self._state or (self._max_id, None, len(self._foods))
+        stamp = int(updated_at.timestamp() * 1000000) if updated_at else 0
+        return f'{max_id}.{count}.{stamp}'
+
+    def get(self, food_id):
+        """Food dict by id, or ``None``."""
+        return self._foods.get(food_id)
+
+    def page(self, page, per_page):
+        """One page of the catalog ordered by name, plus the total count."""
+        with self._lock:
+            start = (page - 1) * per_page
+            ids = [food_id for _, food_id in self._by_name[start:start + per_page]]
+            return [self._foods[food_id] for food_id in ids], len(self._by_name)
+
+    def refresh(self):
+        """Catch up with the foods table (load all of it on first use).
+
+        The table is checked at most every ``FOOD_INDEX_CHECK_SECONDS``.
+        """
+        interval = current_app.config.get('FOOD_INDEX_CHECK_SECONDS', 5)
+        if self._loaded and time.monotonic() - self._checked_at < interval:
+            return
+        with self._lock, unbudgeted():
+            state = tuple(db.session.execute(
+                select(func.max(Food.id), func.max(Food.updated_at), func.count(Food.id))
+            ).one())
+            self._checked_at = time.monotonic()
+            if self._loaded and state == self._state:
+                return
+
+            changed = Food.id > self._max_id
+            if self._loaded:
+                # Rows edited since the last check; foods added here by food_added() come back unchanged
+                last_updated = self._state[1] if self._state else None
+                edited = Food.updated_at >= last_updated if last_updated else Food.updated_at.isnot(None)
+                changed = or_(changed, edited)
+            rows = [dict(row) for row in db.session.execute(
+                select(*Food.json_columns().values()).where(changed).order_by(Food.id)
+            ).mappings()]
+            if any(row['id'] in self._foods and row != self._foods[row['id']] for row in rows):
+                self._reload()
+            else:
+                self.add_many(row for row in rows if row['id'] not in self._foods)
+                if len(self._foods) != state[2]:
+                    self._reload()  # a food was deleted
+            self._state = state
+            self._loaded = True
+
+    def _reload(self):
+        self._clear()
+        self.add_many(dict(row) for row in db.session.execute(
+            select(*Food.json_columns().values()).order_by(Food.id)
+        ).mappings())
+
+    def _prefix_words(self, token):
+        start = bisect_left(self._vocab, token)
+        words = []
+        for word in self._vocab[start:]:
+            if not word.startswith(token):
+                break
+            words.append(word)
+        return words
+
+    def _corrections(self, token):
+        """Vocabulary words closest to a token that matched nothing as a prefix."""
+        grams = trigrams(token, pad_end=False)
+        # A word sharing `needed` of n grams must be in one of the n - needed + 1
+        # rarest posting sets, so only those seed candidates.
+        postings = sorted((self._word_grams.get(gram, ()) for gram in grams), key=len)
+        needed = max(1, math.ceil(len(grams) * MIN_COVERAGE))
+        candidates = set().union(*postings[:len(postings) - needed + 1])
+
+        scored = []
+        for word in candidates:
+            shared = sum(1 for posting in postings if word in posting)
+            if shared >= needed:
+                word_grams = len(trigrams(word))
+                scored.append((-(shared / len(grams) + shared / (len(grams) + word_grams - shared)), word))
+        return [word for _, word in heapq.nsmallest(MAX_CORRECTIONS, scored)]
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` food dicts whose words match every query word."""
+        with self._lock:
+            alternatives = []
+            for token in normalize(query).split():
+                words = self._prefix_words(token) or self._corrections(token)
+                if words:
+                    alternatives.append(words)
+            if not alternatives:
+                return []
+
+            if len(alternatives) == 1:
+                # Walk the rank-ordered postings and stop as soon as we have enough
+                results, seen = [], set()
+                for _, _, food_id in heapq.merge(*(self._postings[w] for w in alternatives[0])):
+                    if food_id not in seen:
+                        seen.add(food_id)
+                        results.append(self._foods[food_id])
+                        if len(results) == limit:
+                            break
+                return results
+
+            # Several words: intersect id sets, most selective first, then rank
+            id_sets = sorted(
+                (self._word_ids[words[0]] if len(words) == 1 else set().union(*(self._word_ids[w] for w in words))
+                 for words in alternatives),
+                key=len,
+            )
+            matches = id_sets[0].intersection(*id_sets[1:])
+            return [self._foods[food_id] for food_id in heapq.nsmallest(limit, matches, key=self._ranks.__getitem__)]
+
+_index = FoodSearchIndex()
+
+def get_index():
+    """The worker's food index, brought up to date with the catalog."""
+    _index.refresh()
+    return _index
+
+def food_added(food):
+    """Index a newly committed food here; other workers pick it up at their next check."""
+    if _index._loaded:
+        _index.add(food)
+        _index._checked_at = 0.0  # re-read the table state (and revision) on the next request
@@ -0,0 +1,123 @@
+"""Automatic progress for activity-minute and calorie goals.
+
+``activity_minutes`` and ``calorie_intake`` goals with a daily, weekly or
+monthly period keep the total for their current window in
+``current_value``. ``period_start`` is the window's first local day.
+Workout and food-entry writes add or subtract their share in place, from
+hooks.py, so showing a goal never re-sums history.
+
+When a write or a page view finds a goal whose window has passed (or that
+was never seeded), the goal rolls over. It moves to the current window and
+is re-seeded from the daily rollups, at most 31 rows. Writes update the
+rollups before calling in here, so a re-seed already counts the write
+being applied.
+"""
+from datetime import timedelta
+from sqlalchemy import func, select, update
+from backend.app import db
+from backend.app.models.goal import Goal
+from backend.app.models.stats import DailyUserStats
+from backend.app.models.user import User
+from backend.app.utils.dates import week_start
+from backend.app.utils.query_budget import unbudgeted
+
+# goal_type -> the rollup column it sums
+TRACKED = {'activity_minutes': 'workout_minutes', 'calorie_intake': 'calories_eaten'}
+PERIODS = ('daily', 'weekly', 'monthly')
+
+def is_tracked(goal):
+    """Whether a goal's progress is kept up to date automatically."""
+    return goal.goal_type in TRACKED and goal.goal_period in PERIODS
+
+def window(period, day):
+    """``(first day, day after the last)`` of the period containing ``day``."""
+    if period == 'daily':
+        return day, day + timedelta(days=1)
+    if period == 'weekly':
+        start = week_start(day)
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+def _today(user_id):
+    # The logged-in user is normally already in the identity map
+    return db.session.get(User, user_id).local_today()
+
+def seed(goal, today=None):
+    """Point a tracked goal at the current window and total it from the rollups."""
+    today = today or _today(goal.user_id)
+    start, end = window(goal.goal_period, today)
+    column = getattr(DailyUserStats, TRACKED[goal.goal_type])
+    goal.period_start = start
+    goal.current_value = db.session.scalar(
+        select(func.coalesce(func.sum(column), 0))
+        .where(DailyUserStats.user_id == goal.user_id, DailyUserStats.day >= start, DailyUserStats.day < end)
+    )
+
+def refresh(goals, today):
+    """Roll over and commit the tracked goals among ``goals`` whose window has passed.
+
+    Called from page views. A goal rolls over at most once per period, so
+    these statements stay out of the view's query budget, and the commit
+    keeps loaded objects as they are rather than expiring them, so the
+    page does not reload them. Returns whether any goal rolled over.
+    """
+    stale = [goal for goal in goals
+             if goal.is_active and is_tracked(goal) and goal.period_start != window(goal.goal_period, today)[0]]
+    if not stale:
+        return False
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    with unbudgeted():
+        for goal in stale:
+            seed(goal, today)
+        session.expire_on_commit = False
+        try:
+            session.commit()
+        finally:
+            session.expire_on_commit = expire_on_commit
+    return True
+
+def reset(user_id=None):
+    """Mark tracked goals for re-seeding on their next write or page view (after a rollup rebuild)."""
+    query = update(Goal).where(Goal.goal_type.in_(TRACKED), Goal.goal_period.in_(PERIODS)).values(period_start=None)
+    if user_id is not None:
+        query = query.where(Goal.user_id == user_id)
+    db.session.execute(query)
+
+def reseed(user_id):
+    """Re-total a user's active tracked goals from the rollups now (after a timezone change).
+
+    Nothing is committed here.
+    """
+    goals = Goal.query.filter(Goal.user_id == user_id, Goal.is_active.is_(True),
+                              Goal.goal_type.in_(TRACKED), Goal.goal_period.in_(PERIODS)).all()
+    today = _today(user_id) if goals else None
+    for goal in goals:
+        seed(goal, today)
+    return len(goals)
+
+def apply(user_id, added=(), removed=()):
+    """Add and remove rollup contributions (``(day, deltas)`` pairs) on the user's tracked goals."""
+    changes = [(contribution, 1) for contribution in added] + [(contribution, -1) for contribution in removed]
+    goal_types = {goal_type for (day, deltas), _ in changes if day is not None
+                  for goal_type, column in TRACKED.items() if deltas.get(column)}
+    if not goal_types:
+        return
+
+    goals = Goal.query.filter(
+        Goal.user_id == user_id, Goal.is_active.is_(True),
+        Goal.goal_type.in_(goal_types), Goal.goal_period.in_(PERIODS),
+    ).all()
+    today = _today(user_id) if goals else None
+    for goal in goals:
+        start, end = window(goal.goal_period, today)
+        if goal.period_start != start:
+            seed(goal, today)  # the rollups already include these changes
+            continue
+        column = TRACKED[goal.goal_type]
+        delta = sum(sign * deltas.get(column, 0) for (day, deltas), sign in changes
+                    if day is not None and start <= day < end)
+        if delta:
+            # Flushed as current_value = current_value + delta, so concurrent writes add up
+            goal.current_value = func.coalesce(Goal.current_value, 0) + delta
@@ -0,0 +1,207 @@
+"""Compact storage for heart-rate sample streams.
+
+Each uploaded batch becomes one HeartRateChunk per tier instead of a row
+per sample. The payload is two packed arrays, millisecond time deltas
+(uint32) and bpm deltas (int16), compressed with zlib. Successive samples
+differ very little, so a 1 Hz stream costs a few bytes per minute. The
+downsampled tiers add a third array (uint16) with the number of raw
+samples behind each bucket.
+
+Three tiers are written on ingest:
+
+* ``raw``: samples exactly as received, pruned after HEART_RATE_RAW_RETENTION_DAYS
+* ``1s``: per-second means, pruned after HEART_RATE_1S_RETENTION_DAYS
+* ``1m``: per-minute means, kept for charting the workout history
+
+A bucket that straddles two batches shows up in both chunks, and
+read_series() merges such duplicates when it decodes them, weighting each
+part by its sample count.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select
+from backend.app import db
+from backend.app.models.heart_rate import HeartRateChunk
+
+TIERS = OrderedDict([('raw', None), ('1s', 1000), ('1m', 60000)])
+MIN_BPM, MAX_BPM = 20, 250
+MAX_BATCH = 5000
+MAX_COUNT = 0xFFFF
+MAX_SPAN_MS = 24 * 60 * 60 * 1000  # per upload; time deltas are packed as uint32 (~49 days)
+MAX_CLOCK_SKEW_MS = 24 * 60 * 60 * 1000
+
+_EPOCH = datetime(1970, 1, 1)
+_HEADER = struct.Struct('<I')
+MIN_EPOCH_MS = 946684800000  # 2000-01-01
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def encode(samples, counts=None):
+    """Pack ``[(offset_ms, bpm), ...]`` (offsets from the first sample) into bytes.
+
+    ``counts``, if given, is the number of raw samples behind each entry.
+    """
+    times, bpms = array('I'), array('h')
+    last_time = last_bpm = 0
+    for offset, bpm in samples:
+        times.append(offset - last_time)
+        bpms.append(bpm - last_bpm)
+        last_time, last_bpm = offset, bpm
+    body = _HEADER.pack(len(times)) + _little_endian(times).tobytes() + _little_endian(bpms).tobytes()
+    if counts is not None:
+        body += _little_endian(array('H', (min(count, MAX_COUNT) for count in counts))).tobytes()
+    return zlib.compress(body, 6)
+
+def decode(payload, with_counts=False):
+    """Inverse of encode().
+
+    With ``with_counts`` the entries are ``(offset_ms, bpm, count)``; a
+    payload written without counts (the raw tier) counts each entry once.
+    """
+    body = zlib.decompress(payload)
+    (count,) = _HEADER.unpack_from(body)
+    times, bpms, counts = array('I'), array('h'), array('H')
+    split = _HEADER.size + count * times.itemsize
+    end = split + count * bpms.itemsize
+    times.frombytes(body[_HEADER.size:split])
+    bpms.frombytes(body[split:end])
+    if with_counts and len(body) > end:
+        counts.frombytes(body[end:end + count * counts.itemsize])
+    _little_endian(times)
+    _little_endian(bpms)
+    _little_endian(counts)
+
+    samples, offset, bpm = [], 0, 0
+    for index, (time_delta, bpm_delta) in enumerate(zip(times, bpms)):
+        offset += time_delta
+        bpm += bpm_delta
+        if with_counts:
+            samples.append((offset, bpm, counts[index] if counts else 1))
+        else:
+            samples.append((offset, bpm))
+    return samples
+
+def to_epoch_ms(moment):
+    return int((moment - _EPOCH).total_seconds() * 1000)
+
+def from_epoch_ms(value):
+    return _EPOCH + timedelta(milliseconds=value)
+
+def downsample(samples, bucket_ms):
+    """Mean bpm per ``bucket_ms`` bucket of ``[(epoch_ms, bpm), ...]`` (sorted).
+
+    Returns ``[(bucket_ms, mean_bpm, sample_count), ...]``.
+    """
+    buckets = []
+    current, total, count = None, 0, 0
+    for moment, bpm in samples:
+        bucket = moment - moment % bucket_ms
+        if bucket != current:
+            if count:
+                buckets.append((current, round(total / count), count))
+            current, total, count = bucket, 0, 0
+        total += bpm
+        count += 1
+    if count:
+        buckets.append((current, round(total / count), count))
+    return buckets
+
+def clean_samples(raw_samples, now=None):
+    """Validate ``[[epoch_ms, bpm], ...]`` from a client; sorted, in-range, de-duplicated.
+
+    Samples timestamped before 2000 or more than a day in the future are
+    dropped along with out-of-range bpm values.
+    """
+    latest = to_epoch_ms(now or datetime.utcnow()) + MAX_CLOCK_SKEW_MS
+    samples = {}
+    for item in raw_samples:
+        try:
+            moment, bpm = int(item[0]), int(item[1])
+        except (TypeError, ValueError, IndexError, OverflowError):
+            continue
+        if MIN_BPM <= bpm <= MAX_BPM and MIN_EPOCH_MS <= moment <= latest:
+            samples[moment] = bpm
+    return sorted(samples.items())
+
+def _chunk(workout, tier, samples, counts=None):
+    start = samples[0][0]
+    values = [bpm for _, bpm in samples]
+    return HeartRateChunk(
+        workout_id=workout.id,
+        user_id=workout.user_id,
+        tier=tier,
+        started_at=from_epoch_ms(start),
+        ended_at=from_epoch_ms(samples[-1][0]),
+        sample_count=len(values),
+        bpm_sum=sum(values),
+        bpm_min=min(values),
+        bpm_max=max(values),
+        payload=encode([(moment - start, bpm) for moment, bpm in samples], counts),
+    )
+
+def ingest(workout, samples):
+    """Store a cleaned batch in every tier and refresh the workout's average.
+
+    Nothing is committed here.
+    """
+    for tier, bucket_ms in TIERS.items():
+        if bucket_ms is None:
+            db.session.add(_chunk(workout, tier, samples))
+            continue
+        buckets = downsample(samples, bucket_ms)
+        db.session.add(_chunk(workout, tier, [(moment, bpm) for moment, bpm, _ in buckets],
+                              [count for _, _, count in buckets]))
+    db.session.flush()
+
+    total, count = db.session.execute(
+        select(func.sum(HeartRateChunk.bpm_sum), func.sum(HeartRateChunk.sample_count))
+        .where(HeartRateChunk.workout_id == workout.id, HeartRateChunk.tier == 'raw')
+    ).one()
+    if count:
+        workout.heart_rate_avg = round(total / count)
+    return workout.heart_rate_avg
+
+def read_series(workout_id, tier='1m', start=None, end=None):
+    """Decoded ``[(epoch_ms, bpm), ...]`` for a workout, oldest first."""
+    query = select(HeartRateChunk.started_at, HeartRateChunk.payload).where(
+        HeartRateChunk.workout_id == workout_id, HeartRateChunk.tier == tier
+    )
+    if start is not None:
+        query = query.where(HeartRateChunk.ended_at >= start)
+    if end is not None:
+        query = query.where(HeartRateChunk.started_at <= end)
+
+    merged = {}
+    for started_at, payload in db.session.execute(query.order_by(HeartRateChunk.started_at)):
+        base = to_epoch_ms(started_at)
+        for offset, bpm, count in decode(payload, with_counts=True):
+            # Buckets split across uploads are averaged back together, by sample count
+            total, weight = merged.get(base + offset, (0, 0))
+            merged[base + offset] = (total + bpm * count, weight + count)
+    return [(moment, round(total / weight)) for moment, (total, weight) in sorted(merged.items())]
+
+def prune(now=None):
+    """Apply the retention policy; returns the number of chunks deleted per tier."""
+    now = now or datetime.utcnow()
+    policy = {
+        'raw': current_app.config['HEART_RATE_RAW_RETENTION_DAYS'],
+        '1s': current_app.config['HEART_RATE_1S_RETENTION_DAYS'],
+    }
+    deleted = {}
+    for tier, days in policy.items():
+        if days is None:
+            continue
+        result = db.session.execute(
+            delete(HeartRateChunk).where(HeartRateChunk.tier == tier, HeartRateChunk.ended_at < now - timedelta(days=days))
+        )
+        deleted[tier] = result.rowcount
+    db.session.commit()
+    return deleted
@@ -0,0 +1,90 @@
+"""Keep derived per-user state in step with workout and food-entry writes.
+
+Routes call these after adding/changing the row and before committing, so
+the derived rows are written in the same transaction as the source row.
+"""
+from backend.app import db
+from backend.app.utils import goal_progress, jobs, records, rollups, streaks, view_cache
+
+def _stamp(obj):
+    # Flushing assigns ids and local_day (see the before_insert listeners)
+    db.session.flush()
+    view_cache.invalidate_user(db.session, obj.user_id)
+    return obj.user_id
+
+def _streak_days_changed(user_id, days):
+    # Streaks and badges follow in a job, as they do for newly logged workouts
+    days = sorted({day.isoformat() for day in days if day is not None})
+    if days:
+        jobs.enqueue('activity_days_changed', {'user_id': user_id, 'days': days})
+
+def snapshot_workout(workout):
+    """Capture a workout's contribution before it is edited."""
+    return rollups.workout_contribution(workout)
+
+def workout_logged(workout):
+    """A new workout was added to the session.
+    
+    XP, streak and badges are applied by the workout_logged job; only the
+    activity calendar they are derived from is updated here.
+    """
+    workout.xp_pending = True
+    user_id = _stamp(workout)
+    contribution = rollups.workout_contribution(workout)
+    rollups.apply_contribution(user_id, contribution)
+    goal_progress.apply(user_id, added=[contribution])
+    streaks.mark(user_id, added=[workout.local_day])
+    records.workout_saved(workout)
+    jobs.enqueue('workout_logged', {'workout_id': workout.id}, dedupe_key=f'workout_logged:{workout.id}')
+
+def workout_edited(workout, before):
+    """An existing workout changed; ``before`` comes from snapshot_workout()."""
+    user_id = _stamp(workout)
+    after = rollups.workout_contribution(workout)
+    rollups.apply_contribution(user_id, before, sign=-1)
+    rollups.apply_contribution(user_id, after)
+    goal_progress.apply(user_id, added=[after], removed=[before])
+    streaks.mark(user_id, added=[after[0]], removed=[before[0]])
+    if before[0] != after[0]:
+        _streak_days_changed(user_id, [before[0], after[0]])
+    records.workout_saved(workout)
+
+def workout_deleted(workout):
+    """A workout is about to be deleted."""
+    view_cache.invalidate_user(db.session, workout.user_id)
+    contribution = rollups.workout_contribution(workout)
+    rollups.apply_contribution(workout.user_id, contribution, sign=-1)
+    goal_progress.apply(workout.user_id, removed=[contribution])
+    if streaks.mark(workout.user_id, removed=[workout.local_day]):
+        _streak_days_changed(workout.user_id, [workout.local_day])
+    records.workout_removed(workout)
+
+def workouts_imported(user_id, contributions):
+    """A batch of workouts was bulk-inserted; ``contributions`` as from workout_contribution().
+
+    Personal records are rebuilt once per import by the importer, not per batch.
+    """
+    view_cache.invalidate_user(db.session, user_id)
+    rollups.apply_contributions(user_id, contributions)
+    goal_progress.apply(user_id, added=contributions)
+    streaks.mark(user_id, added=[day for day, _ in contributions])
+
+def food_entry_logged(entry):
+    """A new food entry was added to the session."""
+    user_id = _stamp(entry)
+    contribution = rollups.food_contribution(entry)
+    rollups.apply_contribution(user_id, contribution)
+    goal_progress.apply(user_id, added=[contribution])
+
+def food_entry_deleted(entry):
+    """A food entry is about to be deleted."""
+    view_cache.invalidate_user(db.session, entry.user_id)
+    contribution = rollups.food_contribution(entry)
+    rollups.apply_contribution(entry.user_id, contribution, sign=-1)
+    goal_progress.apply(entry.user_id, removed=[contribution])
+
+def goal_changed(goal):
+    """A goal was created, edited, deleted or had its progress updated."""
+    view_cache.invalidate_user(db.session, goal.user_id)
+    if goal.is_active is not False and goal_progress.is_tracked(goal):  # None until a new goal is flushed
+        goal_progress.seed(goal)  # its type or period may have changed
@@ -0,0 +1,95 @@
+"""Handlers for jobs enqueued by the write paths (see jobs.py).
+
+Every handler may run more than once for the same job, so each one starts
+by atomically claiming the work it is about to do.
+"""
+from datetime import date
+from sqlalchemy import update
+from backend.app import db
+from backend.app.models.workout import Workout
+from backend.app.models.gamification import GamificationState, XP_PER_ACTIVITY_MINUTE
+from backend.app.utils import badges
+from backend.app.utils.jobs import handler
+
+RECOMPUTE_BATCHES_PER_JOB = 20
+
+def _day(value):
+    return date.fromisoformat(value) if value else None
+
+@handler('workout_logged')
+def workout_logged(workout_id):
+    """Apply XP, streak and badges for a newly logged workout, once."""
+    # Clearing the flag is the idempotency guard: a redelivered job matches no row.
+    # It also takes the workout's row lock, serializing jobs for the same user on SQLite.
+    result = db.session.execute(
+        update(Workout)
+        .where(Workout.id == workout_id, Workout.xp_pending.is_(True))
+        .values(xp_pending=False)
+    )
+    if result.rowcount == 0:
+        return
+    
+    workout = db.session.get(Workout, workout_id)
+    gamification = GamificationState.query.filter_by(user_id=workout.user_id).with_for_update().first()
+    if gamification is None:
+        return
+    
+    before = badges.snapshot(gamification)
+    gamification.add_xp(workout.duration_minutes * XP_PER_ACTIVITY_MINUTE)
+    gamification.update_streak([workout.local_day])
+    badges.award_crossed(workout.user_id, before, badges.snapshot(gamification))
+
+@handler('activity_days_changed')
+def activity_days_changed(user_id, days):
+    """Re-derive streaks after workouts moved off (or onto) ``days`` by an edit or delete.
+    
+    Needs no claim: streaks are recomputed from the activity calendar, so
+    running twice gives the same result.
+    """
+    gamification = GamificationState.query.filter_by(user_id=user_id).with_for_update().first()
+    if gamification is None:
+        return
+    
+    before = badges.snapshot(gamification)
+    gamification.update_streak([_day(day) for day in days])
+    badges.award_crossed(user_id, before, badges.snapshot(gamification))
+
+@handler('archive_old_data')
+def archive_old_data(days=None, batch_size=None, max_batches=20):
+    """Archive old rows a slice at a time, re-queueing itself until done."""
+    from datetime import datetime, timedelta
+    from backend.app.utils import archive, jobs
+    before = datetime.utcnow() - timedelta(days=days) if days is not None else None
+    _, done = archive.archive_old_rows(before, batch_size, max_batches)
+    if not done:
+        jobs.enqueue('archive_old_data', {'days': days, 'batch_size': batch_size, 'max_batches': max_batches})
+
+@handler('restamp_local_days')
+def restamp_local_days(user_id):
+    """Move a user's history onto local days in their current timezone.
+    
+    Needs no claim: days are recomputed from logged_at and the user's
+    timezone, so running twice gives the same result.
+    """
+    from backend.app.utils import schema
+    schema.restamp_local_days(user_id)
+
+@handler('recompute_workout_calories')
+def recompute_workout_calories(user_id, start=None, end=None, cursor=None):
+    """Re-cost a user's workouts a slice at a time, re-queueing itself until done."""
+    from backend.app.utils import jobs, recompute
+    _, cursor = recompute.workout_calories(
+        user_id, _day(start), _day(end), max_batches=RECOMPUTE_BATCHES_PER_JOB, cursor=cursor
+    )
+    if cursor is not None:
+        jobs.enqueue('recompute_workout_calories', {'user_id': user_id, 'start': start, 'end': end, 'cursor': cursor})
+
+@handler('recompute_food_entries')
+def recompute_food_entries(food_id, start=None, end=None, cursor=None):
+    """Re-copy a food's nutrients into its entries a slice at a time, re-queueing itself until done."""
+    from backend.app.utils import jobs, recompute
+    _, cursor = recompute.food_entry_macros(
+        food_id, _day(start), _day(end), max_batches=RECOMPUTE_BATCHES_PER_JOB, cursor=cursor
+    )
+    if cursor is not None:
+        jobs.enqueue('recompute_food_entries', {'food_id': food_id, 'start': start, 'end': end, 'cursor': cursor})
@@ -0,0 +1,190 @@
+"""Database-backed job queue for side effects of user writes.
+
+Jobs are rows in the ``jobs`` table, added in the same transaction as the
+write that caused them, so a job exists if and only if its write committed.
+Workers (``flask run-worker``) claim due jobs with a conditional UPDATE,
+so two workers never run the same attempt. The handler runs and the job is
+marked done in one transaction.
+
+Delivery is at-least-once: a worker that dies mid-job leaves a stale lock,
+and the job is requeued after ``JOB_LOCK_TIMEOUT`` seconds. Handlers must
+therefore be idempotent. A failing job is retried with exponential backoff
+until ``max_attempts``, then left as ``failed`` for inspection.
+
+With ``JOBS_RUN_INLINE`` (development/testing) jobs enqueued during a
+request are run right after the view returns, so no worker is needed.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app, g, has_request_context
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+from backend.app import db
+from backend.app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+INLINE_KEY = 'jobs_inline'
+BACKOFF_BASE = 5  # seconds before the first retry; doubles per attempt
+BACKOFF_MAX = 3600
+
+def handler(kind):
+    """Register a function as the handler for jobs of ``kind``."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+def enqueue(kind, payload=None, dedupe_key=None, run_at=None, max_attempts=5):
+    """Add a job to the current transaction; returns it (or the existing job for ``dedupe_key``)."""
+    if dedupe_key is not None:
+        existing = Job.query.filter_by(dedupe_key=dedupe_key).first()
+        if existing is not None:
+            return existing
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        dedupe_key=dedupe_key,
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts,
+    )
+    db.session.add(job)
+    if current_app.config.get('JOBS_RUN_INLINE'):
+        db.session.flush()
+        db.session.info.setdefault(INLINE_KEY, []).append(job.id)
+    return job
+
+def _backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+def requeue_stale(now=None):
+    """Put jobs whose worker stopped responding back in the queue."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', 300))
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', Job.locked_at < cutoff)
+        .values(status='queued', locked_by=None, locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def claim(worker_id, limit=10, ids=None):
+    """Claim up to ``limit`` due jobs for ``worker_id``; returns the claimed Job rows."""
+    now = datetime.utcnow()
+    candidates = select(Job.id).where(Job.status == 'queued', Job.run_at <= now)
+    if ids is not None:
+        candidates = candidates.where(Job.id.in_(ids))
+    job_ids = db.session.execute(candidates.order_by(Job.run_at, Job.id).limit(limit)).scalars().all()
+
+    claimed = []
+    for job_id in job_ids:
+        # Only one worker's UPDATE can still see the job as queued
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return Job.query.filter(Job.id.in_(claimed)).order_by(Job.run_at, Job.id).all() if claimed else []
+
+def run_job(job):
+    """Run one claimed job; its effects and its completion commit together."""
+    job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+    try:
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            raise LookupError(f'No handler for job kind {kind!r}')
+        fn(**json.loads(job.payload))
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(status='done', finished_at=datetime.utcnow(), last_error=None)
+        )
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        logger.warning('Job %s (%s) failed on attempt %s', job_id, kind, attempts)
+        values = {'locked_by': None, 'locked_at': None, 'last_error': error}
+        if attempts >= max_attempts:
+            values.update(status='failed', finished_at=datetime.utcnow())
+        else:
+            values.update(status='queued', run_at=datetime.utcnow() + _backoff(attempts))
+        db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.session.commit()
+        return False
+
+def work(worker_id=None, batch_size=10, poll_interval=1.0, burst=False, should_stop=None):
+    """Process jobs until stopped; with ``burst`` return once the queue is drained.
+
+    Returns the number of jobs processed.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    processed = 0
+    last_maintenance = 0
+    while not (should_stop and should_stop()):
+        if time.monotonic() - last_maintenance > 60:
+            requeue_stale()
+            last_maintenance = time.monotonic()
+        jobs = claim(worker_id, limit=batch_size)
+        for job in jobs:
+            run_job(job)
+            processed += 1
+        if not jobs:
+            if burst:
+                break
+            time.sleep(poll_interval)
+    return processed
+
+def run_inline(job_ids):
+    """Run specific jobs in-process (JOBS_RUN_INLINE); failures stay queued for a worker."""
+    for job in claim('inline', limit=len(job_ids), ids=job_ids):
+        run_job(job)
+
+def counts():
+    """Number of jobs per status."""
+    return dict(db.session.execute(select(Job.status, func.count(Job.id)).group_by(Job.status)).tuples().all())
+
+def prune(days=7):
+    """Delete jobs that finished successfully more than ``days`` ago."""
+    result = db.session.execute(
+        delete(Job).where(Job.status == 'done', Job.finished_at < datetime.utcnow() - timedelta(days=days))
+    )
+    db.session.commit()
+    return result.rowcount
+
+def init_app(app):
+    """Run jobs enqueued during a request once it has been handled (inline mode only)."""
+    @app.after_request
+    def _run_inline_jobs(response):
+        job_ids = g.pop(INLINE_KEY, None)
+        if job_ids:
+            try:
+                run_inline(job_ids)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Inline jobs failed; they remain queued')
+        return response
+
+@event.listens_for(Session, 'after_commit')
+def _collect_inline(session):
+    job_ids = session.info.pop(INLINE_KEY, None)
+    if job_ids and has_request_context():
+        g.setdefault(INLINE_KEY, []).extend(job_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_inline(session):
+    session.info.pop(INLINE_KEY, None)
+
+# Handlers live in their own module and register themselves on import
+from backend.app.utils import job_handlers  # noqa: E402,F401
@@ -0,0 +1,412 @@
+"""Ranked leaderboards for total XP, current streak and weekly minutes.
+
+Scores live in a sorted-set store keyed per board (and per week for
+``weekly_minutes``). With ``LEADERBOARD_REDIS_URL`` set that is a shared
+Redis instance. Otherwise every worker uses LocalSortedSetStore, an
+in-process stand-in that answers the same commands from a skip list with
+spans, so "my rank" and top-N are O(log n) instead of an ORDER BY over
+gamification_state per request.
+
+A board is loaded from the database the first time a worker needs it. It is
+then kept current incrementally: GamificationState.add_xp/update_streak
+and the workout rollups queue score changes, and they are applied once the
+session commits. A shared board gets them from every process, the job
+worker included, even one that never read it. Local boards are also
+reloaded every ``LEADERBOARD_RELOAD_SECONDS`` so a worker picks up changes
+served by its siblings.
+"""
+import random
+import threading
+import time
+from datetime import date, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from backend.app import db
+from backend.app.models.gamification import GamificationState
+from backend.app.models.stats import DailyUserStats
+from backend.app.models.user import User
+from backend.app.utils.dates import week_start
+
+BOARDS = {
+    'xp': 'Total XP',
+    'streak': 'Current streak',
+    'weekly_minutes': 'Active minutes this week',
+}
+WEEKLY_BOARDS = ('weekly_minutes',)
+WEEKLY_TTL = 5 * 7 * 24 * 3600  # weekly boards expire five weeks after they were last loaded
+PENDING_KEY = 'leaderboard_pending'
+
+class _Node:
+    __slots__ = ('key', 'member', 'score', 'forward', 'span')
+
+    def __init__(self, level, member=None, score=None):
+        self.member = member
+        self.score = score
+        self.key = None if member is None else (-score, member)
+        self.forward = [None] * level
+        self.span = [0] * level
+
+class SkipList:
+    """Members ordered by score (highest first, ties by member) with rank lookups.
+
+    Every forward pointer records how many nodes it skips (its span), so
+    the rank of a member and the member at a rank are both found in one
+    top-down walk.
+    """
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self, seed=None):
+        self._head = _Node(self.MAX_LEVEL)
+        self._level = 1
+        self._scores = {}
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, member):
+        return member in self._scores
+
+    def score(self, member):
+        return self._scores.get(member)
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and self._random.random() < self.P:
+            level += 1
+        return level
+
+    def add(self, member, score):
+        """Insert ``member`` or move it to ``score``."""
+        if member in self._scores:
+            if self._scores[member] == score:
+                return
+            self.remove(member)
+
+        key = (-score, member)
+        update = [None] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = 0 if i == self._level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = len(self._scores)
+            self._level = level
+
+        new = _Node(level, member, score)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._scores[member] = score
+
+    def remove(self, member):
+        """Drop ``member``; returns whether it was present."""
+        score = self._scores.pop(member, None)
+        if score is None:
+            return False
+
+        key = (-score, member)
+        update = [None] * self.MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+
+        target = node.forward[0]
+        for i in range(self._level):
+            if update[i].forward[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].forward[i] = target.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        return True
+
+    def rank(self, member):
+        """0-based position of ``member`` (0 = highest score), or ``None``."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (-score, member)
+        traversed = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if node.member == member:
+                return traversed - 1
+        return None
+
+    def slice(self, start, stop):
+        """``[(member, score), ...]`` for ranks ``start <= rank < stop``."""
+        stop = min(stop, len(self._scores))
+        if start >= stop:
+            return []
+        traversed = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and traversed + node.span[i] <= start + 1:
+                traversed += node.span[i]
+                node = node.forward[i]
+        items = []
+        while node is not None and len(items) < stop - start:
+            items.append((node.member, node.score))
+            node = node.forward[0]
+        return items
+
+class LocalSortedSetStore:
+    """In-process stand-in for the Redis sorted-set commands the boards use."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sets = {}
+        self._expires = {}
+
+    def _get(self, key, create=False):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._sets.pop(key, None)
+            self._expires.pop(key, None)
+        zset = self._sets.get(key)
+        if zset is None and create:
+            zset = self._sets[key] = SkipList()
+        return zset
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._get(key) is not None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._sets.pop(key, None)
+                self._expires.pop(key, None)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._get(key) is not None:
+                self._expires[key] = time.monotonic() + seconds
+
+    def replace(self, key, mapping):
+        """Swap in a whole new set at once (readers never see it half-loaded)."""
+        zset = SkipList()
+        for member, score in mapping.items():
+            zset.add(str(member), score)
+        with self._lock:
+            self._sets[key] = zset
+            self._expires.pop(key, None)
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            zset = self._get(key, create=True)
+            for member, score in mapping.items():
+                zset.add(str(member), score)
+
+    def zincrby(self, key, amount, member):
+        with self._lock:
+            zset = self._get(key, create=True)
+            score = (zset.score(str(member)) or 0) + amount
+            zset.add(str(member), score)
+            return score
+
+    def zrem(self, key, *members):
+        with self._lock:
+            zset = self._get(key)
+            return sum(zset.remove(str(member)) for member in members) if zset else 0
+
+    def zscore(self, key, member):
+        with self._lock:
+            zset = self._get(key)
+            return zset.score(str(member)) if zset else None
+
+    def zcard(self, key):
+        with self._lock:
+            zset = self._get(key)
+            return len(zset) if zset else 0
+
+    def zrevrank(self, key, member):
+        with self._lock:
+            zset = self._get(key)
+            return zset.rank(str(member)) if zset else None
+
+    def zrevrange(self, key, start, end, withscores=False):
+        """Members from rank ``start`` to ``end`` inclusive; ``end=-1`` means the last."""
+        with self._lock:
+            zset = self._get(key)
+            if not zset:
+                return []
+            stop = len(zset) if end == -1 else end + 1
+            items = zset.slice(start, stop)
+            return items if withscores else [member for member, _ in items]
+
+_store = None
+_store_lock = threading.Lock()
+_loaded_at = {}  # board key -> monotonic time this worker loaded/verified it
+
+def get_store():
+    """The sorted-set store: Redis when ``LEADERBOARD_REDIS_URL`` is set, else in-process."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = current_app.config.get('LEADERBOARD_REDIS_URL')
+                if url:
+                    import redis  # optional dependency, only needed for a shared store
+                    _store = redis.Redis.from_url(url, decode_responses=True)
+                else:
+                    _store = LocalSortedSetStore()
+    return _store
+
+def _is_local(store):
+    return isinstance(store, LocalSortedSetStore)
+
+def board_key(board, day=None):
+    """Store key for a board; weekly boards need a day inside the week."""
+    if board in WEEKLY_BOARDS:
+        return f'leaderboard:{board}:{week_start(day).isoformat()}'
+    return f'leaderboard:{board}'
+
+def _load_scores(board, day, user_id=None):
+    if board == 'xp':
+        query = select(GamificationState.user_id, GamificationState.total_xp).where(GamificationState.total_xp > 0)
+    elif board == 'streak':
+        query = select(GamificationState.user_id, GamificationState.current_streak).where(
+            GamificationState.current_streak > 0
+        )
+    else:
+        start = week_start(day)
+        query = (
+            select(DailyUserStats.user_id, func.sum(DailyUserStats.workout_minutes))
+            .where(DailyUserStats.day >= start, DailyUserStats.day < start + timedelta(days=7))
+            .group_by(DailyUserStats.user_id)
+            .having(func.sum(DailyUserStats.workout_minutes) > 0)
+        )
+    if user_id is not None:
+        owner = DailyUserStats.user_id if board in WEEKLY_BOARDS else GamificationState.user_id
+        query = query.where(owner == user_id)
+    return {str(user_id): score for user_id, score in db.session.execute(query)}
+
+def _ensure_loaded(board, day):
+    store = get_store()
+    key = board_key(board, day)
+    loaded_at = _loaded_at.get(key)
+    if _is_local(store):
+        max_age = current_app.config.get('LEADERBOARD_RELOAD_SECONDS', 60)
+        if loaded_at is not None and time.monotonic() - loaded_at < max_age and store.exists(key):
+            return store, key
+        store.replace(key, _load_scores(board, day))
+    elif not store.exists(key):  # never loaded, expired, or dropped by reset() in any process
+        scores = _load_scores(board, day)
+        if scores:
+            store.zadd(key, scores)
+    if board in WEEKLY_BOARDS:
+        store.expire(key, WEEKLY_TTL)
+    _loaded_at[key] = time.monotonic()
+    return store, key
+
+def top(board, limit=10, day=None):
+    """Top ``limit`` entries: ``[{'rank', 'user_id', 'username', 'score'}]``."""
+    if limit < 1:
+        return []  # zrevrange(key, 0, -1) would return the whole board
+    store, key = _ensure_loaded(board, day)
+    entries = store.zrevrange(key, 0, limit - 1, withscores=True)
+    user_ids = [int(member) for member, _ in entries]
+    usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(user_ids))).tuples().all()) if user_ids else {}
+    return [
+        {'rank': position + 1, 'user_id': user_id, 'username': usernames.get(user_id), 'score': int(score)}
+        for position, (user_id, (_, score)) in enumerate(zip(user_ids, entries))
+    ]
+
+def rank(board, user_id, day=None):
+    """``{'rank', 'score', 'total'}`` for a user; rank is ``None`` when they aren't on the board."""
+    store, key = _ensure_loaded(board, day)
+    position = store.zrevrank(key, str(user_id))
+    score = store.zscore(key, str(user_id))
+    return {
+        'rank': None if position is None else position + 1,
+        'score': int(score or 0),
+        'total': store.zcard(key),
+    }
+
+def score_changed(board, user_id, score):
+    """Queue an absolute score for a global board, applied when the session commits."""
+    db.session.info.setdefault(PENDING_KEY, []).append(('set', board_key(board), user_id, score))
+
+def minutes_changed(user_id, day, delta):
+    """Queue a change to a user's active minutes in the week containing ``day``."""
+    if day is not None and delta:
+        db.session.info.setdefault(PENDING_KEY, []).append(('incr', board_key('weekly_minutes', day), user_id, delta))
+
+def _board_keys(store):
+    # A shared store also holds boards that only other processes loaded
+    return set(_loaded_at) if _is_local(store) else set(store.scan_iter('leaderboard:*'))
+
+def reset():
+    """Forget every loaded board so the next read reloads it (after rebuild-stats)."""
+    store = get_store()
+    keys = _board_keys(store)
+    if keys:
+        store.delete(*keys)
+    _loaded_at.clear()
+
+def refresh_user(user_id):
+    """Re-read one user's committed scores on every loaded board.
+
+    For a rebuild of one user's history (a timezone change), where reset()
+    would empty the boards for everyone else too.
+    """
+    store = get_store()
+    member = str(user_id)
+    for key in _board_keys(store):
+        if not store.exists(key):
+            continue
+        _, board, *week = key.split(':')
+        score = _load_scores(board, date.fromisoformat(week[0]) if week else None, user_id).get(member, 0)
+        if score > 0:
+            store.zadd(key, {member: score})
+        else:
+            store.zrem(key, member)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_after_commit(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+    store = get_store()
+    local = _is_local(store)
+    for op, key, user_id, value in pending:
+        # Boards nobody has loaded yet will read the committed rows anyway. Only this
+        # process can have loaded a local board; a shared one is checked in the store.
+        if key not in _loaded_at if local else not store.exists(key):
+            continue
+        if op == 'set':
+            if value > 0:
+                store.zadd(key, {str(user_id): value})
+            else:
+                store.zrem(key, str(user_id))
+        else:
+            score = store.zincrby(key, value, str(user_id))
+            if score <= 0:
+                store.zrem(key, str(user_id))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
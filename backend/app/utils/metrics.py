@@ -0,0 +1,226 @@
+"""Per-endpoint request metrics in Prometheus text format.
+
+Every request records its latency in a histogram by endpoint and method,
+along with the number of SQL statements it ran, the time spent in them
+(from engine cursor events) and the response size. View-cache and
+user-cache hit rates are counted too. ``GET /metrics`` serves the totals.
+
+Counters live in process memory. Under gunicorn each worker only sees its
+own requests, so with ``METRICS_DIR`` set every worker also writes a
+snapshot to ``<METRICS_DIR>/metrics-<pid>.json`` at most every
+``METRICS_FLUSH_SECONDS``, and /metrics sums all the snapshots. Clear the
+directory when the server restarts, as with Prometheus' own multiprocess
+mode; the container's start.sh does both.
+
+Scrapers authenticate with ``METRICS_TOKEN`` as a Bearer token. In
+production (``METRICS_REQUIRE_TOKEN``) /metrics answers 403 until a token
+is configured.
+
+Requests slower than ``SLOW_REQUEST_MS`` are logged as warnings with their
+SQL totals.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_logger = logging.getLogger('backend.app.slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = 'fitness'
+
+_lock = threading.Lock()
+_requests = defaultdict(int)                                   # (endpoint, method, status) -> count
+_latency = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 2))  # (endpoint, method) -> buckets..., sum, count
+_sql = defaultdict(lambda: [0, 0.0])                           # endpoint -> [statements, seconds]
+_response_bytes = defaultdict(int)                             # endpoint -> bytes
+_cache = defaultdict(int)                                      # (cache, result) -> count
+_last_flush = [0.0]
+
+def cache_lookup(name, hit):
+    """Count a hit or miss in the cache called ``name``."""
+    with _lock:
+        _cache[(name, 'hit' if hit else 'miss')] += 1
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_app_context() and 'metrics_start' in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_seconds += elapsed
+
+def _observe(endpoint, method, status, seconds, statements, sql_seconds, size):
+    with _lock:
+        _requests[(endpoint, method, status)] += 1
+        series = _latency[(endpoint, method)]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+        _sql[endpoint][0] += statements
+        _sql[endpoint][1] += sql_seconds
+        if size is not None:
+            _response_bytes[endpoint] += size
+
+def snapshot():
+    """This worker's counters as plain JSON-friendly data."""
+    from backend.app.utils import user_cache
+    with _lock:
+        data = {
+            'requests': [[*key, count] for key, count in _requests.items()],
+            'latency': [[*key, values] for key, values in _latency.items()],
+            'sql': [[endpoint, *values] for endpoint, values in _sql.items()],
+            'response_bytes': [[endpoint, size] for endpoint, size in _response_bytes.items()],
+            'cache': [[*key, count] for key, count in _cache.items()],
+        }
+    user_stats = user_cache.stats()
+    data['cache'] += [['user', 'hit', user_stats['hits']], ['user', 'miss', user_stats['misses']]]
+    return data
+
+def _snapshot_path(directory, pid=None):
+    return os.path.join(directory, f'metrics-{pid or os.getpid()}.json')
+
+def flush(directory):
+    """Write this worker's snapshot for the other workers' /metrics to read."""
+    path = _snapshot_path(directory)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as handle:
+        json.dump(snapshot(), handle)
+    os.replace(temp_path, path)  # readers never see a half-written file
+    _last_flush[0] = time.monotonic()
+
+def _merge(snapshots):
+    requests, latency, sql, sizes, caches = (defaultdict(int), {}, defaultdict(lambda: [0, 0.0]),
+                                             defaultdict(int), defaultdict(int))
+    for data in snapshots:
+        for endpoint, method, status, count in data['requests']:
+            requests[(endpoint, method, status)] += count
+        for endpoint, method, values in data['latency']:
+            current = latency.setdefault((endpoint, method), [0] * len(values))
+            latency[(endpoint, method)] = [a + b for a, b in zip(current, values)]
+        for endpoint, statements, seconds in data['sql']:
+            sql[endpoint][0] += statements
+            sql[endpoint][1] += seconds
+        for endpoint, size in data['response_bytes']:
+            sizes[endpoint] += size
+        for name, result, count in data['cache']:
+            caches[(name, result)] += count
+    return requests, latency, sql, sizes, caches
+
+def _collect(directory):
+    """Snapshots of every worker, with this worker's taken live rather than from disk."""
+    own_path = _snapshot_path(directory) if directory else None
+    snapshots = [snapshot()]
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')) if directory else ():
+        if path == own_path:
+            continue
+        try:
+            with open(path) as handle:
+                snapshots.append(json.load(handle))
+        except (OSError, ValueError):
+            continue  # a worker's file vanished or is being replaced
+    return snapshots
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+def render(directory=None):
+    """All workers' metrics in the Prometheus text exposition format."""
+    requests, latency, sql, sizes, caches = _merge(_collect(directory))
+    lines = []
+
+    def metric(name, kind, help_text):
+        lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    metric('requests_total', 'counter', 'Requests handled, by endpoint, method and status.')
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append(f'{PREFIX}_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+    metric('request_duration_seconds', 'histogram', 'Time to build the response.')
+    for (endpoint, method), values in sorted(latency.items()):
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            labels = _labels(endpoint=endpoint, method=method, le=bound)
+            lines.append(f'{PREFIX}_request_duration_seconds_bucket{labels} {count}')
+        labels = _labels(endpoint=endpoint, method=method, le='+Inf')
+        lines.append(f'{PREFIX}_request_duration_seconds_bucket{labels} {values[-1]}')
+        labels = _labels(endpoint=endpoint, method=method)
+        lines.append(f'{PREFIX}_request_duration_seconds_sum{labels} {values[-2]:.6f}')
+        lines.append(f'{PREFIX}_request_duration_seconds_count{labels} {values[-1]}')
+
+    metric('request_sql_statements_total', 'counter', 'SQL statements run while handling requests.')
+    for endpoint, (statements, _) in sorted(sql.items()):
+        lines.append(f'{PREFIX}_request_sql_statements_total{_labels(endpoint=endpoint)} {statements}')
+
+    metric('request_sql_seconds_total', 'counter', 'Time spent executing SQL while handling requests.')
+    for endpoint, (_, seconds) in sorted(sql.items()):
+        lines.append(f'{PREFIX}_request_sql_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+
+    metric('response_bytes_total', 'counter', 'Response body bytes, where the length is known up front.')
+    for endpoint, size in sorted(sizes.items()):
+        lines.append(f'{PREFIX}_response_bytes_total{_labels(endpoint=endpoint)} {size}')
+
+    metric('cache_lookups_total', 'counter', 'View-cache and user-cache lookups, by result.')
+    for (name, result), count in sorted(caches.items()):
+        lines.append(f'{PREFIX}_cache_lookups_total{_labels(cache=name, result=result)} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    """Time every request and serve ``/metrics``."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    directory = app.config.get('METRICS_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(lambda: flush(directory))
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count, g.metrics_sql_seconds = 0, 0.0
+
+    @app.after_request
+    def _record(response):
+        if 'metrics_start' not in g or request.endpoint == 'metrics':
+            return response
+        seconds = time.perf_counter() - g.metrics_start
+        endpoint = request.endpoint or '<unmatched>'  # never label by raw path
+        size = None if response.is_streamed else response.calculate_content_length()
+        _observe(endpoint, request.method, response.status_code, seconds,
+                 g.metrics_sql_count, g.metrics_sql_seconds, size)
+
+        slow_ms = current_app.config.get('SLOW_REQUEST_MS')
+        if slow_ms and seconds * 1000 >= slow_ms:
+            slow_logger.warning('Slow request: %s %s (%s) took %.0f ms, %d SQL statements in %.0f ms',
+                                request.method, request.path, endpoint, seconds * 1000,
+                                g.metrics_sql_count, g.metrics_sql_seconds * 1000)
+        if directory and time.monotonic() - _last_flush[0] >= current_app.config.get('METRICS_FLUSH_SECONDS', 5):
+            flush(directory)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+        if not token and current_app.config.get('METRICS_REQUIRE_TOKEN'):
+            return Response('Forbidden: set METRICS_TOKEN to enable /metrics\n', status=403, mimetype='text/plain')
+        return Response(render(directory), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,50 @@
+"""Per-request SQL statement budgets for list views.
+
+``@query_budget(n)`` counts the statements a view runs, including the ones
+fired while rendering its template. A lazy load added to a loop later
+shows up as a blown budget instead of a quiet N+1. With
+``QUERY_BUDGET_ENFORCE`` on (the testing config), an over-budget request
+raises QueryBudgetExceeded. Otherwise the overrun is logged as a warning.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL statements than its budget allows."""
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and g.get('query_budget') is not None:
+        g.query_count += 1
+
+@contextmanager
+def unbudgeted():
+    """Leave the statements run inside the block out of the current view's count."""
+    budget = g.get('query_budget')
+    g.query_budget = None
+    try:
+        yield
+    finally:
+        g.query_budget = budget
+
+def query_budget(limit):
+    """Decorate a view so it may run at most ``limit`` SQL statements."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.query_budget, g.query_count = limit, 0
+            try:
+                response = view(*args, **kwargs)
+            finally:
+                count, g.query_budget = g.query_count, None
+            if count > limit:
+                message = f'{request.endpoint} ran {count} SQL statements (budget {limit})'
+                if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return response
+        return wrapper
+    return decorator
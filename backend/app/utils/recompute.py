@@ -0,0 +1,128 @@
+"""Rewrite stored derived values after their inputs change.
+
+``Workout.calories_burned`` is costed from the user's weight when the
+workout is logged, and ``FoodEntry`` macros are copied from the Food.
+Correcting a weight or a food's nutrients leaves those copies stale until
+they are recomputed here.
+
+The work is set-based. Each batch takes the next ``batch_size`` ids in
+keyset order and rewrites them with one UPDATE whose new values are SQL
+expressions: a CASE over ``MET_VALUES`` for workouts, or the food's
+figures times the serving size for entries. Then it re-sums the rollup
+days the batch touched. Archived rows are included. Every batch commits
+on its own, and a run stopped after ``max_batches`` hands back a cursor to
+resume from, which is how the recompute jobs work through millions of rows.
+"""
+from flask import current_app
+from sqlalchemy import Numeric, case, cast, func, literal, select, update
+from backend.app import db
+from backend.app.models.user import User
+from backend.app.models.workout import Workout, MET_VALUES
+from backend.app.models.food import Food, FoodEntry
+from backend.app.models.archive import ArchivedWorkout, ArchivedFoodEntry
+from backend.app.utils import goal_progress, records, rollups, view_cache
+
+DEFAULT_MET = 5.0
+INTENSITY_FACTORS = {'light': 0.8, 'vigorous': 1.2}
+
+def _rounded(expression):
+    # round(double precision, int) doesn't exist on PostgreSQL
+    return func.round(cast(expression, Numeric), 2)
+
+def _calories_burned(model, weight_kg):
+    """SQL twin of estimate_calories() for the rows of ``model``."""
+    if not weight_kg:
+        return None
+    met = case(MET_VALUES, value=func.lower(model.activity_name), else_=DEFAULT_MET)
+    factor = case(INTENSITY_FACTORS, value=model.intensity, else_=1.0)
+    return _rounded(met * factor * weight_kg * model.duration_minutes / 60.0)
+
+def _macros(model, food):
+    """SQL twin of FoodEntry.calculate_macros() for the rows of ``model``."""
+    factor = model.quantity_grams / 100.0
+    values = {'calories': _rounded(literal(food.calories_per_100g) * factor)}
+    for name in ('protein_g', 'fat_g', 'carbs_g'):
+        per_100g = getattr(food, name)
+        values[name] = _rounded(literal(per_100g) * factor) if per_100g else None
+    return values
+
+def _in_range(model, start, end):
+    conditions = []
+    if start is not None:
+        conditions.append(model.local_day >= start)
+    if end is not None:
+        conditions.append(model.local_day <= end)
+    return conditions
+
+def _run(models, conditions, values, cursor, batch_size, max_batches, progress):
+    """Rewrite matching rows batch by batch; returns ``(rows, user_ids, cursor or None when done)``.
+
+    ``cursor`` is ``[model index, last id]`` from an earlier, unfinished run.
+    """
+    batch_size = batch_size or current_app.config.get('RECOMPUTE_BATCH_SIZE', 1000)
+    index, after_id = cursor or (0, 0)
+    total, user_ids, batches = 0, set(), 0
+    while index < len(models):
+        if max_batches is not None and batches >= max_batches:
+            return total, user_ids, [index, after_id]
+        model = models[index]
+        ids = db.session.execute(
+            select(model.id).where(*conditions(model), model.id > after_id).order_by(model.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            index, after_id = index + 1, 0
+            continue
+
+        days = db.session.execute(select(model.user_id, model.local_day).where(model.id.in_(ids)).distinct()).all()
+        db.session.execute(
+            update(model).where(model.id.in_(ids)).values(**values(model))
+            .execution_options(synchronize_session=False)
+        )
+        rollups.resum_days(days)
+        for user_id in {uid for uid, _ in days} - user_ids:
+            view_cache.invalidate_user(db.session, user_id)
+            user_ids.add(user_id)
+        db.session.commit()
+
+        total += len(ids)
+        batches += 1
+        after_id = ids[-1]
+        if progress:
+            progress(total)
+    return total, user_ids, None
+
+def workout_calories(user_id, start=None, end=None, batch_size=None, max_batches=None, cursor=None, progress=None):
+    """Re-cost a user's workouts (local days ``start``..``end``) at their current weight.
+
+    Returns ``(rows rewritten, cursor)``; the cursor is ``None`` once done.
+    """
+    weight_kg = db.session.scalar(select(User.weight_kg).where(User.id == user_id))
+    rows, _, cursor = _run(
+        (Workout, ArchivedWorkout),
+        lambda model: [model.user_id == user_id, *_in_range(model, start, end)],
+        lambda model: {'calories_burned': _calories_burned(model, weight_kg)},
+        cursor, batch_size, max_batches, progress,
+    )
+    if cursor is None:
+        records.rebuild(user_id)  # max_calories follows calories_burned
+        db.session.commit()
+    return rows, cursor
+
+def food_entry_macros(food_id, start=None, end=None, batch_size=None, max_batches=None, cursor=None, progress=None):
+    """Re-copy a food's nutrients into every entry of it (local days ``start``..``end``).
+
+    Returns ``(rows rewritten, cursor)``; the cursor is ``None`` once done.
+    """
+    food = db.session.get(Food, food_id)
+    if food is None:
+        return 0, None
+    rows, user_ids, cursor = _run(
+        (FoodEntry, ArchivedFoodEntry),
+        lambda model: [model.food_id == food_id, *_in_range(model, start, end)],
+        lambda model: _macros(model, food),
+        cursor, batch_size, max_batches, progress,
+    )
+    for user_id in user_ids:
+        goal_progress.reset(user_id)  # calorie goals are totalled from the rollups
+    db.session.commit()
+    return rows, cursor
@@ -0,0 +1,146 @@
+"""Personal records kept up to date from workout writes.
+
+Each user has at most one PersonalRecord row per record type, pointing at
+the workout that holds it. Creating or editing a workout only compares that
+one workout with the current records. History, archived workouts included,
+is scanned (an indexed query with LIMIT 1 per table) only when the workout
+holding a record gets worse or is deleted.
+"""
+from collections import OrderedDict
+from sqlalchemy import func, select
+from backend.app import db
+from backend.app.models.records import PersonalRecord
+from backend.app.models.workout import Workout
+from backend.app.models.archive import ArchivedWorkout
+
+RUN_ACTIVITIES = ('running', 'jogging')
+RIDE_ACTIVITIES = ('cycling',)
+FIVE_K = 5.0
+
+# record_type -> label, unit, and whether a lower value is better
+RECORDS = OrderedDict([
+    ('fastest_5k', {'label': 'Fastest 5K', 'unit': 'min', 'lower_is_better': True}),
+    ('longest_run', {'label': 'Longest Run', 'unit': 'km', 'lower_is_better': False}),
+    ('longest_ride', {'label': 'Longest Ride', 'unit': 'km', 'lower_is_better': False}),
+    ('max_calories', {'label': 'Biggest Burn', 'unit': 'cal', 'lower_is_better': False}),
+])
+
+def record_value(record_type, workout):
+    """The value ``workout`` scores for a record type, or ``None`` if it doesn't qualify."""
+    activity = (workout.activity_name or '').lower()
+    distance = workout.distance_km or 0
+    if record_type == 'fastest_5k':
+        # Runs of 5 km or more count at their average pace over 5 km
+        if activity in RUN_ACTIVITIES and distance >= FIVE_K and workout.duration_minutes:
+            return round(workout.duration_minutes * FIVE_K / distance, 2)
+    elif record_type == 'longest_run':
+        if activity in RUN_ACTIVITIES and distance > 0:
+            return distance
+    elif record_type == 'longest_ride':
+        if activity in RIDE_ACTIVITIES and distance > 0:
+            return distance
+    elif record_type == 'max_calories':
+        return workout.calories_burned or None
+    return None
+
+def _value_expression(record_type, model=Workout):
+    """SQL counterpart of record_value() plus the filter for qualifying workouts."""
+    activity = func.lower(model.activity_name)
+    if record_type == 'fastest_5k':
+        return (model.duration_minutes * FIVE_K / model.distance_km,
+                (activity.in_(RUN_ACTIVITIES), model.distance_km >= FIVE_K))
+    if record_type == 'longest_run':
+        return model.distance_km, (activity.in_(RUN_ACTIVITIES), model.distance_km > 0)
+    if record_type == 'longest_ride':
+        return model.distance_km, (activity.in_(RIDE_ACTIVITIES), model.distance_km > 0)
+    return model.calories_burned, (model.calories_burned > 0,)
+
+def _beats(record_type, value, current):
+    if RECORDS[record_type]['lower_is_better']:
+        return value < current
+    return value > current
+
+def _set(records, user_id, record_type, workout_id, value, achieved_at):
+    record = records.get(record_type)
+    if record is None:
+        record = records[record_type] = PersonalRecord(user_id=user_id, record_type=record_type)
+        db.session.add(record)
+    record.workout_id = workout_id
+    record.value = value
+    record.achieved_at = achieved_at
+
+def _best(model, user_id, record_type, exclude_id):
+    value, conditions = _value_expression(record_type, model)
+    query = select(model.id, value, model.logged_at).where(model.user_id == user_id, *conditions)
+    if exclude_id is not None:
+        query = query.where(model.id != exclude_id)
+    ordering = value.asc() if RECORDS[record_type]['lower_is_better'] else value.desc()
+    return db.session.execute(query.order_by(ordering, model.logged_at).limit(1)).first()
+
+def _recompute(records, user_id, record_type, exclude_id=None):
+    """Find the best qualifying workout in the user's history, archived workouts included."""
+    best = _best(Workout, user_id, record_type, exclude_id)
+    archived = _best(ArchivedWorkout, user_id, record_type, exclude_id)
+    if archived is not None and (best is None or _beats(record_type, archived[1], best[1])):
+        # Records point into the hot table, so the new holder comes back out of the archive
+        from backend.app.utils import archive
+        archive.restore_workout(archived[0])
+        best = archived
+
+    if best is None:
+        record = records.pop(record_type, None)
+        if record is not None:
+            db.session.delete(record)
+    else:
+        _set(records, user_id, record_type, best[0], round(best[1], 2), best[2])
+
+def _load(user_id):
+    return {record.record_type: record for record in PersonalRecord.query.filter_by(user_id=user_id)}
+
+def workout_saved(workout):
+    """Compare a new or edited (and flushed) workout against the user's records."""
+    records = _load(workout.user_id)
+    for record_type in RECORDS:
+        value = record_value(record_type, workout)
+        record = records.get(record_type)
+        if record is not None and record.workout_id == workout.id:
+            if value is not None and not _beats(record_type, record.value, value):
+                # Still at least as good as before, so it still holds the record
+                _set(records, workout.user_id, record_type, workout.id, value, workout.logged_at)
+            else:
+                _recompute(records, workout.user_id, record_type)
+        elif value is not None and (record is None or _beats(record_type, value, record.value)):
+            _set(records, workout.user_id, record_type, workout.id, value, workout.logged_at)
+
+def workout_removed(workout):
+    """Hand any records held by a workout about to be deleted to the next best one."""
+    held = PersonalRecord.query.filter_by(user_id=workout.user_id, workout_id=workout.id).all()
+    if not held:
+        return
+    records = {record.record_type: record for record in held}
+    for record_type in list(records):
+        _recompute(records, workout.user_id, record_type, exclude_id=workout.id)
+
+def rebuild(user_id):
+    """Recompute every record for a user from their full history (after bulk imports)."""
+    records = _load(user_id)
+    for record_type in RECORDS:
+        _recompute(records, user_id, record_type)
+
+def format_value(record_type, value):
+    """Human-readable record value, e.g. ``'24:30'`` for a 5K time."""
+    if record_type == 'fastest_5k':
+        seconds = round(value * 60)
+        return f'{seconds // 60}:{seconds % 60:02d}'
+    if record_type == 'max_calories':
+        return f'{value:.0f} {RECORDS[record_type]["unit"]}'
+    return f'{value:.2f} {RECORDS[record_type]["unit"]}'
+
+def for_user(user_id):
+    """The user's records for display, in RECORDS order; one query."""
+    records = _load(user_id)
+    return [
+        dict(records[record_type].to_dict(), label=meta['label'],
+             display=format_value(record_type, records[record_type].value))
+        for record_type, meta in RECORDS.items() if record_type in records
+    ]
@@ -0,0 +1,56 @@
+"""Foods and badges every installation starts with.
+
+Used by ``flask init-db`` and init_db.py. Seeding only adds rows that are
+missing (matched by name), so it is safe to run on every deploy.
+"""
+from sqlalchemy import select
+from backend.app import db
+from backend.app.models.food import Food
+from backend.app.models.gamification import Badge
+
+# (name, calories, protein g, fat g, carbs g) per 100 g
+COMMON_FOODS = [
+    ('Chicken Breast', 165, 31, 3.6, 0),
+    ('Salmon', 208, 20, 13, 0),
+    ('Egg', 155, 13, 11, 1.1),
+    ('Rice', 130, 2.7, 0.3, 28),
+    ('Broccoli', 34, 2.8, 0.4, 7),
+    ('Apple', 52, 0.3, 0.2, 14),
+    ('Banana', 89, 1.1, 0.3, 23),
+    ('Milk (1% fat)', 42, 3.4, 1, 4.8),
+    ('Greek Yogurt', 59, 10, 0.5, 3.25),
+    ('Almonds', 579, 21, 50, 22),
+    ('Bread (whole wheat)', 92, 3.6, 1.1, 17),
+    ('Peanut Butter', 588, 25, 50, 20),
+    ('Olive Oil', 884, 0, 100, 0),
+    ('Pasta', 131, 5, 1.1, 25),
+    ('Chicken Thigh', 209, 26, 11, 0),
+]
+
+# (name, description, condition_type, condition_value)
+BADGE_TEMPLATES = [
+    ('7-Day Streak', 'Completed 7 consecutive days of activity', 'streak', 7),
+    ('14-Day Streak', 'Completed 14 consecutive days of activity', 'streak', 14),
+    ('30-Day Streak', 'Completed 30 consecutive days of activity', 'streak', 30),
+    ('1000 XP', 'Earned 1000 total experience points', 'total_xp', 1000),
+    ('5000 XP', 'Earned 5000 total experience points', 'total_xp', 5000),
+    ('10000 XP', 'Earned 10000 total experience points', 'total_xp', 10000),
+    ('Level 5', 'Reached level 5', 'level', 5),
+    ('Level 10', 'Reached level 10', 'level', 10),
+]
+
+def seed():
+    """Add the missing common foods and badge templates; returns how many of each were added."""
+    known_foods = set(db.session.scalars(select(Food.name)))
+    foods = [
+        Food(name=name, calories_per_100g=cal, protein_g=protein, fat_g=fat, carbs_g=carbs)
+        for name, cal, protein, fat, carbs in COMMON_FOODS if name not in known_foods
+    ]
+    known_badges = set(db.session.scalars(select(Badge.name)))
+    badges = [
+        Badge(name=name, description=desc, condition_type=cond_type, condition_value=cond_val)
+        for name, desc, cond_type, cond_val in BADGE_TEMPLATES if name not in known_badges
+    ]
+    db.session.add_all(foods + badges)
+    db.session.commit()
+    return {'foods': len(foods), 'badges': len(badges)}
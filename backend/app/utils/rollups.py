@@ -0,0 +1,188 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import bindparam, func, select, tuple_, update, delete
+from backend.app import db, cache
+from backend.app.models.stats import DailyUserStats
+from backend.app.models.workout import Workout
+from backend.app.models.food import FoodEntry
+from backend.app.models.archive import ArchivedWorkout, ArchivedFoodEntry
+from backend.app.utils import goal_progress, streaks, view_cache, leaderboard
+
+MEAL_COLUMNS = {
+    'breakfast': 'breakfast_calories',
+    'lunch': 'lunch_calories',
+    'dinner': 'dinner_calories',
+    'snack': 'snack_calories',
+}
+
+def workout_contribution(workout):
+    """Return ``(day, deltas)`` describing what a workout adds to its day."""
+    return workout.local_day, {
+        'workout_count': 1,
+        'workout_minutes': workout.duration_minutes or 0,
+        'calories_burned': workout.calories_burned or 0,
+    }
+
+def food_contribution(entry):
+    """Return ``(day, deltas)`` describing what a food entry adds to its day."""
+    deltas = {
+        'calories_eaten': entry.calories or 0,
+        'protein_g': entry.protein_g or 0,
+        'fat_g': entry.fat_g or 0,
+        'carbs_g': entry.carbs_g or 0,
+    }
+    meal_column = MEAL_COLUMNS.get(entry.meal_type)
+    if meal_column:
+        deltas[meal_column] = entry.calories or 0
+    return entry.local_day, deltas
+
+def apply_contribution(user_id, contribution, sign=1):
+    """Add (or with ``sign=-1`` remove) a contribution to the user's daily row.
+    
+    Uses an in-place ``col = col + delta`` UPDATE so concurrent writers never
+    overwrite each other; the row is created on first use. Nothing is
+    committed here, the caller's transaction covers the change.
+    """
+    day, deltas = contribution
+    if day is None:
+        return
+    
+    leaderboard.minutes_changed(user_id, day, sign * deltas.get('workout_minutes', 0))
+    values = {name: getattr(DailyUserStats, name) + sign * delta for name, delta in deltas.items()}
+    result = db.session.execute(
+        update(DailyUserStats)
+        .where(DailyUserStats.user_id == user_id, DailyUserStats.day == day)
+        .values(**values)
+    )
+    if result.rowcount == 0:
+        db.session.add(DailyUserStats(user_id=user_id, day=day, **{name: sign * delta for name, delta in deltas.items()}))
+        db.session.flush()
+
+def apply_contributions(user_id, contributions, sign=1):
+    """Apply many contributions, merging those that land on the same day first."""
+    merged = defaultdict(dict)
+    for day, deltas in contributions:
+        for name, delta in deltas.items():
+            merged[day][name] = merged[day].get(name, 0) + delta
+    for day, deltas in merged.items():
+        apply_contribution(user_id, (day, deltas), sign)
+
+def get_day(user_id, day):
+    """Rollup row for a single day, or ``None`` if nothing was logged."""
+    return DailyUserStats.query.filter_by(user_id=user_id, day=day).first()
+
+def get_range(user_id, start, end=None):
+    """Rollup rows for ``start <= day <= end``, oldest first."""
+    query = DailyUserStats.query.filter(DailyUserStats.user_id == user_id, DailyUserStats.day >= start)
+    if end is not None:
+        query = query.filter(DailyUserStats.day <= end)
+    return query.order_by(DailyUserStats.day).all()
+
+def weekly_totals(user_id, today, days=30):
+    """Workouts, calories and minutes per ISO-ish week over the last ``days`` days."""
+    start = today - timedelta(days=days)
+    weekly = {}
+    for row in get_range(user_id, start, today):
+        if not row.workout_count:
+            continue
+        week = weekly.setdefault(row.day.strftime('%Y-W%W'), {'workouts': 0, 'calories': 0, 'duration': 0})
+        week['workouts'] += row.workout_count
+        week['calories'] += row.calories_burned
+        week['duration'] += row.workout_minutes
+    # Newest week first, matching the order workouts used to be listed in
+    return dict(sorted(weekly.items(), reverse=True))
+
+def _aggregate(where=None):
+    """Totals per ``(user_id, day)`` from raw rows; ``where(model)`` narrows each source query.
+    
+    Both sources are aggregated with GROUP BY in the database, so the cost is
+    proportional to the number of (user, day) pairs rather than raw rows.
+    """
+    rows = defaultdict(lambda: defaultdict(float))
+    
+    # Archived rows still count towards their days
+    for model in (Workout, ArchivedWorkout):
+        workout_query = select(
+            model.user_id, model.local_day,
+            func.count(model.id), func.coalesce(func.sum(model.duration_minutes), 0),
+            func.coalesce(func.sum(model.calories_burned), 0),
+        ).where(model.local_day.isnot(None)).group_by(model.user_id, model.local_day)
+        if where is not None:
+            workout_query = workout_query.where(where(model))
+        
+        for uid, day, count, minutes, burned in db.session.execute(workout_query):
+            row = rows[(uid, day)]
+            row['workout_count'] += count
+            row['workout_minutes'] += minutes
+            row['calories_burned'] += burned
+    
+    for model in (FoodEntry, ArchivedFoodEntry):
+        food_query = select(
+            model.user_id, model.local_day, model.meal_type,
+            func.coalesce(func.sum(model.calories), 0), func.coalesce(func.sum(model.protein_g), 0),
+            func.coalesce(func.sum(model.fat_g), 0), func.coalesce(func.sum(model.carbs_g), 0),
+        ).where(model.local_day.isnot(None)).group_by(model.user_id, model.local_day, model.meal_type)
+        if where is not None:
+            food_query = food_query.where(where(model))
+        
+        for uid, day, meal_type, calories, protein, fat, carbs in db.session.execute(food_query):
+            row = rows[(uid, day)]
+            row['calories_eaten'] += calories
+            row['protein_g'] += protein
+            row['fat_g'] += fat
+            row['carbs_g'] += carbs
+            if meal_type in MEAL_COLUMNS:
+                row[MEAL_COLUMNS[meal_type]] += calories
+    return rows
+
+def _row_values(totals):
+    return {name: int(value) if name in ('workout_count', 'workout_minutes') else value for name, value in totals.items()}
+
+def rebuild_daily_stats(user_id=None):
+    """Recompute rollup rows from raw workouts and food entries."""
+    rows = _aggregate(None if user_id is None else lambda model: model.user_id == user_id)
+    
+    stale = delete(DailyUserStats)
+    if user_id is not None:
+        stale = stale.where(DailyUserStats.user_id == user_id)
+    db.session.execute(stale)
+    goal_progress.reset(user_id)  # their totals come from these rows
+    
+    if user_id is not None:
+        view_cache.invalidate_user(db.session, user_id)
+    else:
+        cache.clear()
+    
+    db.session.add_all([
+        DailyUserStats(user_id=uid, day=day, **_row_values(totals))
+        for (uid, day), totals in rows.items()
+    ])
+    db.session.commit()
+    streaks.rebuild(user_id)  # streaks come from these rows too
+    if user_id is None:
+        leaderboard.reset()
+    else:
+        leaderboard.refresh_user(user_id)
+    return len(rows)
+
+def resum_days(pairs):
+    """Recompute the existing rollup rows for ``(user_id, day)`` pairs from raw rows.
+    
+    For bulk rewrites of workouts or food entries (see recompute.py). All
+    rows are written with one executemany UPDATE. Nothing is committed here.
+    """
+    pairs = sorted({(uid, day) for uid, day in pairs if day is not None})
+    if not pairs:
+        return 0
+    rows = _aggregate(lambda model: tuple_(model.user_id, model.local_day).in_(pairs))
+    columns = ['workout_count', 'workout_minutes', 'calories_burned', 'calories_eaten',
+               'protein_g', 'fat_g', 'carbs_g', *MEAL_COLUMNS.values()]
+    table = DailyUserStats.__table__
+    db.session.execute(
+        update(table).where(table.c.user_id == bindparam('row_user_id'), table.c.day == bindparam('row_day')),
+        [
+            {'row_user_id': uid, 'row_day': day, **_row_values({name: rows[(uid, day)][name] for name in columns})}
+            for uid, day in pairs
+        ],
+    )
+    return len(pairs)
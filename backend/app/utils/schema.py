@@ -0,0 +1,136 @@
+from sqlalchemy import inspect, literal, select, update, text
+from backend.app import db
+from backend.app.utils.dates import to_local_day, DEFAULT_TIMEZONE
+
+def _column_ddl(column, dialect):
+    """Render an ``ADD COLUMN`` clause for a model column missing from the database."""
+    ddl = f'{column.name} {column.type.compile(dialect=dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        # Let the dialect spell the value: Postgres rejects 0/1 as a BOOLEAN default
+        value = literal(default, type_=column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' DEFAULT {value}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    return ddl
+
+def add_missing_columns():
+    """Add columns declared on the models but absent from existing tables."""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, conn.dialect)}'))
+                    added.append(f'{table.name}.{column.name}')
+    return added
+
+def add_missing_indexes():
+    """Create indexes declared on the models but absent from existing tables."""
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        present = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+def backfill_local_days(user_id=None, batch_size=1000):
+    """Fill ``local_day`` on workouts and food entries logged before it existed."""
+    from backend.app.models.user import User
+    from backend.app.models.workout import Workout
+    from backend.app.models.food import FoodEntry
+    from backend.app.models.archive import ArchivedWorkout, ArchivedFoodEntry
+    
+    counts = {}
+    for model in (Workout, FoodEntry, ArchivedWorkout, ArchivedFoodEntry):
+        total = 0
+        pending = select(model.id, model.logged_at, User.timezone).join(User, User.id == model.user_id).where(
+            model.local_day.is_(None), model.logged_at.isnot(None)
+        )
+        if user_id is not None:
+            pending = pending.where(model.user_id == user_id)
+        while True:
+            rows = db.session.execute(pending.limit(batch_size)).all()
+            if not rows:
+                break
+            db.session.execute(update(model), [
+                {'id': row.id, 'local_day': to_local_day(row.logged_at, row.timezone or DEFAULT_TIMEZONE)}
+                for row in rows
+            ])
+            db.session.commit()
+            total += len(rows)
+        counts[model.__tablename__] = total
+    return counts
+
+def restamp_local_days(user_id, batch_size=1000):
+    """Re-bucket a user's history after their timezone changed (the ``restamp_local_days`` job).
+    
+    Each row's day is recomputed from ``logged_at`` in the new timezone and
+    written in place, only where it moved. Nothing is committed until the
+    daily rollups, which are keyed by local day, have been rebuilt from the
+    restamped rows, so rows and rollups move together and a failure leaves
+    both on the old days. The rebuild also redraws the activity calendar and
+    re-derives the streaks, whose bits were set on the old days. Tracked
+    goals are then re-totalled, since their windows are local days.
+    Returns the number of rows moved per table.
+    """
+    from backend.app.models.user import User
+    from backend.app.models.workout import Workout
+    from backend.app.models.food import FoodEntry
+    from backend.app.models.archive import ArchivedWorkout, ArchivedFoodEntry
+    from backend.app.utils.rollups import rebuild_daily_stats
+    from backend.app.utils import goal_progress
+    
+    user = db.session.get(User, user_id)
+    if user is None:
+        return {}
+    tz_name = user.timezone or DEFAULT_TIMEZONE
+    
+    counts = {}
+    for model in (Workout, FoodEntry, ArchivedWorkout, ArchivedFoodEntry):
+        moved, last_id = 0, 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.logged_at, model.local_day)
+                .where(model.user_id == user_id, model.id > last_id, model.logged_at.isnot(None))
+                .order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            changes = []
+            for row in rows:
+                day = to_local_day(row.logged_at, tz_name)
+                if day != row.local_day:
+                    changes.append({'id': row.id, 'local_day': day})
+            if changes:
+                db.session.execute(update(model), changes)
+                moved += len(changes)
+        counts[model.__tablename__] = moved
+    
+    rebuild_daily_stats(user_id)  # commits the restamped rows with their rollups
+    goal_progress.reseed(user_id)
+    db.session.commit()
+    return counts
+
+def sync_schema():
+    """Create missing tables, columns and indexes (cheap enough to run at startup)."""
+    db.create_all()
+    return {
+        'columns': add_missing_columns(),
+        'indexes': add_missing_indexes(),
+    }
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models. Safe to re-run."""
+    result = sync_schema()
+    result['backfilled'] = backfill_local_days()
+    return result
@@ -0,0 +1,60 @@
+"""Column-only JSON for API endpoints.
+
+Building ORM objects just to call ``to_dict()`` costs an identity-map
+entry and attribute instrumentation per row, and for ``FoodEntry`` and
+``UserBadge`` a lazy load of the related row too. Models that list many
+rows also declare ``json_columns()``, which gives the same keys as
+``to_dict()`` mapped to columns. select_json() turns that into one SELECT,
+with the joins it needs, that yields plain row mappings. dumps() encodes
+them with orjson when it is installed (dates and datetimes natively),
+else with the standard library.
+
+benchmarks/bench_serializers.py checks that both paths give the same
+JSON and compares their speed.
+"""
+import json
+from datetime import date, datetime
+from flask import Response
+from sqlalchemy import inspect, select
+from backend.app import db
+
+try:
+    import orjson  # optional; several times faster than json.dumps
+except ImportError:
+    orjson = None
+
+def select_json(model):
+    """SELECT of ``model.json_columns()`` labelled with their to_dict() keys.
+
+    Columns of related models are joined through the model's relationships.
+    """
+    columns = model.json_columns()
+    query = select(*[column.label(key) for key, column in columns.items()]).select_from(model)
+    joined = {model}
+    for column in columns.values():
+        entity = column.class_
+        if entity in joined:
+            continue
+        relationship = next(r for r in inspect(model).relationships if r.mapper.class_ is entity)
+        query = query.join(getattr(model, relationship.key))
+        joined.add(entity)
+    return query
+
+def rows(query):
+    """Run a select_json() query; returns its rows as dicts."""
+    return [dict(row) for row in db.session.execute(query).mappings()]
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def dumps(payload):
+    """Encode ``payload`` as JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status=200):
+    """A JSON response encoded with dumps()."""
+    return Response(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,197 @@
+"""Per-user activity calendar and the streaks derived from it.
+
+Each user has one ``ActivityMonth`` row per month they were active in. Its
+``days`` bitmask has bit ``n`` set when local day ``n + 1`` had at least
+one workout. The workout hooks set and clear bits with in-place UPDATEs
+(``days = days | bit``), the same way the daily rollups are kept, so
+backdated, edited and deleted workouts all land in the calendar.
+
+Streaks are read off the bitmaps around the days that changed, so the
+cost grows with the length of the runs touched, never with workout
+history. The current streak walks back from today. A changed day's run
+is found by walking out from it in both directions. Only clearing a day
+out of what may have been the longest run reads every month row, to find
+the next-longest run.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import delete, insert, select, update
+from backend.app import db
+from backend.app.models.stats import ActivityMonth, DailyUserStats
+from backend.app.models.gamification import GamificationState
+from backend.app.models.user import User
+from backend.app.utils import leaderboard
+from backend.app.utils.dates import local_today
+
+ONE_DAY = timedelta(days=1)
+
+def _month(day):
+    return day.replace(day=1)
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+def _bit(day):
+    return 1 << (day.day - 1)
+
+class Calendar:
+    """A user's active days, read from their bitmaps a calendar year at a time."""
+
+    def __init__(self, user_id, months=None):
+        self.user_id = user_id
+        # Passing ``months`` ({month: bits}) means "this is everything", no queries
+        self._months = dict(months or {})
+        self._complete = months is not None
+        self._years = set()
+
+    def _load(self, year):
+        self._months.update(db.session.execute(
+            select(ActivityMonth.month, ActivityMonth.days).where(
+                ActivityMonth.user_id == self.user_id,
+                ActivityMonth.month >= date(year, 1, 1), ActivityMonth.month < date(year + 1, 1, 1),
+            )
+        ).all())
+        self._years.add(year)
+
+    def is_active(self, day):
+        if not self._complete and day.year not in self._years:
+            self._load(day.year)
+        return bool(self._months.get(_month(day), 0) & _bit(day))
+
+    def run(self, day, step):
+        """How many consecutive active days there are from ``day`` on, moving by ``step``."""
+        count = 0
+        while self.is_active(day):
+            count += 1
+            day += step
+        return count
+
+    def current_streak(self, today):
+        """The run ending today, or yesterday while today has no workout yet."""
+        end = today if self.is_active(today) else today - ONE_DAY
+        return self.run(end, -ONE_DAY)
+
+def _longest(months):
+    """Longest run of active days in ``(month, bits)`` pairs sorted by month."""
+    longest = run = 0
+    expected = None
+    for month, bits in months:
+        if month != expected:
+            run = 0
+        expected = _next_month(month)
+        for n in range((expected - month).days):
+            run = run + 1 if bits >> n & 1 else 0
+            longest = max(longest, run)
+    return longest
+
+def _last_active(months):
+    """Latest active day in ``(month, bits)`` pairs sorted by month, or ``None``."""
+    for month, bits in reversed(months):
+        if bits:
+            return month + timedelta(days=bits.bit_length() - 1)
+    return None
+
+def _all_months(user_id):
+    return db.session.execute(
+        select(ActivityMonth.month, ActivityMonth.days)
+        .where(ActivityMonth.user_id == user_id).order_by(ActivityMonth.month)
+    ).all()
+
+def mark(user_id, added=(), removed=()):
+    """Set the bits for days that gained a workout and clear those that lost their last one.
+
+    Call after the daily rollups were updated: a ``removed`` day stays set
+    while its rollup row still counts a workout. Returns the days cleared.
+    Nothing is committed here.
+    """
+    added = {day for day in added if day is not None}
+    removed = {day for day in removed if day is not None} - added
+    if removed:
+        still_active = set(db.session.scalars(
+            select(DailyUserStats.day).where(
+                DailyUserStats.user_id == user_id, DailyUserStats.day.in_(removed),
+                DailyUserStats.workout_count > 0,
+            )
+        ))
+        removed -= still_active
+
+    for day in added:
+        result = db.session.execute(
+            update(ActivityMonth)
+            .where(ActivityMonth.user_id == user_id, ActivityMonth.month == _month(day))
+            .values(days=ActivityMonth.days.bitwise_or(_bit(day)))
+        )
+        if result.rowcount == 0:
+            db.session.add(ActivityMonth(user_id=user_id, month=_month(day), days=_bit(day)))
+            db.session.flush()
+    for day in removed:
+        db.session.execute(
+            update(ActivityMonth)
+            .where(ActivityMonth.user_id == user_id, ActivityMonth.month == _month(day))
+            .values(days=ActivityMonth.days.bitwise_and(~_bit(day)))
+        )
+    return sorted(removed)
+
+def refresh(state, days=()):
+    """Re-derive a GamificationState's streaks after workouts on ``days`` changed."""
+    calendar = Calendar(state.user_id)
+    current = calendar.current_streak(db.session.get(User, state.user_id).local_today())
+
+    longest = state.longest_streak or 0
+    split = False
+    days = {day for day in days if day is not None}
+    for day in days:
+        run = calendar.run(day - ONE_DAY, -ONE_DAY) + 1 + calendar.run(day + ONE_DAY, ONE_DAY)
+        if calendar.is_active(day):
+            longest = max(longest, run)
+        elif run >= longest:
+            split = True  # the day was cleared out of what may have been the longest run
+
+    last = state.last_activity_date
+    if split or last is None or not calendar.is_active(last):
+        months = _all_months(state.user_id)
+        if split:
+            longest = _longest(months)
+        last = _last_active(months)
+    else:
+        last = max([last] + [day for day in days if calendar.is_active(day)])
+
+    state.current_streak = current
+    state.longest_streak = max(longest, current)
+    state.last_activity_date = last
+
+def rebuild(user_id=None):
+    """Recompute the bitmaps from the daily rollups, then every streak from them.
+
+    Run after the rollups were rebuilt (rebuild-stats, a timezone change).
+    Commits; returns the number of month rows written.
+    """
+    months = defaultdict(lambda: defaultdict(int))  # user_id -> month -> bits
+    active = select(DailyUserStats.user_id, DailyUserStats.day).where(DailyUserStats.workout_count > 0)
+    stale = delete(ActivityMonth)
+    states = GamificationState.query
+    zones = select(User.id, User.timezone)
+    if user_id is not None:
+        active = active.where(DailyUserStats.user_id == user_id)
+        stale = stale.where(ActivityMonth.user_id == user_id)
+        states = states.filter_by(user_id=user_id)
+        zones = zones.where(User.id == user_id)
+    for uid, day in db.session.execute(active):
+        months[uid][_month(day)] |= _bit(day)
+
+    db.session.execute(stale)
+    rows = [{'user_id': uid, 'month': month, 'days': bits}
+            for uid, by_month in months.items() for month, bits in by_month.items()]
+    if rows:
+        db.session.execute(insert(ActivityMonth), rows)
+
+    timezones = dict(db.session.execute(zones).all())
+    for state in states.all():
+        by_month = sorted(months.get(state.user_id, {}).items())
+        current = Calendar(state.user_id, by_month).current_streak(local_today(timezones.get(state.user_id)))
+        state.current_streak = current
+        state.longest_streak = max(_longest(by_month), current)
+        state.last_activity_date = _last_active(by_month)
+        leaderboard.score_changed('streak', state.user_id, current)  # as update_streak() does
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,110 @@
+"""Per-worker cache of the logged-in user and their gamification state.
+
+Flask-Login calls load_user() on every authenticated request. For reads
+(GET/HEAD) this serves the User and GamificationState from plain column
+dicts cached for ``USER_CACHE_TTL`` seconds. They are re-attached to the
+session as clean persistent objects, with no SQL. Writes always load fresh
+rows, so read-modify-write code such as GamificationState.add_xp never
+starts from a cached value.
+
+An entry is only used while the user's view-cache version (see
+view_cache.py) is the one it was stored under. Any committed change to a
+User or GamificationState row bumps that version, whether it is a profile
+edit, a password change or an XP/streak update. Versions live in the
+shared cache (view_cache.check_backend() refuses a per-process one outside
+development and testing), so a commit in any gunicorn worker or in the job
+worker makes every worker drop its copy on its next request. The TTL is a
+backstop for a bump that never reaches the cache, for example while Redis
+is unreachable.
+
+The hit counters are served at ``/health/cache`` to logged-in users.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from backend.app import db
+from backend.app.models.user import User
+from backend.app.models.gamification import GamificationState
+from backend.app.utils import view_cache
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # user_id -> (expires_at, version, user columns, state columns or None)
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def _columns(obj):
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+
+def _attach(model, columns):
+    """Re-create a row object from its columns as if it had just been loaded."""
+    existing = db.session.identity_map.get(identity_key(model, columns['id']))
+    if existing is not None:
+        return existing
+    obj = model(**columns)
+    make_transient_to_detached(obj)
+    db.session.add(obj)
+    return obj
+
+def _query(user_id):
+    return User.query.options(db.joinedload(User.gamification_state)).get(user_id)
+
+def load_user(user_id):
+    """The User for ``user_id`` (with gamification_state populated), or ``None``."""
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if not ttl or request.method not in ('GET', 'HEAD'):
+        return _query(user_id)
+
+    version = view_cache.user_version(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        fresh = entry is not None and entry[0] > now and entry[1] == version
+        _stats['hits' if fresh else 'misses'] += 1
+        if fresh:
+            _entries.move_to_end(user_id)
+
+    if fresh:
+        _, _, user_columns, state_columns = entry
+        user = _attach(User, user_columns)
+        state = _attach(GamificationState, state_columns) if state_columns else None
+        set_committed_value(user, 'gamification_state', state)
+        if state is not None:
+            set_committed_value(state, 'user', user)
+        return user
+
+    user = _query(user_id)
+    if user is not None:
+        state = user.gamification_state
+        with _lock:
+            _entries[user_id] = (now + ttl, version, _columns(user), _columns(state) if state else None)
+            _entries.move_to_end(user_id)
+            while len(_entries) > current_app.config.get('USER_CACHE_SIZE', 10000):
+                _entries.popitem(last=False)
+    return user
+
+def invalidate(session, user_id):
+    """Drop a user's cached rows here and, once ``session`` commits, everywhere."""
+    with _lock:
+        _entries.pop(user_id, None)
+        _stats['invalidations'] += 1
+    view_cache.invalidate_user(session, user_id)
+
+def stats():
+    """Hit/miss counters for this worker."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return dict(_stats, size=len(_entries), hit_rate=round(_stats['hits'] / lookups, 4) if lookups else None)
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_changed(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, User):
+            invalidate(session, obj.id)
+        elif isinstance(obj, GamificationState):
+            invalidate(session, obj.user_id)
@@ -0,0 +1,83 @@
+"""Per-user view-model caching on top of the shared Flask-Caching instance.
+
+Every cached entry is keyed by the user's current *version*. Writes don't
+delete entries; they move the user to a new version once the transaction
+commits, so a page built from pre-commit data can never be served after it.
+
+That only holds if every process sees the same versions. A write handled
+by one gunicorn worker, or by the job worker, must reach the others, so
+check_backend() refuses a per-process cache backend outside development
+and testing unless a single process does everything.
+"""
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.app import cache
+from backend.app.utils import metrics
+
+PENDING_KEY = 'view_cache_pending_users'
+PROCESS_LOCAL_BACKENDS = {'SimpleCache', 'simple', 'flask_caching.backends.SimpleCache',
+                          'flask_caching.backends.simplecache.SimpleCache'}
+
+def check_backend(config):
+    """Raise if the configured cache can't carry versions between the app's processes."""
+    if config.get('DEBUG') or config.get('TESTING') or config.get('CACHE_TYPE') not in PROCESS_LOCAL_BACKENDS:
+        return
+    if config.get('WEB_CONCURRENCY', 1) > 1 or not config.get('JOBS_RUN_INLINE'):
+        raise RuntimeError(
+            'CACHE_TYPE=SimpleCache is per-process, so writes would not invalidate cached pages in other '
+            'workers or from the job worker. Use FileSystemCache (one host) or RedisCache with CACHE_REDIS_URL.'
+        )
+
+def _version_key(user_id):
+    return f'user-version:{user_id}'
+
+def _new_version():
+    # Time-based rather than a counter, so an evicted version key can never
+    # come back as a number that older entries were stored under.
+    return time.time_ns()
+
+def user_version(user_id):
+    """Current cache version for a user."""
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = _new_version()
+        cache.set(_version_key(user_id), version, timeout=0)
+    return version
+
+def bump_user(user_id):
+    """Move a user to a fresh version immediately."""
+    cache.set(_version_key(user_id), _new_version(), timeout=0)
+
+def invalidate_user(session, user_id):
+    """Invalidate a user's cached views once ``session`` commits."""
+    session.info.setdefault(PENDING_KEY, set()).add(user_id)
+
+def cached_view(name, user_id, builder, timeout=None):
+    """Return the cached view model ``name`` for a user, building it on a miss."""
+    key = f'view:{name}:{user_id}:{user_version(user_id)}'
+    value = cache.get(key)
+    metrics.cache_lookup('view', value is not None)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+def cached_global(name, builder, timeout=None):
+    """Cache a view model shared by every user (expires by timeout only)."""
+    key = f'view:{name}'
+    value = cache.get(key)
+    metrics.cache_lookup('view', value is not None)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        bump_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,183 @@
+"""Streaming bulk import of workouts from CSV or NDJSON exports.
+
+Files are read a line at a time and processed in chunks: each chunk is
+validated, deduplicated against the user's existing (logged_at,
+activity_name) pairs, hot or archived, costed with the MET formula and written with one
+executemany INSERT. XP, the streak and badges are applied once per chunk,
+in the chunk's own transaction, so every committed row has been awarded
+and re-running a failed import simply skips the rows that already made
+it in. Personal records are rebuilt once at the end, also after a re-run
+that found only duplicates.
+"""
+import csv
+import json
+import math
+from datetime import datetime, timezone
+from itertools import islice
+from types import SimpleNamespace
+from sqlalchemy import insert, select, union
+from backend.app import db
+from backend.app.models.workout import Workout, estimate_calories
+from backend.app.models.archive import ArchivedWorkout
+from backend.app.models.gamification import XP_PER_ACTIVITY_MINUTE
+from backend.app.utils import badges, hooks, records, rollups
+from backend.app.utils.dates import to_local_day
+
+FORMATS = ('csv', 'ndjson')
+INTENSITIES = ('light', 'moderate', 'vigorous')
+
+def detect_format(filename):
+    """Guess the format from a file name; defaults to CSV."""
+    name = (filename or '').lower()
+    return 'ndjson' if name.endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+def iter_records(stream, fmt):
+    """Yield raw dicts from a text stream without reading it all into memory."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+def _parse_datetime(value):
+    moment = datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def _optional(value, cast):
+    if value in (None, ''):
+        return None
+    return cast(value)
+
+def _finite(value):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError('not a finite number')
+    return number
+
+def parse_record(raw):
+    """Validate one raw record into Workout column values; raises ValueError."""
+    if not isinstance(raw, dict):
+        raise ValueError('not an object')
+
+    activity_name = str(raw.get('activity_name') or '').strip()
+    exercise_type = str(raw.get('exercise_type') or '').strip()
+    duration = _optional(raw.get('duration_minutes'), lambda v: int(_finite(v)))
+    logged_at = raw.get('logged_at') or raw.get('date')
+    if not activity_name or not exercise_type or not duration or duration <= 0 or not logged_at:
+        raise ValueError('missing required field')
+
+    intensity = str(raw.get('intensity') or 'moderate').strip().lower()
+    if intensity not in INTENSITIES:
+        intensity = 'moderate'
+
+    return {
+        'exercise_type': exercise_type,
+        'activity_name': activity_name,
+        'duration_minutes': duration,
+        'intensity': intensity,
+        'distance_km': _optional(raw.get('distance_km'), _finite),
+        'heart_rate_avg': _optional(raw.get('heart_rate_avg'), lambda v: int(_finite(v))),
+        'notes': str(raw.get('notes') or '').strip() or None,
+        'logged_at': _parse_datetime(logged_at),
+    }
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _existing_keys(user_id, rows):
+    """(logged_at, activity_name) pairs already stored within the chunk's time span.
+
+    Archived workouts count too, or re-importing an export would bring them
+    back (and award their XP) a second time.
+    """
+    first = min(row['logged_at'] for row in rows)
+    last = max(row['logged_at'] for row in rows)
+    return set(db.session.execute(union(*[
+        select(model.logged_at, model.activity_name).where(
+            model.user_id == user_id, model.logged_at >= first, model.logged_at <= last
+        )
+        for model in (Workout, ArchivedWorkout)
+    ])).tuples())
+
+def import_workouts(user, stream, fmt='csv', batch_size=500, progress=None):
+    """Import workouts for ``user`` from a text stream.
+
+    ``progress`` is called after every chunk with the running totals.
+    Returns ``{'read', 'imported', 'duplicates', 'invalid', 'xp_awarded', 'badges'}``.
+    """
+    totals = {'read': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0, 'badges': []}
+    imported_minutes = 0
+    gamification = user.gamification_state
+
+    for chunk in _chunks(iter_records(stream, fmt), batch_size):
+        totals['read'] += len(chunk)
+
+        rows = []
+        for raw in chunk:
+            try:
+                rows.append(parse_record(raw))
+            except (ValueError, TypeError):
+                totals['invalid'] += 1
+        if not rows:
+            continue
+
+        # Drop rows already in the database or repeated within this chunk
+        seen = _existing_keys(user.id, rows)
+        fresh = []
+        for row in rows:
+            key = (row['logged_at'], row['activity_name'])
+            if key in seen:
+                totals['duplicates'] += 1
+                continue
+            seen.add(key)
+            fresh.append(row)
+        if not fresh:
+            continue
+
+        # Derived columns for the whole chunk, without touching the ORM per row
+        for row in fresh:
+            row['user_id'] = user.id
+            row['local_day'] = to_local_day(row['logged_at'], user.timezone)
+            row['calories_burned'] = estimate_calories(
+                row['activity_name'], row['intensity'], row['duration_minutes'], user.weight_kg
+            )
+
+        db.session.execute(insert(Workout), fresh)
+        hooks.workouts_imported(
+            user.id, [rollups.workout_contribution(SimpleNamespace(**row)) for row in fresh]
+        )
+        # XP, streak and badges for the chunk commit with its rows
+        minutes = sum(row['duration_minutes'] for row in fresh)
+        if gamification:
+            before = badges.snapshot(gamification)
+            gamification.add_xp(minutes * XP_PER_ACTIVITY_MINUTE)
+            gamification.update_streak({row['local_day'] for row in fresh})
+            totals['badges'] += badges.award_crossed(user.id, before, badges.snapshot(gamification))
+        db.session.commit()
+
+        totals['imported'] += len(fresh)
+        imported_minutes += minutes
+        if progress:
+            progress(dict(totals))
+
+    # Duplicates may be rows an interrupted run committed before it got here
+    if totals['imported'] or totals['duplicates']:
+        records.rebuild(user.id)
+        db.session.commit()
+
+    totals['xp_awarded'] = imported_minutes * XP_PER_ACTIVITY_MINUTE if gamification else 0
+    return totals
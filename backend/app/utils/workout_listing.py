@@ -0,0 +1,145 @@
+"""Keyset-paginated, filterable workout listings.
+
+Pages are addressed by an opaque cursor holding the ``(logged_at, id)`` of
+the row at a page edge rather than by page number. The next page is "rows
+strictly older than the cursor", read straight off the
+``(user_id, ..., logged_at)`` indexes, so page 500 costs the same as page 1.
+Neither the rows nor the total do an OFFSET or COUNT(*) per page view. The
+total for a set of filters is cached per user until their next write (see
+view_cache.py).
+
+Archived workouts (see archive.py) are merged into the listing. A page
+only reads the archive table if it reaches back to the user's newest
+archived workout. That moment comes from the archive itself, not from
+``ARCHIVE_AFTER_DAYS``: a manual ``archive-old-data --days N`` or a changed
+setting moves it, and rows kept hot (record holders, heart-rate data,
+pending XP) interleave with archived ones. It is cached per user until
+their next write, which archiving counts as.
+"""
+import base64
+from datetime import date, datetime
+from sqlalchemy import func, select, tuple_
+from backend.app import db
+from backend.app.models.workout import Workout
+from backend.app.models.archive import ArchivedWorkout
+from backend.app.utils import view_cache
+
+EXERCISE_TYPES = ('cardio', 'strength', 'flexibility', 'sports', 'other')
+INTENSITIES = ('light', 'moderate', 'vigorous')
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+def encode_cursor(workout):
+    """Opaque cursor for the position of ``workout`` in the listing."""
+    raw = f'{workout.logged_at.isoformat()}|{workout.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        moment, workout_id = raw.split('|')
+        return datetime.fromisoformat(moment), int(workout_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+def parse_filters(args):
+    """Validated filters from request args; raises ValueError with a user-facing message."""
+    filters = {}
+    exercise_type = args.get('exercise_type') or None
+    if exercise_type:
+        if exercise_type not in EXERCISE_TYPES:
+            raise ValueError('Unknown exercise type')
+        filters['exercise_type'] = exercise_type
+    intensity = args.get('intensity') or None
+    if intensity:
+        if intensity not in INTENSITIES:
+            raise ValueError('Unknown intensity')
+        filters['intensity'] = intensity
+    for name in ('start', 'end'):
+        if args.get(name):
+            try:
+                filters[name] = date.fromisoformat(args[name])
+            except ValueError as exc:
+                raise ValueError(f'{name} must be a YYYY-MM-DD date') from exc
+    return filters
+
+def _filtered(query, model, user_id, filters):
+    query = query.where(model.user_id == user_id)
+    if 'exercise_type' in filters:
+        query = query.where(model.exercise_type == filters['exercise_type'])
+    if 'intensity' in filters:
+        query = query.where(model.intensity == filters['intensity'])
+    if 'start' in filters:
+        query = query.where(model.local_day >= filters['start'])
+    if 'end' in filters:
+        query = query.where(model.local_day <= filters['end'])
+    return query
+
+def count_workouts(user_id, filters):
+    """Total matching workouts (archived included), cached until the user's next write."""
+    key = ','.join(f'{name}={value}' for name, value in sorted(filters.items()))
+    hot = _filtered(select(func.count(Workout.id)), Workout, user_id, filters).scalar_subquery()
+    cold = _filtered(select(func.count(ArchivedWorkout.id)), ArchivedWorkout, user_id, filters).scalar_subquery()
+    return view_cache.cached_view(
+        f'workout_count[{key}]', user_id,
+        lambda: db.session.scalar(select(hot + cold)),
+    )
+
+def _newest_archived(user_id):
+    """logged_at of the user's newest archived workout, or ``None``."""
+    (newest,) = view_cache.cached_view(
+        'newest_archived_workout', user_id,
+        lambda: [db.session.scalar(select(func.max(ArchivedWorkout.logged_at)).where(ArchivedWorkout.user_id == user_id))],
+    )
+    return newest
+
+def _page(model, user_id, filters, after, before, limit):
+    """Up to ``limit`` rows of one table past the cursor, in cursor direction."""
+    position = tuple_(model.logged_at, model.id)
+    query = _filtered(select(model), model, user_id, filters)
+    if before is not None:
+        query = query.where(position > tuple_(*before))
+        query = query.order_by(model.logged_at.asc(), model.id.asc())
+    else:
+        if after is not None:
+            query = query.where(position < tuple_(*after))
+        query = query.order_by(model.logged_at.desc(), model.id.desc())
+    return db.session.execute(query.limit(limit)).scalars().all()
+
+def list_workouts(user_id, filters, after=None, before=None, limit=DEFAULT_LIMIT):
+    """One page of workouts, newest first.
+
+    ``after`` continues past a cursor (older rows), ``before`` goes back
+    (newer rows). Returns ``(workouts, next_cursor, prev_cursor)``, where a
+    cursor is ``None`` when there is nothing more in that direction.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    after = decode_cursor(after) if after is not None else None
+    before = decode_cursor(before) if before is not None else None
+
+    # One extra row tells us whether another page exists
+    rows = _page(Workout, user_id, filters, after, before, limit + 1)
+    newest = _newest_archived(user_id)
+    if newest is None:
+        needs_archive = False
+    elif before is not None:
+        needs_archive = before[0] <= newest
+    else:
+        needs_archive = len(rows) <= limit or rows[-1].logged_at <= newest
+    if needs_archive:
+        rows += _page(ArchivedWorkout, user_id, filters, after, before, limit + 1)
+        rows.sort(key=lambda row: (row.logged_at, row.id), reverse=before is None)
+        rows = rows[:limit + 1]
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    if before is not None:
+        rows.reverse()
+        has_newer, has_older = more, True
+    else:
+        has_newer, has_older = after is not None, more
+
+    next_cursor = encode_cursor(rows[-1]) if rows and has_older else None
+    prev_cursor = encode_cursor(rows[0]) if rows and has_newer else None
+    return rows, next_cursor, prev_cursor
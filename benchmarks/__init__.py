@@ -0,0 +1 @@
+"""Performance benchmarks. Run a module directly, e.g. ``python -m benchmarks.bench_food_search``."""
@@ -0,0 +1,79 @@
+"""Compare the old per-badge check against the threshold index.
+
+Usage: python -m benchmarks.bench_badges [--badges 5000]
+"""
+import argparse
+import random
+import time
+from sqlalchemy import event, insert
+from backend.app import create_app, db
+from backend.app.models.user import User
+from backend.app.models.gamification import GamificationState, Badge, UserBadge
+from backend.app.utils import badges
+
+def make_badges(count, seed=42):
+    rng = random.Random(seed)
+    ceilings = {'streak': 365, 'total_xp': 500000, 'level': 100}
+    for i in range(count):
+        condition_type = rng.choice(list(ceilings))
+        yield {'name': f'{condition_type} badge #{i}', 'description': 'benchmark badge',
+               'condition_type': condition_type, 'condition_value': rng.randint(1, ceilings[condition_type])}
+
+def legacy_check(user_id, gamification):
+    """The pre-index check_and_award_badges: one UserBadge query per badge."""
+    awarded = []
+    for badge in Badge.query.all():
+        if UserBadge.query.filter_by(user_id=user_id, badge_id=badge.id).first():
+            continue
+        value = {'streak': gamification.current_streak, 'total_xp': gamification.total_xp,
+                 'level': gamification.current_level}.get(badge.condition_type)
+        if value is not None and value >= badge.condition_value:
+            awarded.append(badge)
+    return awarded
+
+def timed(fn, repeat):
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    return elapsed, len(statements) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--badges', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        db.session.execute(insert(Badge), list(make_badges(args.badges)))
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('benchmark')
+        db.session.add(user)
+        db.session.flush()
+        gamification = GamificationState(user_id=user.id, total_xp=40000, current_level=8, current_streak=20)
+        db.session.add(gamification)
+        db.session.commit()
+
+        # A typical workout: +150 XP, no level change, streak +1
+        before = badges.snapshot(gamification)
+        after = dict(before, total_xp=before['total_xp'] + 150, streak=before['streak'] + 1)
+        badges.get_thresholds()
+
+        print(f'{args.badges} badges\n')
+        print(f'{"check":<28}{"ms":>10}{"queries":>10}')
+        legacy_ms, legacy_queries = timed(lambda: legacy_check(user.id, gamification), args.repeat)
+        print(f'{"per-badge queries":<28}{legacy_ms:>10.2f}{legacy_queries:>10.0f}')
+
+        def crossed():
+            badges.award_crossed(user.id, before, after)
+            db.session.rollback()
+        index_ms, index_queries = timed(crossed, args.repeat * 20)
+        print(f'{"threshold index":<28}{index_ms:>10.2f}{index_queries:>10.0f}')
+
+if __name__ == '__main__':
+    main()
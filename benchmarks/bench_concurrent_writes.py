@@ -0,0 +1,95 @@
+"""Concurrent workout logging against one SQLite file, old settings vs the engine profile.
+
+Usage: python -m benchmarks.bench_concurrent_writes [--processes 4] [--writes 50]
+
+Each process stands in for a gunicorn worker. It logs in as its own user
+and POSTs /activity/log repeatedly. That is the full write path: workout,
+rollups and the job queue, with the job run inline. "before" is SQLite's
+default rollback journal with synchronous=FULL. "after" is the WAL profile
+from utils/db_engine.py.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+PROFILES = {
+    'before': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'after': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+
+def _writer(index, writes, start_at, results):
+    from backend.app import create_app
+    from benchmarks.synthetic import PASSWORD
+    app = create_app('development')
+    app.config.update(WTF_CSRF_ENABLED=False, SLOW_REQUEST_MS=0)
+    client = app.test_client()
+    client.post('/auth/login', base_url='https://localhost',
+                data={'username': f'bench{index}', 'password': PASSWORD})
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    ok = failed = 0
+    started = time.perf_counter()
+    for _ in range(writes):
+        try:
+            response = client.post('/activity/log', base_url='https://localhost', data={
+                'exercise_type': 'cardio', 'activity_name': 'running', 'duration_minutes': '30',
+            })
+            ok += response.status_code == 302
+            failed += response.status_code != 302
+        except Exception:  # "database is locked" surfaces as an OperationalError
+            failed += 1
+    results.put((ok, failed, time.perf_counter() - started))
+
+def _setup(users):
+    from backend.app import create_app
+    from benchmarks.synthetic import generate
+    app = create_app('development')
+    with app.app_context():
+        generate(users=users, years=0.1, foods=50, badges=20)
+
+def run(profile, processes, writes, parent=None):
+    # Config is read from the environment at import, so everything that
+    # touches the database runs in a fresh process
+    directory = tempfile.mkdtemp(prefix='bench-writes-', dir=parent)
+    os.environ['DEV_DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "bench.db")}'
+    os.environ.update(PROFILES[profile])
+
+    context = multiprocessing.get_context('spawn')
+    setup = context.Process(target=_setup, args=(processes,))
+    setup.start()
+    setup.join()
+    if setup.exitcode:
+        raise SystemExit('Generating the benchmark database failed')
+
+    results = context.Queue()
+    start_at = time.time() + 3  # let every process finish starting up first
+    workers = [context.Process(target=_writer, args=(i, writes, start_at, results)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=600) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    ok = sum(outcome[0] for outcome in outcomes)
+    failed = sum(outcome[1] for outcome in outcomes)
+    elapsed = max(outcome[2] for outcome in outcomes)
+    return ok, failed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=50, help='Workouts logged per process.')
+    parser.add_argument('--dir', default=None, help='Where to put the database; use a real disk, not tmpfs.')
+    args = parser.parse_args()
+
+    print(f'{args.processes} processes x {args.writes} workouts\n')
+    print(f'{"profile":<10}{"ok":>6}{"failed":>8}{"seconds":>10}{"writes/s":>10}')
+    for profile in PROFILES:
+        ok, failed, elapsed = run(profile, args.processes, args.writes, args.dir)
+        print(f'{profile:<10}{ok:>6}{failed:>8}{elapsed:>10.2f}{ok / elapsed:>10.1f}')
+
+if __name__ == '__main__':
+    main()
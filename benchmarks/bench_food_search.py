@@ -0,0 +1,56 @@
+"""Compare the trigram food index against the old ILIKE '%q%' query.
+
+Usage: python -m benchmarks.bench_food_search [--foods 100000]
+"""
+import argparse
+import random
+import time
+from sqlalchemy import insert
+from backend.app import create_app, db
+from backend.app.models.food import Food
+from backend.app.utils.food_search import FoodSearchIndex
+
+ADJECTIVES = ['grilled', 'roasted', 'raw', 'baked', 'fried', 'steamed', 'smoked', 'organic', 'low fat', 'spicy']
+BASES = ['chicken', 'salmon', 'rice', 'broccoli', 'apple', 'banana', 'almond', 'yogurt', 'pasta', 'bread',
+         'beef', 'tofu', 'lentil', 'oat', 'potato', 'spinach', 'cheese', 'egg', 'turkey', 'quinoa']
+SUFFIXES = ['breast', 'fillet', 'salad', 'soup', 'bowl', 'wrap', 'bar', 'shake', 'curry', 'stew']
+QUERIES = ['ch', 'chick', 'chiken', 'salmon fil', 'grilled tofu', 'quinoa bowl', 'banan', 'xyz']
+
+def make_foods(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(BASES)} {rng.choice(SUFFIXES)} #{i}'
+        yield {'name': name, 'calories_per_100g': rng.uniform(20, 600),
+               'protein_g': rng.uniform(0, 40), 'fat_g': rng.uniform(0, 50), 'carbs_g': rng.uniform(0, 80)}
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--foods', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        db.session.execute(insert(Food), list(make_foods(args.foods)))
+        db.session.commit()
+
+        index = FoodSearchIndex()
+        build_ms = timed(index.refresh, 1)
+        print(f'{args.foods} foods, index built in {build_ms:.0f} ms\n')
+        print(f'{"query":<14}{"ILIKE ms":>10}{"index ms":>10}{"speedup":>9}  top index hit')
+
+        for query in QUERIES:
+            ilike_ms = timed(lambda: Food.query.filter(Food.name.ilike(f'%{query}%')).limit(10).all(), args.repeat)
+            index_ms = timed(lambda: index.search(query, limit=10), args.repeat)
+            hits = index.search(query, limit=1)
+            top = hits[0]['name'] if hits else '-'
+            print(f'{query:<14}{ilike_ms:>10.3f}{index_ms:>10.3f}{ilike_ms / index_ms:>8.0f}x  {top}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Compare ORM to_dict() JSON with the column-only path in utils/serializers.py.
+
+Usage: python -m benchmarks.bench_serializers [--rows 10000] [--repeat 5]
+
+Serializes one user's food entries, the worst case for the ORM path,
+because FoodEntry.to_dict() lazy-loads its Food. Each variant also
+reports its SQL statement count. The script first checks that every
+variant produces the same JSON.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert
+from backend.app import create_app, db
+from backend.app.models.user import User
+from backend.app.models.food import Food, FoodEntry
+from backend.app.utils import serializers
+from benchmarks.bench_food_search import make_foods
+
+def _setup(rows, foods=500, seed=7):
+    rng = random.Random(seed)
+    user = User(username='serializer', email='serializer@example.com')
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.execute(insert(Food), list(make_foods(foods)))
+    db.session.commit()
+    start = datetime(2024, 1, 1)
+    db.session.execute(insert(FoodEntry), [
+        {'user_id': user.id, 'food_id': rng.randint(1, foods), 'quantity_grams': rng.uniform(20, 400),
+         'meal_type': rng.choice(['breakfast', 'lunch', 'dinner', 'snack']), 'calories': rng.uniform(20, 900),
+         'protein_g': rng.uniform(0, 40), 'fat_g': rng.uniform(0, 40), 'carbs_g': rng.uniform(0, 90),
+         'logged_at': start + timedelta(minutes=17 * i), 'local_day': (start + timedelta(minutes=17 * i)).date()}
+        for i in range(rows)
+    ])
+    db.session.commit()
+    return user.id
+
+def _variants(app, user_id):
+    def orm_lazy():
+        entries = FoodEntry.query.filter_by(user_id=user_id).order_by(FoodEntry.id).all()
+        return app.json.dumps([entry.to_dict() for entry in entries])
+
+    def orm_joined():
+        entries = FoodEntry.query.options(db.joinedload(FoodEntry.food)).filter_by(user_id=user_id) \
+            .order_by(FoodEntry.id).all()
+        return app.json.dumps([entry.to_dict() for entry in entries])
+
+    def columns(encoder):
+        def run():
+            query = serializers.select_json(FoodEntry).where(FoodEntry.user_id == user_id).order_by(FoodEntry.id)
+            return encoder(serializers.rows(query))
+        return run
+
+    stdlib = lambda payload: json.dumps(payload, default=serializers._default)
+    variants = {
+        'ORM to_dict (lazy Food)': orm_lazy,
+        'ORM to_dict (joinedload)': orm_joined,
+        'columns + json': columns(stdlib),
+    }
+    if serializers.orjson is not None:
+        variants['columns + orjson'] = columns(serializers.orjson.dumps)
+    return variants
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+        user_id = _setup(args.rows)
+        variants = _variants(app, user_id)
+
+        outputs = {name: json.loads(fn()) for name, fn in variants.items()}
+        reference = next(iter(outputs.values()))
+        assert all(output == reference for output in outputs.values()), 'variants disagree'
+        print(f'{args.rows} food entries, {len(reference[0])} keys each; all variants give the same JSON\n')
+
+        print(f'{"variant":<28}{"median ms":>10}{"SQL":>6}{"speedup":>9}')
+        baseline = None
+        for name, fn in variants.items():
+            times = []
+            for _ in range(args.repeat):
+                db.session.expunge_all()  # no warm identity map between runs
+                del statements[:]
+                started = time.perf_counter()
+                fn()
+                times.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(times)
+            baseline = baseline or median
+            print(f'{name:<28}{median:>10.1f}{len(statements):>6}{baseline / median:>8.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Time-to-first-request for a fresh worker, with and without the startup schema sync.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--gunicorn] [--workers 4]
+
+The default mode starts a new Python process per run. Each one imports
+the app, calls create_app() and serves one request through the test
+client, and it reports the time each step took. "sync" is the old boot,
+which checks every table, column and index on each start. "no-sync" is
+SCHEMA_SYNC_ON_STARTUP=0, where `flask init-db` has already run.
+
+With --gunicorn, gunicorn.conf.py is started for real with --workers
+processes, and the time until the first HTTP response is measured. This
+is run with and without preload_app.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    'sync': {'SCHEMA_SYNC_ON_STARTUP': '1'},
+    'no-sync': {'SCHEMA_SYNC_ON_STARTUP': '0'},
+}
+
+GUNICORN_PROFILES = {
+    'sync, no preload': {'SCHEMA_SYNC_ON_STARTUP': '1', 'GUNICORN_PRELOAD': '0'},
+    'no-sync, preload': {'SCHEMA_SYNC_ON_STARTUP': '0', 'GUNICORN_PRELOAD': '1'},
+}
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+app = create_app('development')
+created = time.perf_counter()
+response = app.test_client().get('/auth/login')
+assert response.status_code == 200, response.status_code
+served = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (created - imported) * 1000,
+                  'first_request_ms': (served - created) * 1000, 'total_ms': (served - started) * 1000}))
+'''
+
+def _env(database_url, overrides):
+    return dict(os.environ, DEV_DATABASE_URL=database_url, FLASK_ENV='development', FLASK_APP='run.py',
+                PYTHONPATH=ROOT, **overrides)
+
+def _init_db(database_url):
+    subprocess.run([sys.executable, '-m', 'flask', 'init-db'], cwd=ROOT, check=True,
+                   env=_env(database_url, PROFILES['sync']), stdout=subprocess.DEVNULL)
+
+def run_process(database_url, overrides, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, check=True, capture_output=True, text=True,
+                                env=_env(database_url, overrides)).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: round(statistics.median(sample[key] for sample in samples), 1) for key in samples[0]}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def run_gunicorn(database_url, overrides, runs, workers):
+    samples = []
+    for _ in range(runs):
+        port = _free_port()
+        env = _env(database_url, dict(overrides, WEB_CONCURRENCY=str(workers), PORT=str(port)))
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                                  cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    urllib.request.urlopen(f'http://127.0.0.1:{port}/auth/login', timeout=5).read()
+                    break
+                except (urllib.error.URLError, ConnectionError):
+                    if server.poll() is not None:
+                        raise RuntimeError('gunicorn exited during startup')
+                    time.sleep(0.005)
+            samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            server.terminate()
+            server.wait()
+    return {'first_response_ms': round(statistics.median(samples), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true', help='Start real gunicorn servers instead.')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        _init_db(database_url)
+        if args.gunicorn:
+            for name, overrides in GUNICORN_PROFILES.items():
+                print(f'{name:>18}: {run_gunicorn(database_url, overrides, args.runs, args.workers)}')
+        else:
+            for name, overrides in PROFILES.items():
+                print(f'{name:>8}: {run_process(database_url, overrides, args.runs)}')
+
+if __name__ == '__main__':
+    main()
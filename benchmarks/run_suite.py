@@ -0,0 +1,175 @@
+"""Time the hot paths against synthetic data at several sizes.
+
+Usage: python -m benchmarks.run_suite [--sizes 5x1,25x1,50x2] [--repeat 20]
+                                      [--output report.json] [--compare old.json]
+
+Each size is ``<users>x<years>``, generated into a fresh in-memory SQLite
+database (see synthetic.py). Every case is measured cold (caches cleared
+before each call) and warm, recording latency percentiles and the number of
+SQL statements per call. The JSON report carries the commit and row counts
+so runs can be diffed with ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+import flask
+import sqlalchemy
+from sqlalchemy import event
+from backend.app import cache, create_app, db
+from benchmarks.synthetic import PASSWORD, generate
+
+BASE_URL = 'https://localhost'
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def measure(engine, fn, repeat, cold):
+    """Call ``fn`` ``repeat`` times; returns latency percentiles (ms) and SQL statements per call."""
+    statements = []
+    listener = lambda *args: statements.append(1)
+    samples = []
+    if not cold:
+        fn()  # fill caches
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(_percentile(samples, 0.95), 3),
+        'max_ms': round(max(samples), 3),
+        'statements': round(len(statements) / repeat, 1),
+    }
+
+def _cases(app, client, user_id):
+    from backend.app.models.user import User
+    from backend.app.routes.gamification import check_and_award_badges
+
+    def page(url):
+        def call():
+            response = client.get(url, base_url=BASE_URL)
+            assert response.status_code == 200, (url, response.status_code)
+        return call
+
+    def log_activity():
+        response = client.post('/activity/log', base_url=BASE_URL, data={
+            'exercise_type': 'cardio', 'activity_name': 'running', 'intensity': 'moderate',
+            'duration_minutes': '30', 'distance_km': '5',
+        })
+        assert response.status_code == 302, response.status_code
+
+    def award_badges():
+        with app.test_request_context():
+            check_and_award_badges(db.session.get(User, user_id))
+
+    return {
+        'dashboard.index': (page('/dashboard/'), True),
+        'dashboard.stats': (page('/dashboard/stats'), True),
+        'nutrition.index': (page('/nutrition/'), True),
+        'nutrition.search_foods': (page('/nutrition/food/search?q=chicken'), True),
+        'activity.log_activity': (log_activity, False),
+        'gamification.check_and_award_badges': (award_badges, False),
+    }
+
+def run_size(users, years, repeat):
+    """Generate one data set and time every case against it."""
+    app = create_app('testing')
+    app.config.update(WTF_CSRF_ENABLED=False, QUERY_BUDGET_ENFORCE=False)
+    with app.app_context():
+        generated = generate(users=users, years=years)
+        from backend.app.models.user import User
+        user = User.query.order_by(User.id).first()
+        username, user_id = user.username, user.id
+        engine = db.engine
+
+    client = app.test_client()
+    response = client.post('/auth/login', base_url=BASE_URL, data={'username': username, 'password': PASSWORD})
+    assert response.status_code == 302, 'login failed'
+
+    # Each request gets its own app context and session, as in production
+    results = {}
+    for name, (fn, warm) in _cases(app, client, user_id).items():
+        results[name] = {'cold': measure(engine, fn, repeat, cold=True)}
+        if warm:
+            results[name]['warm'] = measure(engine, fn, repeat, cold=False)
+    return {'users': users, 'years': years, 'generated': generated, 'cases': results}
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old, new):
+    """Print p50 changes per (size, case, mode) between two reports."""
+    previous = {(run['users'], run['years'], case, mode): stats['p50_ms']
+                for run in old['runs'] for case, modes in run['cases'].items() for mode, stats in modes.items()}
+    print(f'\n{"size":<8}{"case":<40}{"mode":<6}{"before":>10}{"after":>10}{"change":>9}')
+    for run in new['runs']:
+        for case, modes in run['cases'].items():
+            for mode, stats in modes.items():
+                before = previous.get((run['users'], run['years'], case, mode))
+                if before is None:
+                    continue
+                change = (stats['p50_ms'] - before) / before * 100 if before else 0
+                size = f'{run["users"]}x{run["years"]:g}'
+                print(f'{size:<8}{case:<40}{mode:<6}{before:>10.2f}{stats["p50_ms"]:>10.2f}{change:>+8.0f}%')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='5x1,25x1,50x2', help='Comma-separated <users>x<years> data sizes.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=None, help='Report path; defaults to benchmarks/results/.')
+    parser.add_argument('--compare', default=None, help='Earlier report to compare against.')
+    args = parser.parse_args()
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'flask': flask.__version__,
+        'sqlalchemy': sqlalchemy.__version__,
+        'sqlite': __import__('sqlite3').sqlite_version,
+        'repeat': args.repeat,
+        'runs': [],
+    }
+    for size in args.sizes.split(','):
+        users, years = size.lower().split('x')
+        run = run_size(int(users), float(years), args.repeat)
+        report['runs'].append(run)
+        rows = run['generated']['rows']
+        print(f'\n{size}: {rows["workouts"]} workouts, {rows["food_entries"]} food entries '
+              f'(generated in {run["generated"]["seconds"]} s)')
+        print(f'{"case":<40}{"mode":<6}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}')
+        for case, modes in run['cases'].items():
+            for mode, stats in modes.items():
+                print(f'{case:<40}{mode:<6}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}{stats["statements"]:>9g}')
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'report-{datetime.utcnow():%Y%m%d-%H%M%S}.json')
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2, default=str)
+    print(f'\nReport written to {output}')
+
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(json.load(handle), report)
+
+if __name__ == '__main__':
+    main()
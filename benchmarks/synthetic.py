@@ -0,0 +1,194 @@
+"""Bulk synthetic data: N users x years of workouts, food entries, goals and badges.
+
+Usage: python -m benchmarks.synthetic --users 50 --years 2 [--database sqlite:///bench.db]
+
+Rows go in with executemany INSERTs and derived tables (daily rollups,
+personal records) are rebuilt once at the end, so a few hundred thousand
+rows take seconds. Every user's password is ``benchmark``.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+from backend.app import db
+from backend.app.models.user import User
+from backend.app.models.workout import Workout, estimate_calories
+from backend.app.models.food import Food, FoodEntry
+from backend.app.models.goal import Goal
+from backend.app.models.gamification import GamificationState, Badge, UserBadge, XP_PER_ACTIVITY_MINUTE
+from benchmarks.bench_food_search import make_foods
+from benchmarks.bench_badges import make_badges
+
+PASSWORD = 'benchmark'
+TIMEZONES = ['UTC', 'Europe/London', 'America/New_York', 'Asia/Kolkata', 'Australia/Sydney']
+EXERCISE_TYPES = {
+    'running': 'cardio', 'cycling': 'cardio', 'swimming': 'cardio', 'walking': 'cardio', 'hiit': 'cardio',
+    'weight_training': 'strength', 'yoga': 'flexibility', 'pilates': 'flexibility', 'rowing': 'cardio',
+}
+MEALS = [('breakfast', 8), ('lunch', 13), ('dinner', 19), ('snack', 16)]
+INSERT_BATCH = 5000
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(insert(model), rows[start:start + INSERT_BATCH])
+
+def _users(count, rng):
+    password_hash = generate_password_hash(PASSWORD)  # hashing is slow, share one
+    offset = db.session.scalar(select(func.count(User.id))) or 0
+    rows = [{
+        'username': f'bench{offset + i}',
+        'email': f'bench{offset + i}@example.com',
+        'password_hash': password_hash,
+        'height_cm': rng.uniform(155, 195),
+        'weight_kg': rng.uniform(50, 110),
+        'age': rng.randint(18, 70),
+        'gender': rng.choice(['M', 'F']),
+        'timezone': rng.choice(TIMEZONES),
+    } for i in range(count)]
+    _insert(User, rows)
+    return db.session.execute(
+        select(User.id, User.weight_kg, User.timezone).where(User.username.in_([r['username'] for r in rows]))
+    ).all()
+
+def _workouts(user, days, per_week, now, rng):
+    from backend.app.utils.dates import to_local_day
+    rows = []
+    for day in range(days):
+        if rng.random() >= per_week / 7:
+            continue
+        activity = rng.choice(list(EXERCISE_TYPES))
+        intensity = rng.choice(['light', 'moderate', 'vigorous'])
+        duration = rng.randint(15, 90)
+        logged_at = now - timedelta(days=day, hours=rng.uniform(0, 12))
+        distance = None
+        if activity in ('running', 'walking'):
+            distance = round(duration / rng.uniform(5, 12), 2)
+        elif activity == 'cycling':
+            distance = round(duration / rng.uniform(2, 4), 2)
+        rows.append({
+            'user_id': user.id,
+            'exercise_type': EXERCISE_TYPES[activity],
+            'activity_name': activity,
+            'duration_minutes': duration,
+            'intensity': intensity,
+            'distance_km': distance,
+            'heart_rate_avg': rng.randint(100, 170),
+            'calories_burned': estimate_calories(activity, intensity, duration, user.weight_kg),
+            'logged_at': logged_at,
+            'local_day': to_local_day(logged_at, user.timezone),
+        })
+    return rows
+
+def _food_entries(user, days, per_day, foods, now, rng):
+    from backend.app.utils.dates import to_local_day
+    rows = []
+    for day in range(days):
+        for meal, hour in rng.sample(MEALS, min(per_day, len(MEALS))):
+            food = rng.choice(foods)
+            grams = rng.uniform(50, 400)
+            factor = grams / 100
+            logged_at = (now - timedelta(days=day)).replace(hour=hour, minute=rng.randint(0, 59))
+            rows.append({
+                'user_id': user.id,
+                'food_id': food.id,
+                'quantity_grams': round(grams, 1),
+                'meal_type': meal,
+                'calories': round(food.calories_per_100g * factor, 2),
+                'protein_g': round(food.protein_g * factor, 2),
+                'fat_g': round(food.fat_g * factor, 2),
+                'carbs_g': round(food.carbs_g * factor, 2),
+                'logged_at': logged_at,
+                'local_day': to_local_day(logged_at, user.timezone),
+            })
+    return rows
+
+def generate(users=10, years=1, workouts_per_week=4, meals_per_day=3, foods=2000, badges=100, seed=42):
+    """Fill the current app's database; returns row counts and timings."""
+    from backend.app.utils.rollups import rebuild_daily_stats
+    from backend.app.utils.records import rebuild
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    days = int(365 * years)
+
+    if not db.session.scalar(select(func.count(Food.id))):
+        _insert(Food, list(make_foods(foods, seed=seed)))
+    if not db.session.scalar(select(func.count(Badge.id))):
+        _insert(Badge, list(make_badges(badges, seed=seed)))
+    food_rows = db.session.execute(
+        select(Food.id, Food.calories_per_100g, Food.protein_g, Food.fat_g, Food.carbs_g)
+    ).all()
+    badge_rows = db.session.execute(select(Badge.id, Badge.condition_type, Badge.condition_value)).all()
+
+    user_rows = _users(users, rng)
+    counts = {'users': len(user_rows), 'workouts': 0, 'food_entries': 0, 'goals': 0, 'user_badges': 0}
+    for user in user_rows:
+        workouts = _workouts(user, days, workouts_per_week, now, rng)
+        _insert(Workout, workouts)
+        entries = _food_entries(user, days, meals_per_day, food_rows, now, rng)
+        _insert(FoodEntry, entries)
+
+        goals = [
+            {'user_id': user.id, 'goal_type': 'activity_minutes', 'target_value': 150, 'current_value': rng.randint(0, 150),
+             'unit': 'minutes', 'goal_period': 'weekly', 'is_active': True},
+            {'user_id': user.id, 'goal_type': 'calorie_intake', 'target_value': 2200, 'current_value': rng.randint(0, 2200),
+             'unit': 'calories', 'goal_period': 'daily', 'is_active': True},
+            {'user_id': user.id, 'goal_type': 'weight_loss', 'target_value': 70, 'current_value': user.weight_kg,
+             'unit': 'kg', 'goal_period': 'overall', 'is_active': rng.random() < 0.5},
+        ]
+        _insert(Goal, goals)
+
+        state = GamificationState(user_id=user.id, total_xp=0, current_level=1, xp_in_current_level=0,
+                                  current_streak=rng.randint(0, 30), longest_streak=30,
+                                  last_activity_date=now.date())
+        state.add_xp(sum(w['duration_minutes'] for w in workouts) * XP_PER_ACTIVITY_MINUTE)
+        db.session.add(state)
+        metrics = {'streak': state.current_streak, 'total_xp': state.total_xp, 'level': state.current_level}
+        earned = [{'user_id': user.id, 'badge_id': badge.id, 'earned_at': now}
+                  for badge in badge_rows if metrics.get(badge.condition_type, 0) >= badge.condition_value]
+        if earned:
+            _insert(UserBadge, earned)
+
+        counts['workouts'] += len(workouts)
+        counts['food_entries'] += len(entries)
+        counts['goals'] += len(goals)
+        counts['user_badges'] += len(earned)
+        db.session.commit()
+
+    counts['daily_user_stats'] = rebuild_daily_stats()
+    for user in user_rows:
+        rebuild(user.id)
+    db.session.commit()
+
+    counts['foods'] = len(food_rows)
+    counts['badges'] = len(badge_rows)
+    return {'rows': counts, 'seconds': round(time.perf_counter() - started, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--workouts-per-week', type=float, default=4)
+    parser.add_argument('--meals-per-day', type=int, default=3)
+    parser.add_argument('--foods', type=int, default=2000)
+    parser.add_argument('--badges', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default=None, help='SQLAlchemy URL; defaults to the development database.')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DEV_DATABASE_URL'] = args.database
+    from backend.app import create_app
+    app = create_app('development')
+    with app.app_context():
+        result = generate(args.users, args.years, args.workouts_per_week, args.meals_per_day,
+                          args.foods, args.badges, args.seed)
+    for table, count in result['rows'].items():
+        print(f'{table:<18}{count:>10}')
+    print(f'generated in {result["seconds"]} s')
+
+if __name__ == '__main__':
+    main()
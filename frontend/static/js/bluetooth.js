@@ -10,6 +10,8 @@ class FitnessDeviceConnector {
         this.characteristic = null;
         this.isConnected = false;
         this.heartRateData = [];
+        this.pendingSamples = [];  // [[epoch_ms, bpm], ...] not yet uploaded
+        this.uploadTimer = null;
         this.listeners = {
             onConnect: null,
             onDisconnect: null,
@@ -91,10 +93,12 @@ class FitnessDeviceConnector {
         const value = event.target.value;
         const heartRate = this.parseHeartRate(value);
 
+        const timestamp = new Date();
         this.heartRateData.push({
             bpm: heartRate,
-            timestamp: new Date()
+            timestamp: timestamp
         });
+        this.pendingSamples.push([timestamp.getTime(), heartRate]);
 
         if (this.listeners.onHeartRateUpdate) {
             this.listeners.onHeartRateUpdate(heartRate);
@@ -134,11 +138,62 @@ class FitnessDeviceConnector {
         return Math.max(...this.heartRateData.map(data => data.bpm));
     }
 
+    /**
+     * Upload buffered samples to a workout's heart-rate endpoint in one batch
+     */
+    async flushSamples(url) {
+        if (this.pendingSamples.length === 0) return;
+
+        const batch = this.pendingSamples.splice(0, 5000);
+        let response;
+        try {
+            response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ samples: batch })
+            });
+        } catch (error) {
+            // Network failure: keep the batch so the next flush retries it
+            this.pendingSamples.unshift(...batch);
+            this.handleError(`Heart rate upload failed: ${error.message}`);
+            return;
+        }
+        if (response.status >= 500) {
+            this.pendingSamples.unshift(...batch);
+            this.handleError(`Heart rate upload failed: HTTP ${response.status}`);
+        } else if (!response.ok) {
+            // Rejected batches would fail again; drop them so later samples still go through
+            this.handleError(`Heart rate batch of ${batch.length} samples rejected: HTTP ${response.status}`);
+        }
+    }
+
+    /**
+     * Upload samples every intervalMs while streaming (one request per batch, not per beat)
+     */
+    startStreaming(url, intervalMs = 30000) {
+        this.stopStreaming();
+        this.uploadTimer = setInterval(() => this.flushSamples(url), intervalMs);
+    }
+
+    /**
+     * Stop periodic uploads and send whatever is still buffered
+     */
+    async stopStreaming(url) {
+        if (this.uploadTimer) {
+            clearInterval(this.uploadTimer);
+            this.uploadTimer = null;
+        }
+        if (url) {
+            await this.flushSamples(url);
+        }
+    }
+
     /**
      * Clear collected data
      */
     clearData() {
         this.heartRateData = [];
+        this.pendingSamples = [];
     }
 
     /**
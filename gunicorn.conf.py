@@ -0,0 +1,26 @@
+"""Gunicorn settings: ``gunicorn -c gunicorn.conf.py run:app``.
+
+With ``preload_app`` the master imports the app once, models, blueprints
+and templates included, and forks it into every worker. Workers start
+in milliseconds instead of each repeating the imports and create_app().
+Each worker then discards the database connections it inherited from
+the master, since a connection can't be shared across processes.
+
+Run ``flask init-db`` before starting the server. Production skips the
+startup schema sync (SCHEMA_SYNC_ON_STARTUP).
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))  # Also sizes each worker's connection pool (backend/config.py)
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = 120
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from run import app
+    from backend.app import db
+    with app.app_context():
+        db.engine.dispose(close=False)  # Leave the master's connections open for the master
@@ -4,6 +4,7 @@ from backend.app import create_app, db
 from backend.app.models.user import User
 from backend.app.models.workout import Workout
 from backend.app.models.goal import Goal
+from backend.app.utils.rollups import rebuild_daily_stats
 
 def seed_data(username="suraj"):
     app = create_app()
@@ -75,7 +76,7 @@ def seed_data(username="suraj"):
                 user_id=user.id,
                 goal_type="activity_minutes",
                 target_value=150,
-                current_value=0, # Will need logic to summation this, but for now 0
+                # current_value is tracked from workouts (utils/goal_progress.py)
                 unit="min",
                 goal_period="weekly",
                 # Let's mock realistic progress
@@ -99,6 +100,7 @@ def seed_data(username="suraj"):
 
         try:
             db.session.commit()
+            rebuild_daily_stats(user_id=user.id)
             print("SUCCESS: Database seeded successfully!")
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,24 @@
+#!/bin/sh
+# Container entry point: migrate once, keep a job worker running, then serve.
+# JOB_WORKERS=0 skips the worker, for deploys that run `flask run-worker` as
+# their own service or set JOBS_RUN_INLINE=1 instead.
+set -e
+flask init-db
+
+# Per-worker metrics snapshots are summed by /metrics; start each run from zero
+if [ -n "$METRICS_DIR" ]; then
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
+
+if [ "${JOB_WORKERS:-1}" -gt 0 ]; then
+    # XP, streaks and badges are applied by this worker; restarted if it exits
+    (
+        while true; do
+            flask run-worker --processes "${JOB_WORKERS:-1}" || echo "Job worker exited with $?; restarting" >&2
+            sleep 1
+        done
+    ) &
+fi
+
+exec gunicorn -c gunicorn.conf.py run:app
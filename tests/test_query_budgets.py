@@ -0,0 +1,64 @@
+"""Per-view SQL statement budgets (utils/query_budget.py), enforced.
+
+Runs the budgeted views under TestingConfig, where QUERY_BUDGET_ENFORCE
+turns an overrun into QueryBudgetExceeded, against a database seeded
+with a year of synthetic history. Each view is requested cold (empty view
+caches, boards not loaded) and again warm.
+
+Run with ``python -m pytest tests``.
+"""
+import pytest
+from backend.app import create_app, db, cache
+from backend.app.utils import leaderboard
+from benchmarks.synthetic import PASSWORD, generate
+
+BASE_URL = 'https://localhost'  # session cookies are Secure
+
+BUDGETED_VIEWS = [
+    '/dashboard/',
+    '/dashboard/stats',
+    '/activity/',
+    '/activity/?exercise_type=cardio',
+    '/activity/api/workouts',
+    '/activity/api/workouts?intensity=vigorous&limit=5',
+    '/nutrition/',
+    '/nutrition/api/entries',
+    '/goals/',
+    '/gamification/dashboard',
+    '/gamification/api/badges',
+    '/gamification/leaderboard',
+    '/gamification/leaderboard?board=streak',
+    '/gamification/leaderboard?board=weekly_minutes',
+]
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    assert app.config['QUERY_BUDGET_ENFORCE']
+    with app.app_context():
+        db.create_all()
+        generate(users=3, years=1, foods=200, badges=20)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture()
+def client(app):
+    cache.clear()
+    leaderboard.reset()
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': 'bench0', 'password': PASSWORD}, base_url=BASE_URL)
+    assert response.status_code == 302
+    return client
+
+@pytest.mark.parametrize('url', BUDGETED_VIEWS)
+def test_view_stays_within_budget(client, url):
+    for attempt in ('cold', 'warm'):
+        response = client.get(url, base_url=BASE_URL)
+        assert response.status_code == 200, (attempt, response.data[:500])
+
+def test_next_page_stays_within_budget(client):
+    first = client.get('/activity/api/workouts?limit=5', base_url=BASE_URL).get_json()
+    assert first['next_cursor']
+    response = client.get(f"/activity/api/workouts?limit=5&after={first['next_cursor']}", base_url=BASE_URL)
+    assert response.status_code == 200
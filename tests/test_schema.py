@@ -0,0 +1,15 @@
+"""ADD COLUMN clauses emitted by the startup schema sync (utils/schema.py)."""
+import pytest
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.app.models.workout import Workout
+from backend.app.utils.schema import _column_ddl
+
+@pytest.mark.parametrize('dialect, expected', [
+    (postgresql.dialect(), 'xp_pending BOOLEAN DEFAULT false NOT NULL'),
+    (sqlite.dialect(), 'xp_pending BOOLEAN DEFAULT 0 NOT NULL'),
+])
+def test_boolean_default_uses_dialect_literal(dialect, expected):
+    assert _column_ddl(Workout.__table__.c.xp_pending, dialect) == expected
+
+def test_nullable_column_without_default():
+    assert _column_ddl(Workout.__table__.c.heart_rate_avg, postgresql.dialect()) == 'heart_rate_avg INTEGER'
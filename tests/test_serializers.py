@@ -0,0 +1,30 @@
+"""json_columns() (utils/serializers.py) must stay in step with to_dict()."""
+import pytest
+from backend.app import create_app, db
+from backend.app.utils import serializers
+from benchmarks.synthetic import generate
+
+MODELS = sorted(
+    (mapper.class_ for mapper in db.Model.registry.mappers if hasattr(mapper.class_, 'json_columns')),
+    key=lambda model: model.__name__,
+)
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        generate(users=1, years=1, foods=50, badges=10)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_models_declare_json_columns():
+    assert MODELS
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: model.__name__)
+def test_json_columns_match_to_dict(app, model):
+    obj = db.session.execute(db.select(model).limit(1)).scalar_one()
+    assert list(model.json_columns()) == list(obj.to_dict())
+    row = serializers.rows(serializers.select_json(model).limit(1))[0]
+    assert list(row) == list(obj.to_dict())
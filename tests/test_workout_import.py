@@ -0,0 +1,61 @@
+"""Bulk workout import (utils/workout_import.py) against archived history."""
+import io
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from backend.app import create_app, db
+from backend.app.models.user import User
+from backend.app.models.gamification import GamificationState
+from backend.app.models.stats import DailyUserStats
+from backend.app.models.records import PersonalRecord
+from backend.app.models.archive import ArchivedWorkout
+from backend.app.utils import archive
+from backend.app.utils.workout_import import import_workouts
+
+@pytest.fixture()
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='importer', email='importer@example.com', weight_kg=70)
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(GamificationState(user_id=user.id))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _export(days_ago):
+    start = datetime.utcnow() - timedelta(days=days_ago)
+    lines = ['exercise_type,activity_name,duration_minutes,distance_km,logged_at']
+    for i in range(12):
+        lines.append(f'cardio,running,{20 + i},{3 + i % 4},{(start + timedelta(days=i)).isoformat()}')
+    return '\n'.join(lines) + '\n'
+
+def _snapshot(user_id):
+    stats = db.session.execute(
+        select(func.count(), func.sum(DailyUserStats.workout_minutes), func.sum(DailyUserStats.workout_count))
+        .where(DailyUserStats.user_id == user_id)
+    ).one()
+    records = db.session.execute(
+        select(PersonalRecord.record_type, PersonalRecord.workout_id, PersonalRecord.value)
+        .where(PersonalRecord.user_id == user_id).order_by(PersonalRecord.record_type)
+    ).all()
+    return db.session.get(GamificationState, user_id).total_xp, tuple(stats), records
+
+def test_reimport_after_archiving_skips_archived_rows(app):
+    user = User.query.filter_by(username='importer').one()
+    export = _export(days_ago=800)
+
+    first = import_workouts(user, io.StringIO(export), batch_size=5)
+    assert first['imported'] == 12
+    archive.archive_old_rows(before=datetime.utcnow() - timedelta(days=400))
+    assert db.session.scalar(select(func.count()).select_from(ArchivedWorkout)) > 0
+    before = _snapshot(user.id)
+
+    again = import_workouts(user, io.StringIO(export), batch_size=5)
+    assert again['imported'] == 0
+    assert again['duplicates'] == 12
+    assert _snapshot(user.id) == before